@@ -10,6 +10,9 @@ from dataclasses import dataclass
 
 from tasks.Load.connect_prefect_workpool import connect_prefect_workpool
 from tasks.Load.finish_ETL import finish_ETL
+from tasks.Extract.check_source_manifest import check_source_manifest
+from tasks.Load.update_source_manifest import update_source_manifest
+from tasks.Transform.copy_mode import set_copy_on_write
 
 
 # Importar subflows
@@ -34,6 +37,13 @@ global_settings = settings.get("global", {})
 flow_settings   = settings.get("flows", {})
 LOCAL_DB_PATH   = global_settings.get("LOCAL_DB_PATH")
 MAX_TRIES       = int(global_settings.get("MAX_TRIES", 3))
+MANIFEST_PATH   = global_settings.get("MANIFEST_PATH") or str(BASE_DIR / "ETL_manifest.json")
+FORCE_RELOAD    = bool(global_settings.get("FORCE_RELOAD", False))
+WATERMARK_PATH  = global_settings.get("WATERMARK_PATH") or str(BASE_DIR / "ETL_watermarks.json")
+CACHE_DIR       = global_settings.get("CACHE_DIR")
+CACHE_MAX_MB    = global_settings.get("CACHE_MAX_MB", 1024)
+COPY_ON_WRITE   = bool(global_settings.get("COPY_ON_WRITE", False))
+QUALITY_ENGINE  = global_settings.get("QUALITY_ENGINE", "native")   # "native" o "ge" (Great Expectations)
 
 @dataclass
 class FlowJob:
@@ -42,11 +52,20 @@ class FlowJob:
     config: dict
     status: str = "pending"
     tries: int = 0
+    fingerprint: dict = None
 
 
 @flow(name="etl_orquestador")
-def etl_orquestador():
+def etl_orquestador(force_reload: bool = False):
+    """
+    Ejecuta todos los flows configurados. Los flows cuyas entradas (SOURCE_PATH/PC_PATH)
+    y settings no han cambiado desde su última carga correcta se omiten, según el manifiesto
+    MANIFEST_PATH; `force_reload=True` (o FORCE_RELOAD en settings) los ejecuta igualmente.
+    """
     logger = get_run_logger()
+    force_reload = force_reload or FORCE_RELOAD
+    # Copy-on-write de pandas: las tareas de transformación no copian la tabla completa
+    set_copy_on_write(COPY_ON_WRITE)
     start_time = time.time()
 
     flows_to_run = []
@@ -68,6 +87,15 @@ def etl_orquestador():
         if not isinstance(conf, dict):
             logger.warning(f"Ignorando configuración de flow '{alias}': su sección en settings no es un dict.")
             continue
+        # Los flows incrementales comparten el archivo de watermarks global salvo que definan el suyo
+        if conf.get("INCREMENTAL"):
+            conf.setdefault("WATERMARK_PATH", WATERMARK_PATH)
+        # Caché de extracciones compartida por todos los flows (si está configurada)
+        if CACHE_DIR:
+            conf.setdefault("CACHE_DIR", CACHE_DIR)
+            conf.setdefault("CACHE_MAX_MB", CACHE_MAX_MB)
+        # Motor de las comprobaciones de calidad, común salvo que el flow defina el suyo
+        conf.setdefault("QUALITY_ENGINE", QUALITY_ENGINE)
         # OK, agregamos a la lista: (alias, función, settings_para_ese_flow)
         flows_to_run.append(FlowJob(alias, flow_fn, conf))
 
@@ -85,11 +113,22 @@ def etl_orquestador():
 
         
 
+    # 2) Comparar huellas de entrada con el manifiesto para omitir flows sin cambios
+    for job in flows_to_run:
+        code_mf, msg_mf, mf_result = check_source_manifest(job.alias, job.config, MANIFEST_PATH)
+        logger.info(msg_mf)
+        job.fingerprint = mf_result.get("fingerprint")
+        if code_mf == 0 and mf_result.get("unchanged"):
+            if force_reload:
+                logger.info(f"🔁 force_reload activo: se recarga '{job.alias}' aunque no haya cambios.")
+            else:
+                job.status = "skipped"
+
     logger.info(f"Se van a ejecutar {len(flows_to_run)} flows con un máximo de {MAX_TRIES} intentos cada uno.")
 
-    while any(job.status != "completed" and job.tries < MAX_TRIES for job in flows_to_run):
+    while any(job.status not in ("completed", "skipped") and job.tries < MAX_TRIES for job in flows_to_run):
         for job in flows_to_run:
-            if job.status == "completed" or job.tries >= MAX_TRIES:
+            if job.status in ("completed", "skipped") or job.tries >= MAX_TRIES:
                 continue
 
             logger.info(f"Ejecutando flow '{job.alias}' (intento {job.tries + 1})")
@@ -101,6 +140,8 @@ def etl_orquestador():
                     job.status = "completed"
                     job.message = result[1] if len(result) > 1 else ""
                     logger.info(f"✅ Flow '{job.alias}' completado: {job.message}")
+                    code_mf, msg_mf = update_source_manifest(job.alias, job.fingerprint, MANIFEST_PATH)
+                    logger.info(msg_mf)
                 else:
                     job.status = "failed"
                     logger.error(f"❌ Flow '{job.alias}' fallido (intento {job.tries})")
@@ -110,7 +151,10 @@ def etl_orquestador():
                 logger.error(f"❌ Excepción al ejecutar flow '{job.alias}' (intento {job.tries}): {e}")
 
     # Evaluación final
-    failed_jobs = [job for job in flows_to_run if job.status != "completed"]
+    failed_jobs = [job for job in flows_to_run if job.status not in ("completed", "skipped")]
+    skipped = [job.alias for job in flows_to_run if job.status == "skipped"]
+    if skipped:
+        logger.info(f"⏭️ Flows omitidos por entradas sin cambios: {skipped}")
     total_time = time.time() - start_time
 
     if not failed_jobs:
@@ -0,0 +1,79 @@
+# benchmarks/bench_occurrence_index.py
+"""
+Rendimiento del kernel vectorizado de numeración de ocurrencias (create_new_index y
+transform_col_unique) frente al bucle Python anterior.
+
+Uso (desde la raíz del repositorio):
+    python -m benchmarks.bench_occurrence_index                  # 1M, 10M y 50M filas
+    python -m benchmarks.bench_occurrence_index --sizes 1000000 --legacy
+
+Las claves imitan Sales_DAY (YYYYMMDD) con ~3.650 días distintos, como en los CSV de ventas.
+El bucle anterior solo se mide con --legacy (a 50M filas tarda varios minutos).
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from tasks.Transform.occurrence_index import factorize_keys, invalid_keys, occurrence_numbers, suffix_keys
+
+
+def make_keys(n_rows: int, n_days: int = 3650, seed: int = 0) -> pd.Series:
+    """Columna tipo Sales_DAY: enteros YYYYMMDD ordenados, como llegan en el CSV."""
+    rng = np.random.default_rng(seed)
+    days = pd.date_range("2015-01-01", periods=n_days, freq="D").strftime("%Y%m%d").astype(int).to_numpy()
+    return pd.Series(days[np.sort(rng.integers(0, n_days, n_rows))])
+
+
+def legacy_index(values: pd.Series) -> pd.Series:
+    """Implementación anterior de create_new_index (validación + apply con contadores)."""
+    keys = values.astype(str)
+    for v in keys:
+        if not (v.isdigit() or v.replace("-", "").isdigit()):
+            raise ValueError(v)
+    counters = {}
+
+    def make_index(val_str: str) -> str:
+        cnt = counters.get(val_str, 0)
+        counters[val_str] = cnt + 1
+        return f"{val_str}{cnt}"
+
+    return keys.apply(make_index)
+
+
+def vectorized_index(values: pd.Series) -> pd.Series:
+    """Los mismos pasos que create_new_index con el kernel compartido."""
+    codes, ukeys = factorize_keys(values)
+    if invalid_keys(ukeys).any():
+        raise ValueError("clave inválida")
+    occ = occurrence_numbers(codes, ukeys, {})
+    return suffix_keys(codes, ukeys, occ)
+
+
+def timed(fn, keys: pd.Series) -> float:
+    start = time.perf_counter()
+    fn(keys)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000_000, 10_000_000, 50_000_000])
+    parser.add_argument("--legacy", action="store_true", help="Medir también el bucle anterior")
+    args = parser.parse_args(argv)
+
+    print(f"{'filas':>12} {'kernel (s)':>11} {'filas/s':>14} {'anterior (s)':>13} {'speedup':>8}")
+    for n in args.sizes:
+        keys = make_keys(n)
+        t_new = timed(vectorized_index, keys)
+        line = f"{n:>12,} {t_new:>11.2f} {n / t_new:>14,.0f}"
+        if args.legacy:
+            t_old = timed(legacy_index, keys)
+            line += f" {t_old:>13.2f} {t_old / t_new:>7.1f}x"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# benchmarks/memory_report.py
+"""
+Pico de memoria (RSS) de los pasos de transformación de cada flow, con y sin copy-on-write
+(ajuste global COPY_ON_WRITE).
+
+Uso (desde la raíz del repositorio, Linux/macOS):
+    python -m benchmarks.memory_report                    # 2M filas por flow
+    python -m benchmarks.memory_report --rows 5000000 --flows sales oos
+
+Cada combinación (flow, modo) se ejecuta en un subproceso nuevo para que el pico medido
+sea solo suyo (incluye el intérprete con pandas y prefect, ~200 MB). Los datos son sintéticos con la forma de los CSV de origen y se
+leen con extract_csv; los pasos de calidad y de carga (Great Expectations, MotherDuck) no
+se incluyen.
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Columna de fecha de cada flow de hechos (mismos pasos: índice, fecha, orden)
+FACT_FLOWS = {"sales": "Sales_DAY", "delivery": "Delivery_DAY", "oos": "OoS_DAY"}
+
+
+def make_csv(path: Path, n_rows: int, day_col: str, seed: int = 0) -> None:
+    """CSV ';' con una columna YYYYMMDD sin ordenar del todo y columnas de producto/punto de venta."""
+    rng = np.random.default_rng(seed)
+    days = pd.date_range("2015-01-01", periods=365, freq="D").strftime("%Y%m%d").astype(int).to_numpy()
+    day = days[np.sort(rng.integers(0, len(days), n_rows))]
+    tail = n_rows // 20
+    day[-tail:] = rng.permutation(day[-tail:])
+    pd.DataFrame({
+        day_col: day,
+        "Outlet": rng.integers(1, 5000, n_rows),
+        "Product_Code": rng.choice([f"P{i:04d}" for i in range(800)], n_rows),
+        "Location": rng.choice(["Urbano", "Rural", "Costa", "Montaña"], n_rows),
+        "Units": rng.integers(0, 50, n_rows),
+    }).to_csv(path, sep=";", index=False)
+
+
+def run_steps(csv_path: str, day_col: str) -> None:
+    """Pasos de transformación de un flow de hechos en modo pandas."""
+    from prefect.logging import disable_run_logger
+    from tasks.Extract.extract_csv import extract_csv
+    from tasks.Transform.rename_col import rename_col
+    from tasks.Transform.create_new_index import create_new_index
+    from tasks.Transform.transform_date import transform_date
+    from tasks.Transform.sort_dates import sort_dates
+    from tasks.Transform.transform_nulls import transform_nulls
+    from tasks.Transform.transform_cat_to_num import transform_cat_to_num
+
+    with disable_run_logger():
+        steps = [
+            lambda df: extract_csv.fn(csv_path, ";"),
+            lambda df: rename_col.fn(df, {"Units": "Units_sold"}),
+            lambda df: create_new_index.fn(df, day_col, "row_ID"),
+            lambda df: transform_date.fn(df, day_col, "YYYYMMDD"),
+            lambda df: sort_dates.fn(df, day_col, "ASC"),
+            # transform_nulls devuelve (code, df, msg) con code=1 si OK
+            lambda df: (lambda c, d, m: (0 if c == 1 else 9, m, d))(*transform_nulls.fn(df, "Units_sold")),
+            lambda df: transform_cat_to_num.fn(df, "Location"),
+        ]
+        df = None
+        for step in steps:
+            code, msg, df = step(df)
+            if code != 0:
+                raise RuntimeError(msg)
+
+
+def peak_rss_mb() -> float:
+    """
+    Pico de RSS del proceso en MB. En Linux se usa VmHWM (/proc), porque ru_maxrss se
+    hereda del proceso padre a través de exec; en macOS, ru_maxrss (bytes).
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / (1024 if sys.platform == "darwin" else 1)
+
+
+def worker(csv_path: str, day_col: str, cow: bool) -> dict:
+    from tasks.Transform.copy_mode import set_copy_on_write
+    set_copy_on_write(cow)
+    start = time.perf_counter()
+    run_steps(csv_path, day_col)
+    elapsed = time.perf_counter() - start
+    return {"peak_mb": peak_rss_mb(), "seconds": elapsed}
+
+
+def measure(csv_path: Path, day_col: str, cow: bool) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.memory_report", "--worker", str(csv_path), day_col,
+         "1" if cow else "0"],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--flows", nargs="+", choices=list(FACT_FLOWS), default=list(FACT_FLOWS))
+    parser.add_argument("--worker", nargs=3, metavar=("CSV", "DAY_COL", "COW"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        csv_path, day_col, cow = args.worker
+        print(json.dumps(worker(csv_path, day_col, cow == "1")))
+        return
+
+    print(f"{'flow':<10} {'filas':>11} {'copias (MB)':>12} {'CoW (MB)':>10} {'ahorro':>8} {'t copias':>9} {'t CoW':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for flow in args.flows:
+            day_col = FACT_FLOWS[flow]
+            csv_path = Path(tmp) / f"{flow}.csv"
+            make_csv(csv_path, args.rows, day_col)
+            before = measure(csv_path, day_col, cow=False)
+            after = measure(csv_path, day_col, cow=True)
+            saving = 1 - after["peak_mb"] / before["peak_mb"]
+            print(
+                f"{flow:<10} {args.rows:>11,} {before['peak_mb']:>12.0f} {after['peak_mb']:>10.0f} "
+                f"{saving:>7.0%} {before['seconds']:>8.1f}s {after['seconds']:>6.1f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
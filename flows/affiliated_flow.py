@@ -13,6 +13,8 @@ from tasks.Transform.join_tables import join_tables
 from tasks.Transform.transform_cat_to_num import transform_cat_to_num
 from tasks.Quality.check_nulls import check_nulls
 from tasks.Quality.check_unique import check_unique
+from tasks.Quality.profile_columns import profile_columns
+from tasks.Load.update_quality_profiles import update_quality_profiles
 from tasks.Quality.check_datatypes import check_datatypes
 from tasks.Load.connect_local_duckdb import connect_local_duckdb
 from tasks.Load.create_local_table import create_local_table
@@ -21,6 +23,10 @@ from tasks.Quality.error_handling import error_handling
 from tasks.Load.load_table_to_cloud import load_table_to_cloud
 from tasks.Load.connect_cloud_db import connect_cloud_db
 from tasks.Load.update_cloud_summary import update_cloud_summary
+from tasks.Extract.extract_csv_duckdb import extract_csv_duckdb
+from tasks.Transform.rename_col_duckdb import rename_col_duckdb
+from tasks.Transform.group_by_duckdb import group_by_duckdb
+from tasks.Transform.join_tables_duckdb import join_tables_duckdb
 
 @flow(name="affiliated_flow")
 def affiliated_flow(settings: dict):
@@ -32,14 +38,20 @@ def affiliated_flow(settings: dict):
       3) extract_csv(PC_PATH, ";")
       4) group_by(df_cp, "cp", AGG_MAP)
       5) join_tables("cp", "FULL", df, df_cp)
-      6) transform_cat_to_num(df, "Location")
+      6) transform_cat_to_num(df, "Location", con=con)   (diccionario persistente)
       7) transform_cat_to_num(df, "Tam_m2", Tam_map)
-      8) check_nulls(df)
-      9) check_unique(df, TABLE_PK)
-     10) check_datatypes(df, QUALITY)
+     7b) profile_columns(df, TABLE_PK)   (perfil reutilizado por los pasos 8–12)
+      8) check_nulls(df, QUALITY_ENGINE, profile)
+      9) check_unique(df, TABLE_PK, QUALITY_ENGINE, profile=profile)
+     10) check_datatypes(df, QUALITY, profile)
      11) connect_local_duckdb(LOCAL_DB_PATH)
      12) create_local_table(df, TABLE_NAME, con)
      13) update_summary(df, TABLE_ID, TABLE_NAME, con)
+     14) update_quality_profiles(profile, TABLE_ID, TABLE_NAME, con)   (si falla, solo warning)
+    La conexión (paso 11) se abre antes del paso 6, porque los diccionarios de categorías
+    se guardan en la base de datos.
+    Con ENGINE="duckdb" en settings, los pasos 1-5 y 9 se ejecutan como SQL dentro de la
+    conexión DuckDB (conectando primero) y solo la tabla unida se trae a pandas.
     Si en algún paso code != 0, se aborta y se llama a error_handling.
     Si todo OK, al final devuelve (TABLE_ID, TABLE_NAME, df).
     """
@@ -56,6 +68,11 @@ def affiliated_flow(settings: dict):
     TABLE_PK    = settings["TABLE_PK"]
     QUALITY     = settings.get("QUALITY", {})
     AGG_MAP     = settings.get("AGG_MAP", {})   # dict para group_by en df_cp
+    GROUP_BY_BACKEND = settings.get("GROUP_BY_BACKEND", "pandas")   # "pandas", "duckdb" o "arrow"
+    ENGINE      = str(settings.get("ENGINE", "pandas")).lower()   # "pandas" o "duckdb"
+    CACHE_DIR   = settings.get("CACHE_DIR")   # caché de extracciones parseadas (None → sin caché)
+    CACHE_MAX_MB = settings.get("CACHE_MAX_MB", 1024)
+    QUALITY_ENGINE = settings.get("QUALITY_ENGINE", "native")   # "native" o "ge" (Great Expectations)
     
     
     Tam_map     = {              
@@ -76,49 +93,118 @@ def affiliated_flow(settings: dict):
 
     # Ejecución secuencial de tareas
     while task_code == 0:
-        # 1) Extract CSV principal
-        code_01, msg_01, df = extract_csv(str(SOURCE_PATH), ";")
-        task_code, task_msg = code_01, msg_01
-        logger.info(msg_01)
-        if task_code != 0:
-            break
-
-        # 2) Renombrar columnas del df principal
-        #    Ajusta el mapeo según lo indicado:
+        # Mapeo de renombrado del df principal
         rename_map = {
             "Affiliated_NAME": "Affiliated_Name",
             "POSTALCODE": "cp",
             "Management_Cluster": "Cluster"
         }
-        code_02, msg_02, df = rename_col(df, rename_map)
-        task_code, task_msg = code_02, msg_02
-        logger.info(msg_02)
-        if task_code != 0:
-            break
 
-        # 3) Extract CSV de códigos postales
-        code_03, msg_03, df_cp = extract_csv(str(PC_PATH), ";")
-        task_code, task_msg = code_03, msg_03
-        logger.info(msg_03)
-        if task_code != 0:
-            break
+        if ENGINE == "duckdb":
+            # Modo DuckDB: pasos 1-5 y la unicidad (9) se ejecutan como SQL dentro de la
+            # conexión; solo la dimensión ya unida se trae a pandas para los pasos 6-10.
+            # 11) Conectar DuckDB primero: los pasos SQL trabajan sobre ella
+            code_11, msg_11, con = connect_cloud_db()
+            task_code, task_msg = code_11, msg_11
+            logger.info(msg_11)
+            if code_11 != 0 or con is None:
+                break
 
-        # 4) Agrupar df_cp por "cp" con AGG_MAP
-        code_04, msg_04, df_cp = group_by(df_cp, "cp", AGG_MAP)
-        task_code, task_msg = code_04, msg_04
-        logger.info(msg_04)
-        if task_code != 0:
-            break
+            # 1) Extract CSV principal → tabla temporal
+            code_01, msg_01, rel = extract_csv_duckdb(str(SOURCE_PATH), ";", con, f"stg_{TABLE_NAME}")
+            task_code, task_msg = code_01, msg_01
+            logger.info(msg_01)
+            if task_code != 0:
+                break
 
-        # 5) Unir df principal con df_cp agrupado por "cp"
-        code_05, msg_05, df = join_tables("cp", "LEFT", df, df_cp)
-        task_code, task_msg = code_05, msg_05
-        logger.info(msg_05)
-        if task_code != 0:
-            break
+            # 2) Renombrar columnas
+            code_02, msg_02, rel = rename_col_duckdb(con, rel, rename_map)
+            task_code, task_msg = code_02, msg_02
+            logger.info(msg_02)
+            if task_code != 0:
+                break
+
+            # 3) Extract CSV de códigos postales → tabla temporal
+            code_03, msg_03, rel_cp = extract_csv_duckdb(str(PC_PATH), ";", con, f"stg_{TABLE_NAME}_cp")
+            task_code, task_msg = code_03, msg_03
+            logger.info(msg_03)
+            if task_code != 0:
+                break
+
+            # 4) Agrupar por "cp" con AGG_MAP
+            code_04, msg_04, rel_cp = group_by_duckdb(con, rel_cp, "cp", AGG_MAP)
+            task_code, task_msg = code_04, msg_04
+            logger.info(msg_04)
+            if task_code != 0:
+                break
+
+            # 5) Unir por "cp"
+            code_05, msg_05, rel = join_tables_duckdb(con, "cp", "LEFT", rel, rel_cp)
+            task_code, task_msg = code_05, msg_05
+            logger.info(msg_05)
+            if task_code != 0:
+                break
+
+            # 9) Check unique en la PK (antes de traer los datos)
+            code_09, msg_09 = check_unique(rel, TABLE_PK, con=con)
+            task_code, task_msg = code_09, msg_09
+            logger.info(msg_09)
+            if task_code != 0:
+                break
+
+            try:
+                df = con.execute(f"SELECT * FROM {rel}").df()
+            except Exception as e:
+                task_code, task_msg = 9, f"❌ Error trayendo '{rel}' desde DuckDB: {e}"
+                break
+        else:
+            # 1) Extract CSV principal
+            code_01, msg_01, df = extract_csv(str(SOURCE_PATH), ";", cache_dir=CACHE_DIR, cache_max_mb=CACHE_MAX_MB)
+            task_code, task_msg = code_01, msg_01
+            logger.info(msg_01)
+            if task_code != 0:
+                break
 
-        # 6) transform_cat_to_num sobre "Location"
-        code_06, msg_06, df = transform_cat_to_num(df, "Location")
+            # 2) Renombrar columnas del df principal
+            code_02, msg_02, df = rename_col(df, rename_map)
+            task_code, task_msg = code_02, msg_02
+            logger.info(msg_02)
+            if task_code != 0:
+                break
+
+            # 3) Extract CSV de códigos postales
+            code_03, msg_03, df_cp = extract_csv(str(PC_PATH), ";", cache_dir=CACHE_DIR, cache_max_mb=CACHE_MAX_MB)
+            task_code, task_msg = code_03, msg_03
+            logger.info(msg_03)
+            if task_code != 0:
+                break
+
+            # 4) Agrupar df_cp por "cp" con AGG_MAP
+            code_04, msg_04, df_cp = group_by(df_cp, "cp", AGG_MAP, GROUP_BY_BACKEND)
+            task_code, task_msg = code_04, msg_04
+            logger.info(msg_04)
+            if task_code != 0:
+                break
+
+            # 5) Unir df principal con df_cp agrupado por "cp"
+            code_05, msg_05, df = join_tables("cp", "LEFT", df, df_cp)
+            task_code, task_msg = code_05, msg_05
+            logger.info(msg_05)
+            if task_code != 0:
+                break
+
+        # 11) Conectamos con MotherDuck (Cloud DW), salvo que ya estemos conectados:
+        #     los diccionarios de categorías de los pasos 6 y 7 se guardan allí
+        if con is None:
+            logger.info("▶️ Intentando conectar a DuckDB Cloud...")
+            code_11, msg_11, con = connect_cloud_db()
+            task_code, task_msg = code_11, msg_11
+            logger.info(msg_11)
+            if code_11 != 0 or con is None:
+                break
+
+        # 6) transform_cat_to_num sobre "Location" (códigos estables entre ejecuciones)
+        code_06, msg_06, df = transform_cat_to_num(df, "Location", con=con)
         task_code, task_msg = code_06, msg_06
         logger.info(msg_06)
         if task_code != 0:
@@ -128,30 +214,38 @@ def affiliated_flow(settings: dict):
         if Tam_map is not None:
             code_07, msg_07, df = transform_cat_to_num(df, "Tam_m2", Tam_map)
         else:
-            code_07, msg_07, df = transform_cat_to_num(df, "Tam_m2")
+            code_07, msg_07, df = transform_cat_to_num(df, "Tam_m2", con=con)
         task_code, task_msg = code_07, msg_07
         logger.info(msg_07)
         if task_code != 0:
             break
 
+        # 7b) Perfil de columnas en una pasada, reutilizado por las comprobaciones y la carga
+        code_07b, msg_07b, profile = profile_columns(df, TABLE_PK)
+        task_code, task_msg = code_07b, msg_07b
+        logger.info(msg_07b)
+        if task_code != 0:
+            break
+
         # 8) check_nulls en df
-        code_08, msg_08 = check_nulls(df)
+        code_08, msg_08 = check_nulls(df, QUALITY_ENGINE, profile)
         task_code, task_msg = code_08, msg_08
         logger.info(msg_08)
         if task_code != 0:
             break
 
-        # 9) check_unique en la PK
-        code_09, msg_09 = check_unique(df, TABLE_PK)
-        task_code, task_msg = code_09, msg_09
-        logger.info(msg_09)
-        if task_code != 0:
-            break
+        # 9) check_unique en la PK (en modo DuckDB ya se hizo en SQL)
+        if ENGINE != "duckdb":
+            code_09, msg_09 = check_unique(df, TABLE_PK, QUALITY_ENGINE, profile=profile)
+            task_code, task_msg = code_09, msg_09
+            logger.info(msg_09)
+            if task_code != 0:
+                break
 
         # 10) check_datatypes según QUALITY (si hay QUALITY)
         if QUALITY:
             # según convención: check_datatypes devuelve (code, df_mod, msg)
-            code_10, msg_10, df = check_datatypes(df, QUALITY)
+            code_10, msg_10, df = check_datatypes(df, QUALITY, profile)
             task_code, task_msg = code_10, msg_10
             if task_code != 0:
                 # error en datatypes
@@ -163,17 +257,9 @@ def affiliated_flow(settings: dict):
         if task_code != 0:
             break
 
-        # 11) Conectamos con MotherDuck (Cloud DW)
-        logger.info("▶️ Intentando conectar a DuckDB Cloud...")
-        code_11, msg_11, con = connect_cloud_db()
-        task_code, task_msg = code_11, msg_11
-        logger.info(msg_11)
-        if code_11 != 0 or con is None:
-            break
-
         # 12) Creamos (o actualizamos) la tabla en el cloud        
         logger.info(f"▶️ Intentando cargar tabla '{TABLE_NAME}' al cloud...")
-        code_12, msg_12, load_report =load_table_to_cloud(df, TABLE_NAME, con)
+        code_12, msg_12, load_report =load_table_to_cloud(df, TABLE_NAME, con, profile)
         task_code, task_msg = code_12, msg_12
         logger.info(msg_12)
         if task_code != 0:
@@ -187,6 +273,14 @@ def affiliated_flow(settings: dict):
         if task_code != 0:
             break
 
+        # 14) Persistir el perfil de calidad (seguimiento de deriva)
+        # Solo es seguimiento: si falla se avisa, pero la carga ya está hecha y el flow sigue
+        code_14, msg_14 = update_quality_profiles(profile, TABLE_ID, TABLE_NAME, con)
+        if code_14 != 0:
+            logger.warning(msg_14)
+        else:
+            logger.info(msg_14)
+
         # Si hemos llegado aquí, todo OK; salimos del while
         break
 
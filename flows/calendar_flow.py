@@ -44,6 +44,7 @@ def calendar_flow(settings: dict) -> Tuple[int, str]:
     TABLE_ID  = settings["TABLE_ID"]
     TABLE_NAME= settings["TABLE_NAME"]
     QUALITY= settings["QUALITY"]
+    INCREMENTAL = settings.get("INCREMENTAL", False)  # solo días posteriores al último cargado
 
 
     # Variables de control
@@ -66,30 +67,39 @@ def calendar_flow(settings: dict) -> Tuple[int, str]:
         if task_code != 0:
             break
 
-        # 3) Transform: crear calendario de FI a FF
-        code_03, msg_03, df_cal = create_calendar(FI, FF)
+        # 3) Conectar DuckDB (antes del calendario: el modo incremental consulta la tabla)
+        code_03, msg_03, con = connect_cloud_db()
         task_code, task_msg = code_03, msg_03
         logger.info(msg_03)
         if task_code != 0:
             break
 
-        # 4) Transform: unir ambos DataFrames por "Day"
-        code_04, msg_04, df = join_tables(TABLE_PK, "FULL", df_cal, df)
+        # 4) Transform: crear calendario de FI a FF (o solo los días nuevos si INCREMENTAL)
+        if INCREMENTAL:
+            code_04, msg_04, df_cal = create_calendar(FI, FF, con, TABLE_NAME)
+        else:
+            code_04, msg_04, df_cal = create_calendar(FI, FF)
         task_code, task_msg = code_04, msg_04
         logger.info(msg_04)
+        if task_code != 0 or df_cal.empty:
+            break
 
-        #5) Quality check
-        code_05, msg_05, df = check_datatypes(df, QUALITY )
+        # 5) Transform: unir ambos DataFrames por "Day"
+        # En incremental solo interesan los festivos de los días nuevos → LEFT join
+        code_05, msg_05, df = join_tables(TABLE_PK, "LEFT" if INCREMENTAL else "FULL", df_cal, df)
         task_code, task_msg = code_05, msg_05
+        logger.info(msg_05)
+        if task_code != 0:
+            break
 
-        # 6) Conectar DuckDB
-        code_06, msg_06, con = connect_cloud_db()
+        # 6) Quality check
+        code_06, msg_06, df = check_datatypes(df, QUALITY)
         task_code, task_msg = code_06, msg_06
         logger.info(msg_06)
         if task_code != 0:
             break
 
-        # 7) Crear tabla calendar
+        # 7) Crear o ampliar tabla calendar
         code_07, msg_07, load_report = load_table_to_cloud(df, TABLE_NAME, con)
         task_code, task_msg = code_07, msg_07
         logger.info(msg_07)
@@ -106,5 +116,7 @@ def calendar_flow(settings: dict) -> Tuple[int, str]:
     if task_code != 0:
         error_handling(task_code, task_msg, df)
         raise RuntimeError(f"Abortado calendar_flow")
+    elif df_cal.empty:
+        return (0, f"✅ calendar_flow completado! Tabla {TABLE_ID} - {TABLE_NAME} ya estaba al día ")
     else:
         return (0, f"✅ calendar_flow completado! Tabla {TABLE_ID} - {TABLE_NAME} cargada con éxito en Local ")
@@ -6,17 +6,27 @@ from prefect import flow, get_run_logger
 from typing import Tuple
 
 from tasks.Extract.extract_csv import extract_csv
+from tasks.Extract.extract_csv_incremental import extract_csv_incremental
 from tasks.Quality.check_nulls import check_nulls
 from tasks.Transform.create_new_index import create_new_index
 from tasks.Transform.transform_date import transform_date
 from tasks.Transform.sort_dates import sort_dates
 from tasks.Quality.check_unique import check_unique
+from tasks.Quality.profile_columns import profile_columns
+from tasks.Load.update_quality_profiles import update_quality_profiles
 from tasks.Quality.error_handling import error_handling
 from tasks.Load.connect_local_duckdb import connect_local_duckdb
 from tasks.Load.create_local_table import create_local_table
 from tasks.Load.update_cloud_summary import update_cloud_summary
 from tasks.Load.load_table_to_cloud import load_table_to_cloud
 from tasks.Load.connect_cloud_db import connect_cloud_db
+from tasks.Load.update_watermark import update_watermark
+from tasks.Load.stream_fact_table import stream_fact_table
+from tasks.Extract.extract_csv_duckdb import extract_csv_duckdb
+from tasks.Transform.create_new_index_duckdb import create_new_index_duckdb
+from tasks.Transform.transform_date_duckdb import transform_date_duckdb
+from tasks.Transform.sort_dates_duckdb import sort_dates_duckdb
+from tasks.Transform.lazy_pipeline import LazyPipeline, execute_pipeline
 
 
 @flow(name="oos_flow")
@@ -31,28 +41,208 @@ def oos_flow(settings: dict) -> Tuple[int, str]:
     TABLE_PK    = settings["TABLE_PK"]
     TABLE_ID    = settings["TABLE_ID"]
     TABLE_NAME  = settings["TABLE_NAME"]
+    # Modos opcionales (desactivados en ETL_settings.json; se activan por flow):
+    #   "CHUNK_SIZE": 500000 → streaming por bloques de ese tamaño; omite sort_dates y
+    #     check_unique (la PK se sigue verificando en la carga) y perfila bloque a bloque.
+    #   "INCREMENTAL": true  → solo las filas añadidas desde el último watermark; se puede
+    #     combinar con CHUNK_SIZE para leerlas también por bloques.
+    CHUNK_SIZE  = settings.get("CHUNK_SIZE")   # None → carga completa; int → modo streaming
+    ENGINE      = str(settings.get("ENGINE", "pandas")).lower()   # "pandas" o "duckdb"
+    INCREMENTAL = bool(settings.get("INCREMENTAL", False))   # solo filas añadidas (watermark, motor pandas)
+    WATERMARK_PATH = settings.get("WATERMARK_PATH")
+    KEY_MODE    = settings.get("KEY_MODE", "str")   # "str" ('201501010') o "int" (BIGINT valor × stride + ocurrencia)
+    KEY_STRIDE  = int(settings.get("KEY_STRIDE", 1_000_000))
+    CACHE_DIR   = settings.get("CACHE_DIR")   # caché de extracciones parseadas (None → sin caché)
+    CACHE_MAX_MB = settings.get("CACHE_MAX_MB", 1024)
+    QUALITY_ENGINE = settings.get("QUALITY_ENGINE", "native")   # "native" o "ge" (Great Expectations)
+    SORT_MEMORY_MB = settings.get("SORT_MEMORY_MB")   # None → sort en pandas; MB → claves ordenadas en DuckDB si se supera
+    # LAZY: pasos 1–5 como un plan perezoso en una sola tarea con copy-on-write. El plan de
+    # este flow no tiene rename/select/cast, así que no hay nada que empujar a la extracción:
+    # la ganancia es solo evitar copias intermedias, no leer menos columnas.
+    LAZY        = bool(settings.get("LAZY", False))
 
     # Estado inicial
     task_code, task_msg = 0, ""
     df: pd.DataFrame = pd.DataFrame()
 
     while task_code == 0:
-        # 1) Extract CSV
-        code_01, msg_01, df = extract_csv(str(SOURCE_PATH), ";")
+        if ENGINE == "duckdb":
+            # Modo DuckDB: extracción, índice, fechas, orden, nulos y unicidad se ejecutan como SQL
+            # dentro de la conexión (vectorizado, multihilo y fuera de memoria), sin pandas.
+            # 7) Conectar DuckDB primero: el resto de pasos trabajan sobre ella
+            code_07, msg_07, con = connect_cloud_db()
+            task_code, task_msg = code_07, msg_07
+            logger.info(msg_07)
+            if task_code != 0:
+                break
+
+            # 1) Extract CSV → tabla temporal
+            code_01, msg_01, rel = extract_csv_duckdb(str(SOURCE_PATH), ";", con, f"stg_{TABLE_NAME}")
+            task_code, task_msg = code_01, msg_01
+            logger.info(msg_01)
+            if task_code != 0:
+                break
+
+            # 3) Create new index
+            code_03, msg_03, rel = create_new_index_duckdb(con, rel, "OoS_DAY", TABLE_PK, KEY_MODE, KEY_STRIDE)
+            task_code, task_msg = code_03, msg_03
+            logger.info(msg_03)
+            if task_code != 0:
+                break
+
+            # 4) Transform date
+            code_04, msg_04, rel = transform_date_duckdb(con, rel, "OoS_DAY", "YYYYMMDD")
+            task_code, task_msg = code_04, msg_04
+            logger.info(msg_04)
+            if task_code != 0:
+                break
+
+            # 5) Sort dates ascending
+            code_05, msg_05, rel = sort_dates_duckdb(con, rel, "OoS_DAY", "ASC")
+            task_code, task_msg = code_05, msg_05
+            logger.info(msg_05)
+            if task_code != 0:
+                break
+
+            # 2) Check nulls como agregado SQL sobre la relación preparada
+            code_02, msg_02 = check_nulls(rel, con=con)
+            task_code, task_msg = code_02, msg_02
+            logger.info(msg_02)
+            if task_code != 0:
+                break
+
+            # 6) Check unique on TABLE_PK (GROUP BY en DuckDB)
+            code_06, msg_06 = check_unique(rel, TABLE_PK, con=con)
+            task_code, task_msg = code_06, msg_06
+            logger.info(msg_06)
+            if task_code != 0:
+                break
+
+            # 8) Cargar directamente desde la relación preparada
+            code_08, msg_08, load_report = load_table_to_cloud(rel, TABLE_NAME, con)
+            task_code, task_msg = code_08, msg_08
+            logger.info(msg_08)
+            if task_code != 0:
+                break
+
+            # 9) Update summary
+            code_09, msg_09 = update_cloud_summary(load_report, TABLE_ID, TABLE_NAME, con)
+            task_code, task_msg = code_09, msg_09
+            logger.info(msg_09)
+            break
+
+        if LAZY and not INCREMENTAL and not CHUNK_SIZE:
+            # Modo perezoso: los pasos 1–5 se registran como un plan que se optimiza y se
+            # ejecuta en una sola tarea (mismas tareas y códigos, con copy-on-write).
+            # 1–5) Extract, check nulls, índice, fechas y orden
+            plan = (
+                LazyPipeline(str(SOURCE_PATH), ";", cache_dir=CACHE_DIR, cache_max_mb=CACHE_MAX_MB)
+                .check(check_nulls, QUALITY_ENGINE)
+                .create_new_index("OoS_DAY", TABLE_PK, None, KEY_MODE, KEY_STRIDE)
+                .transform_date("OoS_DAY", "YYYYMMDD")
+                .sort_dates("OoS_DAY", "ASC", SORT_MEMORY_MB)
+            )
+            code_05, msg_05, df = execute_pipeline(plan)
+            task_code, task_msg = code_05, msg_05
+            logger.info(msg_05)
+            if task_code != 0:
+                break
+
+            # 6) Check unique on TABLE_PK
+            code_06, msg_06 = check_unique(df, TABLE_PK, QUALITY_ENGINE)
+            task_code, task_msg = code_06, msg_06
+            logger.info(msg_06)
+            if task_code != 0:
+                break
+
+            # 7) Conectar a DuckDB
+            code_07, msg_07, con = connect_cloud_db()
+            task_code, task_msg = code_07, msg_07
+            logger.info(msg_07)
+            if task_code != 0:
+                break
+
+            # 8) Cargar la tabla
+            code_08, msg_08, load_report = load_table_to_cloud(df, TABLE_NAME, con)
+            task_code, task_msg = code_08, msg_08
+            logger.info(msg_08)
+            if task_code != 0:
+                break
+
+            # 9) Update summary
+            code_09, msg_09 = update_cloud_summary(load_report, TABLE_ID, TABLE_NAME, con)
+            task_code, task_msg = code_09, msg_09
+            logger.info(msg_09)
+            break
+
+        # 1) Extract CSV: incremental (solo filas nuevas) o completo
+        watermark = None
+        if INCREMENTAL:
+            code_01, msg_01, df, watermark = extract_csv_incremental(
+                str(SOURCE_PATH), ";", WATERMARK_PATH, chunksize=CHUNK_SIZE
+            )
+        else:
+            code_01, msg_01, df = extract_csv(
+                str(SOURCE_PATH), ";", CHUNK_SIZE, cache_dir=CACHE_DIR, cache_max_mb=CACHE_MAX_MB
+            )
         task_code, task_msg = code_01, msg_01
         logger.info(msg_01)
         if task_code != 0:
             break
 
-        # 2) Check nulls
-        code_02, msg_02 = check_nulls(df)
-        task_code, task_msg = code_02, msg_02
-        logger.info(msg_02)
-        if task_code != 0:
+        if INCREMENTAL and isinstance(df, pd.DataFrame) and df.empty:
+            # Nada añadido desde la última carga: el watermark no cambia
+            break
+
+        if CHUNK_SIZE:
+            # Modo streaming: los pasos 2, 3, 4, 5b y 8 se aplican bloque a bloque
+            # (stream_fact_table, que combina los perfiles); sort_dates y check_unique se omiten.
+            reader, df = df, pd.DataFrame()
+
+            # 7) Conectar DuckDB antes de recorrer los bloques
+            code_07, msg_07, con = connect_cloud_db()
+            task_code, task_msg = code_07, msg_07
+            logger.info(msg_07)
+            if task_code != 0:
+                break
+
+            # 2–4, 8) Check nulls, índice, fecha y carga bloque a bloque
+            code_08, msg_08, load_report, profile = stream_fact_table(
+                reader, "OoS_DAY", TABLE_PK, TABLE_NAME, con,
+                watermark["counters"] if INCREMENTAL else {}, KEY_MODE, KEY_STRIDE, QUALITY_ENGINE
+            )
+            task_code, task_msg = code_08, msg_08
+            logger.info(msg_08)
+            if task_code != 0:
+                break
+
+            # 9) Update summary con el informe acumulado
+            code_09, msg_09 = update_cloud_summary(load_report, TABLE_ID, TABLE_NAME, con)
+            task_code, task_msg = code_09, msg_09
+            logger.info(msg_09)
+            if task_code != 0:
+                break
+
+            # 9b) Persistir el perfil combinado de los bloques (solo seguimiento: warning si falla)
+            if profile:
+                code_09b, msg_09b = update_quality_profiles(profile, TABLE_ID, TABLE_NAME, con)
+                if code_09b != 0:
+                    logger.warning(msg_09b)
+                else:
+                    logger.info(msg_09b)
+            if not INCREMENTAL:
+                break
+
+            # 10) Guardar el watermark (con los contadores actualizados bloque a bloque)
+            code_10, msg_10 = update_watermark(str(SOURCE_PATH), watermark, WATERMARK_PATH)
+            task_code, task_msg = code_10, msg_10
+            logger.info(msg_10)
             break
 
         # 3) Create new index on "OoS_DAY"
-        code_03, msg_03, df = create_new_index(df, "OoS_DAY", TABLE_PK)
+        code_03, msg_03, df = create_new_index(
+            df, "OoS_DAY", TABLE_PK, watermark["counters"] if INCREMENTAL else None, KEY_MODE, KEY_STRIDE
+        )
         task_code, task_msg = code_03, msg_03
         logger.info(msg_03)
         if task_code != 0:
@@ -66,14 +256,28 @@ def oos_flow(settings: dict) -> Tuple[int, str]:
             break
 
         # 5) Sort dates ascending
-        code_05, msg_05, df = sort_dates(df, "OoS_DAY", "ASC")
+        code_05, msg_05, df = sort_dates(df, "OoS_DAY", "ASC", SORT_MEMORY_MB)
         task_code, task_msg = code_05, msg_05
         logger.info(msg_05)
         if task_code != 0:
             break
 
+        # 5b) Perfil de columnas en una pasada, reutilizado por las comprobaciones y la carga
+        code_05b, msg_05b, profile = profile_columns(df, TABLE_PK)
+        task_code, task_msg = code_05b, msg_05b
+        logger.info(msg_05b)
+        if task_code != 0:
+            break
+
+        # 5c) Check nulls con los nulos del perfil (sin volver a recorrer df)
+        code_05c, msg_05c = check_nulls(df, QUALITY_ENGINE, profile)
+        task_code, task_msg = code_05c, msg_05c
+        logger.info(msg_05c)
+        if task_code != 0:
+            break
+
         # 6) Check unique on TABLE_PK
-        code_06, msg_06 = check_unique(df, TABLE_PK)
+        code_06, msg_06 = check_unique(df, TABLE_PK, QUALITY_ENGINE, profile=profile)
         task_code, task_msg = code_06, msg_06
         logger.info(msg_06)
 
@@ -85,7 +289,7 @@ def oos_flow(settings: dict) -> Tuple[int, str]:
             break
 
         # 8) Crear tabla
-        code_08, msg_08, load_report = load_table_to_cloud(df, TABLE_NAME, con)
+        code_08, msg_08, load_report = load_table_to_cloud(df, TABLE_NAME, con, profile)
         task_code, task_msg = code_08, msg_08
         logger.info(msg_08)
         if task_code != 0:
@@ -95,6 +299,23 @@ def oos_flow(settings: dict) -> Tuple[int, str]:
         code_09, msg_09 = update_cloud_summary(load_report, TABLE_ID, TABLE_NAME, con)
         task_code, task_msg = code_09, msg_09
         logger.info(msg_09)
+        if task_code != 0:
+            break
+
+        # 9b) Persistir el perfil de calidad (seguimiento de deriva)
+        # Solo es seguimiento: si falla se avisa, pero no impide guardar el watermark
+        code_09b, msg_09b = update_quality_profiles(profile, TABLE_ID, TABLE_NAME, con)
+        if code_09b != 0:
+            logger.warning(msg_09b)
+        else:
+            logger.info(msg_09b)
+        if not INCREMENTAL:
+            break
+
+        # 10) Guardar el watermark: la siguiente ejecución leerá a partir de aquí
+        code_10, msg_10 = update_watermark(str(SOURCE_PATH), watermark, WATERMARK_PATH)
+        task_code, task_msg = code_10, msg_10
+        logger.info(msg_10)
         break
 
 
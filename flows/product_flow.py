@@ -8,6 +8,8 @@ from prefect import flow, get_run_logger
 from tasks.Extract.extract_csv import extract_csv
 from tasks.Quality.check_nulls import check_nulls
 from tasks.Quality.check_unique import check_unique
+from tasks.Quality.profile_columns import profile_columns
+from tasks.Load.update_quality_profiles import update_quality_profiles
 from tasks.Transform.transform_col_unique import transform_col_unique
 from tasks.Quality.check_datatypes import check_datatypes
 from tasks.Load.connect_local_duckdb import connect_local_duckdb
@@ -36,6 +38,9 @@ def product_flow(settings: dict) -> pd.DataFrame:
     TABLE_ID    = settings["TABLE_ID"]
     TABLE_PK    = settings["TABLE_PK"]
     QUALITY     = settings.get("Quality", {})
+    CACHE_DIR   = settings.get("CACHE_DIR")   # caché de extracciones parseadas (None → sin caché)
+    CACHE_MAX_MB = settings.get("CACHE_MAX_MB", 1024)
+    QUALITY_ENGINE = settings.get("QUALITY_ENGINE", "native")   # "native" o "ge" (Great Expectations)
 
     # Control
     task_code, task_msg = 0, ""
@@ -44,22 +49,31 @@ def product_flow(settings: dict) -> pd.DataFrame:
 
     # Secuencia de pasos
     while task_code == 0:
-        # 1) Extract CSV
-        code_01, msg_01, df = extract_csv(str(SOURCE_PATH), ";")
+        # 1) Extract CSV (con QUALITY: solo sus columnas, ya tipadas, parser pyarrow)
+        code_01, msg_01, df = extract_csv(
+            str(SOURCE_PATH), ";", schema=QUALITY or None, cache_dir=CACHE_DIR, cache_max_mb=CACHE_MAX_MB
+        )
         task_code, task_msg = code_01, msg_01
         logger.info(msg_01)
         if task_code != 0:
             break
 
+        # 1b) Perfil de columnas en una pasada, reutilizado por las comprobaciones y la carga
+        code_01b, msg_01b, profile = profile_columns(df, TABLE_PK)
+        task_code, task_msg = code_01b, msg_01b
+        logger.info(msg_01b)
+        if task_code != 0:
+            break
+
         # 2) Check nulls
-        code_02, msg_02 = check_nulls(df)
+        code_02, msg_02 = check_nulls(df, QUALITY_ENGINE, profile)
         task_code, task_msg = code_02, msg_02
         logger.info(msg_02)
         if task_code != 0:
             break
 
         # 3) Check unique + transform if dup
-        code_03, msg_03 = check_unique(df, TABLE_PK)
+        code_03, msg_03 = check_unique(df, TABLE_PK, QUALITY_ENGINE, profile=profile)
         task_code, task_msg = code_03, msg_03
         logger.info(msg_03)
         if task_code != 0:
@@ -73,9 +87,16 @@ def product_flow(settings: dict) -> pd.DataFrame:
             if task_code != 0:
                 break
 
+            # La PK ha cambiado: el perfil se vuelve a calcular
+            code_04b, msg_04b, profile = profile_columns(df, TABLE_PK)
+            task_code, task_msg = code_04b, msg_04b
+            logger.info(msg_04b)
+            if task_code != 0:
+                break
+
         # 4) Check datatypes si corresponde
         if QUALITY:
-            code_05, msg_05, df = check_datatypes(df, QUALITY)
+            code_05, msg_05, df = check_datatypes(df, QUALITY, profile)
             task_code, task_msg = code_05, msg_05
             logger.info(msg_05)
             if task_code != 0:
@@ -91,7 +112,7 @@ def product_flow(settings: dict) -> pd.DataFrame:
             break
 
         # 6) Crear o actualizar tabla
-        code_07, msg_07, load_report = load_table_to_cloud(df, TABLE_NAME, con)
+        code_07, msg_07, load_report = load_table_to_cloud(df, TABLE_NAME, con, profile)
         task_code, task_msg = code_07, msg_07
         if task_code != 0:
             break
@@ -103,6 +124,14 @@ def product_flow(settings: dict) -> pd.DataFrame:
         if task_code != 0:
             break
 
+        # 10) Persistir el perfil de calidad (seguimiento de deriva)
+        # Solo es seguimiento: si falla se avisa, pero la carga ya está hecha y el flow sigue
+        code_10, msg_10 = update_quality_profiles(profile, TABLE_ID, TABLE_NAME, con)
+        if code_10 != 0:
+            logger.warning(msg_10)
+        else:
+            logger.info(msg_10)
+
         # todo OK: salir del bucle
         break
 
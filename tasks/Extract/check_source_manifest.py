@@ -0,0 +1,87 @@
+# tasks/Extract/check_source_manifest.py
+
+import json
+import hashlib
+from typing import Tuple, Dict, Any
+from prefect import task
+
+from tasks.Extract.extract_csv import resolve_source_files
+from tasks.Extract.extract_cache import fingerprint_file
+
+# Claves de settings que apuntan a archivos de entrada de un flow
+SOURCE_KEYS = ("SOURCE_PATH", "PC_PATH")
+
+
+def load_manifest(manifest_path: str) -> Dict[str, Any]:
+    """Lee el manifiesto JSON; si no existe o está dañado devuelve un dict vacío."""
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+@task
+def check_source_manifest(
+    alias: str,
+    settings: Dict[str, Any],
+    manifest_path: str
+) -> Tuple[int, str, Dict[str, Any]]:
+    """
+    Calcula la huella de las entradas del flow `alias` (SOURCE_PATH y PC_PATH: tamaño,
+    mtime y hash de contenido, más un hash de su sección de settings) y la compara con la
+    guardada en el manifiesto tras su última carga correcta. Los directorios y patrones glob
+    se expanden a los archivos que contienen, así que añadir o quitar un archivo cuenta
+    como cambio.
+
+    Devuelve (code, message, result) con result = {"unchanged": bool, "fingerprint": dict}.
+    "unchanged" es True solo si existe una carga correcta previa con la misma huella.
+
+    Códigos de retorno:
+      - 1 → Alguna ruta de entrada no existe (el flow se ejecuta y reportará el error).
+      - 9 → Error inesperado calculando la huella.
+      - 0 → Éxito.
+    """
+    result = {"unchanged": False, "fingerprint": {}}
+    try:
+        manifest = load_manifest(manifest_path)
+        previous = manifest.get(alias, {}).get("fingerprint", {})
+
+        settings_hash = hashlib.sha256(
+            json.dumps(settings, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+        files = {}
+        for key in SOURCE_KEYS:
+            ruta = settings.get(key)
+            if not ruta:
+                continue
+            # Directorios y patrones glob se expanden: cuenta cada archivo que coincide
+            matches = resolve_source_files(ruta)
+            if not matches:
+                return 1, f"⚠️ {alias}: {key} no existe ({ruta}); no se puede comparar con el manifiesto.", result
+            for match in map(str, matches):
+                files[match] = fingerprint_file(match, previous.get("files", {}).get(match))
+
+        fingerprint = {"settings_sha256": settings_hash, "files": files}
+        result["fingerprint"] = fingerprint
+        if not files:
+            return 0, f"ℹ️ {alias}: sin archivos de entrada en settings; se ejecuta siempre.", result
+
+        # Se compara el contenido (hash), no el mtime: un archivo tocado pero idéntico no recarga
+        prev_hashes = {r: fp.get("sha256") for r, fp in previous.get("files", {}).items()}
+        curr_hashes = {r: fp["sha256"] for r, fp in files.items()}
+        unchanged = (
+            bool(manifest.get(alias, {}).get("last_success"))
+            and previous.get("settings_sha256") == settings_hash
+            and prev_hashes == curr_hashes
+        )
+        result["unchanged"] = unchanged
+        if unchanged:
+            msg = (f"⏭️ {alias}: entradas sin cambios desde la última carga correcta "
+                   f"({manifest[alias]['last_success']}).")
+        else:
+            msg = f"🔄 {alias}: entradas nuevas o modificadas; se ejecuta el flow."
+        return 0, msg, result
+
+    except Exception as e:
+        return 9, f"❌ Error inesperado en check_source_manifest para '{alias}': {e}", result
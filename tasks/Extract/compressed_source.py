@@ -0,0 +1,80 @@
+# tasks/Extract/compressed_source.py
+
+import io
+import bz2
+import gzip
+import lzma
+import pyarrow as pa
+from pathlib import Path
+from typing import Optional, Union
+
+# Extensión → compresión soportada (se descomprime en streaming al leer)
+COMPRESSIONS = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz", ".zst": "zstd"}
+
+
+def compression_of(ruta: Union[str, Path]) -> Optional[str]:
+    """Compresión del archivo según su extensión ('gzip', 'bz2', 'xz', 'zstd') o None."""
+    return COMPRESSIONS.get(Path(ruta).suffix.lower())
+
+
+def base_suffix(ruta: Union[str, Path]) -> str:
+    """Extensión del contenido sin la de compresión: 'SalesDay.csv.gz' → '.csv'."""
+    path = Path(ruta)
+    if compression_of(path):
+        path = path.with_suffix("")
+    return path.suffix.lower()
+
+
+class CountingReader(io.RawIOBase):
+    """
+    Envoltorio de solo lectura que cuenta los bytes (ya descomprimidos) entregados,
+    para poder informar del ratio de compresión sin inflar el archivo a disco.
+    """
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        data = self.raw.read(len(b))
+        n = len(data)
+        b[:n] = data
+        self.bytes_read += n
+        return n
+
+    def close(self) -> None:
+        if not self.closed:
+            self.raw.close()
+        super().close()
+
+
+def open_source(ruta: Union[str, Path]) -> io.BufferedReader:
+    """
+    Abre `ruta` en binario descomprimiendo en streaming según su extensión (gzip, bz2 y xz
+    con la librería estándar; zstd con pyarrow). El objeto devuelto es un lector con buffer
+    cuyo `.raw.bytes_read` indica los bytes descomprimidos leídos hasta el momento.
+    """
+    path = Path(ruta)
+    compression = compression_of(path)
+    if compression == "gzip":
+        raw = gzip.open(path, "rb")
+    elif compression == "bz2":
+        raw = bz2.open(path, "rb")
+    elif compression == "xz":
+        raw = lzma.open(path, "rb")
+    elif compression == "zstd":
+        raw = pa.input_stream(str(path), compression="zstd")
+    else:
+        raw = open(path, "rb")
+    return io.BufferedReader(CountingReader(raw), buffer_size=1 << 20)
+
+
+def compression_ratio(ruta: Union[str, Path], bytes_read: int) -> Optional[float]:
+    """Bytes descomprimidos / bytes en disco, o None si el archivo no está comprimido."""
+    if not compression_of(ruta):
+        return None
+    size = Path(ruta).stat().st_size
+    return bytes_read / size if size else None
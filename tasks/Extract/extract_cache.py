@@ -0,0 +1,131 @@
+# tasks/Extract/extract_cache.py
+
+import os
+import json
+import hashlib
+import pandas as pd
+import pyarrow as pa
+from pathlib import Path
+from typing import Optional, Dict, List, Any
+
+# Cambiar si cambia el formato o el parseo: invalida todas las entradas anteriores
+CACHE_VERSION = 1
+_INDEX_FILE = "index.json"
+
+
+def fingerprint_file(ruta: str, previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Huella de un archivo: tamaño, mtime y hash SHA-256 del contenido.
+    Si `previous` (huella anterior) tiene el mismo tamaño y mtime, se reutiliza su hash
+    sin volver a leer el archivo; solo se hashea cuando algo ha cambiado.
+    """
+    stat = Path(ruta).stat()
+    fp = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if previous and previous.get("size") == fp["size"] and previous.get("mtime_ns") == fp["mtime_ns"]:
+        fp["sha256"] = previous.get("sha256")
+        return fp
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    fp["sha256"] = h.hexdigest()
+    return fp
+
+
+def _load_index(cache_dir: Path) -> Dict[str, Any]:
+    try:
+        with open(cache_dir / _INDEX_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def cache_key(cache_dir: str, files: List[Path], options: Dict[str, Any]) -> str:
+    """
+    Clave de caché: hash del contenido de cada archivo más las opciones de parseo
+    (delimitador, schema...). Las huellas se guardan en un índice del directorio de caché,
+    así que un archivo con el mismo tamaño y mtime no se vuelve a hashear.
+    """
+    cache_path = Path(cache_dir)
+    cache_path.mkdir(parents=True, exist_ok=True)
+    index = _load_index(cache_path)
+    hashes = []
+    for path in files:
+        fp = fingerprint_file(str(path), index.get(str(path)))
+        index[str(path)] = fp
+        hashes.append(fp["sha256"])
+    tmp = cache_path / (_INDEX_FILE + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    os.replace(tmp, cache_path / _INDEX_FILE)
+
+    payload = json.dumps(
+        {"version": CACHE_VERSION, "files": hashes, "options": options},
+        sort_keys=True, default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def load_cached(cache_dir: str, key: str) -> Optional[pd.DataFrame]:
+    """
+    Devuelve el DataFrame guardado con `key` (archivo Arrow IPC mapeado en memoria, sin
+    parseo de texto) o None si no está en caché. Los dtypes de pandas (Int64, boolean...) se
+    restauran desde los metadatos guardados. Un acierto actualiza el mtime del archivo, que
+    es lo que usa la política de expulsión LRU.
+    """
+    path = Path(cache_dir) / f"{key}.arrow"
+    if not path.exists():
+        return None
+    try:
+        with pa.memory_map(str(path), "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+        os.utime(path)
+        return table.to_pandas()
+    except (OSError, pa.ArrowInvalid):
+        # Entrada dañada o a medio escribir: se descarta y se vuelve a parsear
+        path.unlink(missing_ok=True)
+        return None
+
+
+def store_cached(cache_dir: str, key: str, df: pd.DataFrame, max_mb: float) -> int:
+    """
+    Guarda `df` como Arrow IPC con `key` (escritura atómica) y expulsa las entradas usadas
+    hace más tiempo hasta que el directorio ocupe como máximo `max_mb` MB.
+    Devuelve el número de entradas expulsadas. La caché es best-effort: si `df` no se puede
+    convertir a Arrow (columnas object con tipos mezclados) o falla la escritura, no se
+    guarda y la extracción sigue siendo válida.
+    """
+    cache_path = Path(cache_dir)
+    cache_path.mkdir(parents=True, exist_ok=True)
+    path = cache_path / f"{key}.arrow"
+    tmp = cache_path / f"{key}.arrow.tmp"
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        with pa.OSFile(str(tmp), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp, path)
+    except (pa.ArrowException, OSError):
+        tmp.unlink(missing_ok=True)
+        return 0
+    return evict(cache_dir, max_mb)
+
+
+def evict(cache_dir: str, max_mb: float) -> int:
+    """Borra las entradas menos recientemente usadas (por mtime) hasta quedar en `max_mb` MB."""
+    entries = sorted(Path(cache_dir).glob("*.arrow"), key=lambda p: p.stat().st_mtime)
+    total = sum(p.stat().st_size for p in entries)
+    limit = max_mb * 1024 * 1024
+    removed = 0
+    for p in entries:
+        if total <= limit:
+            break
+        size = p.stat().st_size
+        try:
+            p.unlink(missing_ok=True)
+        except OSError:
+            # En uso (mapeado por otro proceso): se intentará en la siguiente expulsión
+            continue
+        total -= size
+        removed += 1
+    return removed
@@ -1,36 +1,279 @@
 # tasks/Extract/extract_csv.py
 
+import os
+import glob
 import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pa_csv
 from pathlib import Path
-from typing import Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Tuple, Optional, Union, Iterator, Dict, List
 from prefect import task
 
+from tasks.Extract.extract_cache import cache_key, load_cached, store_cached
+from tasks.Extract.compressed_source import COMPRESSIONS, compression_of, open_source
+
+# Tipos del mapa QUALITY → tipos Arrow (parser multihilo) y dtypes pandas (parser por bloques).
+# "datetime" no se fuerza: se deja a la inferencia y check_datatypes lo convierte después.
+_ARROW_TYPES = {
+    "str": pa.string(), "string": pa.string(),
+    "int": pa.int64(), "integer": pa.int64(),
+    "float": pa.float64(), "number": pa.float64(),
+    "bool": pa.bool_(), "boolean": pa.bool_(),
+}
+_PANDAS_DTYPES = {
+    "str": str, "string": str,
+    "int": "Int64", "integer": "Int64",
+    "float": "float64", "number": "float64",
+    "bool": "boolean", "boolean": "boolean",
+}
+# Enteros y booleanos como dtypes nullable, igual que los deja check_datatypes
+_ARROW_TO_PANDAS = {
+    pa.int64(): pd.Int64Dtype(),
+    pa.bool_(): pd.BooleanDtype(),
+}
+
+
+def _read_csv_arrow(path, delimitador: str, schema: Dict[str, str], columns: list) -> pd.DataFrame:
+    """
+    Parsea el CSV con el lector multihilo de pyarrow, leyendo solo `columns` y con
+    los tipos de `schema` ya aplicados (sin inferencia ni reconversión posterior).
+    """
+    column_types = {
+        col: _ARROW_TYPES[schema[col].lower()]
+        for col in columns if schema[col].lower() in _ARROW_TYPES
+    }
+    table = pa_csv.read_csv(
+        path,
+        read_options=pa_csv.ReadOptions(use_threads=True),
+        parse_options=pa_csv.ParseOptions(delimiter=delimitador),
+        convert_options=pa_csv.ConvertOptions(
+            column_types=column_types,
+            include_columns=columns,
+            strings_can_be_null=True,
+        ),
+    )
+    return table.to_pandas(types_mapper=_ARROW_TO_PANDAS.get)
+
+
+class SchemaMismatchError(ValueError):
+    """Ninguna columna del schema aparece en la cabecera del archivo."""
+
+
+def resolve_source_files(ruta: str) -> List[Path]:
+    """
+    Archivos a los que apunta `ruta`: el propio archivo, todos los *.csv (también comprimidos:
+    *.csv.gz, *.csv.zst...) de un directorio o las coincidencias de un patrón glob
+    (p. ej. 'SalesDay_*.csv'), en orden alfabético.
+    """
+    path = Path(ruta)
+    if path.is_dir():
+        patterns = ["*.csv"] + [f"*.csv{ext}" for ext in COMPRESSIONS]
+        return sorted(p for pattern in patterns for p in path.glob(pattern) if p.is_file())
+    if glob.has_magic(str(ruta)):
+        return sorted(Path(p) for p in glob.glob(str(ruta), recursive=True) if Path(p).is_file())
+    return [path] if path.exists() else []
+
+
+def _select_columns(path: Path, delimitador: str, schema: Optional[Dict[str, str]]) -> Optional[list]:
+    """Columnas del schema presentes en el archivo, en orden de archivo (None si no hay schema)."""
+    if not schema:
+        return None
+    # Solo la cabecera (en comprimidos solo se descomprime el principio)
+    if compression_of(path):
+        with open_source(path) as f:
+            header = pd.read_csv(f, sep=delimitador, nrows=0).columns
+    else:
+        header = pd.read_csv(path, sep=delimitador, nrows=0).columns
+    columns = [c for c in header if c in schema]
+    if not columns:
+        raise SchemaMismatchError(f"Ninguna columna del schema está en '{path.name}'. Cabecera: {list(header)}")
+    return columns
+
+
+def _read_csv_file(path: Path, delimitador: str, schema: Optional[Dict[str, str]]) -> Tuple[pd.DataFrame, int]:
+    """
+    Lee un archivo completo y devuelve (df, bytes de CSV leídos). Los comprimidos se
+    descomprimen en streaming mientras se parsean. Función de módulo para poder ejecutarse
+    en un proceso aparte.
+    """
+    columns = _select_columns(path, delimitador, schema)
+    if not compression_of(path):
+        if schema:
+            return _read_csv_arrow(path, delimitador, schema, columns), path.stat().st_size
+        return pd.read_csv(path, sep=delimitador), path.stat().st_size
+    with open_source(path) as f:
+        if schema:
+            df = _read_csv_arrow(f, delimitador, schema, columns)
+        else:
+            df = pd.read_csv(f, sep=delimitador)
+        return df, f.raw.bytes_read
+
+
+def _ratio_msg(files: List[Path], csv_bytes: int) -> str:
+    """Texto con el ratio de compresión (CSV descomprimido / tamaño en disco) o ''."""
+    compressed = [p for p in files if compression_of(p)]
+    if not compressed:
+        return ""
+    disk = sum(p.stat().st_size for p in files)
+    tipos = sorted({compression_of(p) for p in compressed})
+    return f" Comprimido ({', '.join(tipos)}): ratio {csv_bytes / disk:.1f}x." if disk else ""
+
+
+class _MultiFileReader:
+    """
+    Lector por bloques sobre uno o varios archivos: recorre los archivos en orden y entrega
+    los bloques de cada uno (descomprimiendo en streaming si hace falta). Expone close()
+    como el TextFileReader de pandas, cerrando también el flujo descomprimido.
+    """
+
+    def __init__(self, files: List[Path], delimitador: str, chunksize: int, schema: Optional[Dict[str, str]]):
+        self.files = files
+        self.delimitador = delimitador
+        self.chunksize = chunksize
+        self.schema = schema
+        self._reader = None
+        self._stream = None
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        for path in self.files:
+            self._reader, self._stream = _open_chunk_reader(path, self.delimitador, self.chunksize, self.schema)
+            try:
+                yield from self._reader
+            finally:
+                self.close()
+
+    def close(self) -> None:
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+
+def _open_chunk_reader(path: Path, delimitador: str, chunksize: int, schema: Optional[Dict[str, str]]):
+    """(TextFileReader, flujo descomprimido o None) para leer `path` por bloques."""
+    columns = _select_columns(path, delimitador, schema)
+    dtypes = None
+    if schema:
+        dtypes = {
+            col: _PANDAS_DTYPES[schema[col].lower()]
+            for col in columns if schema[col].lower() in _PANDAS_DTYPES
+        }
+    stream = open_source(path) if compression_of(path) else None
+    reader = pd.read_csv(
+        stream if stream is not None else path,
+        sep=delimitador, chunksize=chunksize, usecols=columns, dtype=dtypes
+    )
+    return reader, stream
+
+
 @task
-def extract_csv(ruta: str, delimitador: str = ";") -> Tuple[int, str, pd.DataFrame]:
+def extract_csv(
+    ruta: str,
+    delimitador: str = ";",
+    chunksize: Optional[int] = None,
+    schema: Optional[Dict[str, str]] = None,
+    max_workers: Optional[int] = None,
+    cache_dir: Optional[str] = None,
+    cache_max_mb: float = 1024
+) -> Tuple[int, str, Union[pd.DataFrame, Iterator[pd.DataFrame]]]:
     """
     Lee un CSV desde 'ruta' usando el delimitador dado y devuelve (code, message, df).
-    
+
+    Si se indica `chunksize` (> 0), no se carga el archivo completo: se devuelve un
+    lector que va entregando DataFrames de como máximo `chunksize` filas (modo streaming).
+    Así la memoria máxima depende del tamaño de bloque y no del tamaño del archivo.
+
+    Si se indica `schema` (el mapa QUALITY/Quality del flow, {columna: tipo}), solo se leen
+    las columnas del archivo que aparecen en él y se parsean directamente con su tipo,
+    usando el parser multihilo de pyarrow. En modo streaming se aplican los mismos dtypes
+    y columnas con el parser de pandas (pyarrow no lee por bloques).
+
+    `ruta` puede ser también un directorio (se leen todos sus *.csv) o un patrón glob
+    (p. ej. 'DATA/SalesDay_*.csv') para fuentes particionadas. Con varios archivos, cada uno
+    se parsea en un proceso distinto (hasta `max_workers`, por defecto un proceso por núcleo)
+    y se concatenan en orden alfabético de archivo; en modo streaming se encadenan sus
+    bloques. El mensaje incluye las filas leídas de cada archivo.
+
+    Si se indica `cache_dir`, el resultado ya parseado se guarda allí como Arrow IPC, con
+    clave = hash del contenido de los archivos + opciones de parseo. Una extracción repetida
+    del mismo contenido (p. ej. un reintento del orquestador) lo recupera mapeado en memoria,
+    sin parsear texto. La caché se limita a `cache_max_mb` MB expulsando las entradas usadas
+    hace más tiempo. En modo streaming no se usa la caché.
+
+    Los archivos comprimidos (.gz, .bz2, .xz, .zst) se descomprimen en streaming mientras se
+    parsean, también por bloques, sin escribir el CSV inflado a disco. En carga completa el
+    mensaje incluye el ratio de compresión.
+
     Códigos de retorno:
-      - 1 → Ruta o archivo no existe.
+      - 1 → Ruta o archivo no existe (o el directorio/patrón no contiene archivos).
       - 2 → El archivo no es un CSV válido o no se pudo abrir.
+      - 3 → `chunksize` o `schema` inválidos.
       - 9 → Cualquier otro error inesperado.
       - 0 → Éxito.
     """
-    path = Path(ruta)
-    if not path.exists():
+    files = resolve_source_files(ruta)
+    if not files:
         msg = f"❌ Ruta o archivo no existe: {ruta}"
         return 1, msg, pd.DataFrame()
+    if chunksize is not None and (not isinstance(chunksize, int) or chunksize <= 0):
+        msg = f"❌ chunksize inválido: {chunksize!r}. Debe ser un entero mayor que 0."
+        return 3, msg, pd.DataFrame()
+    if schema is not None and (not isinstance(schema, dict) or not schema):
+        msg = f"❌ schema inválido: debe ser un dict no vacío {{columna: tipo}}."
+        return 3, msg, pd.DataFrame()
     try:
-        df = pd.read_csv(path, sep=delimitador)
+        if chunksize:
+            # Modo streaming: cada lector parsea su cabecera al abrirse y el resto bajo demanda.
+            # Se valida la cabecera del primero ahora; los demás al llegar su turno
+            _select_columns(files[0], delimitador, schema)
+            reader = _MultiFileReader(files, delimitador, chunksize, schema)
+            tipos = sorted({compression_of(p) for p in files if compression_of(p)})
+            comp = f" Comprimido ({', '.join(tipos)}), descompresión en streaming." if tipos else ""
+            msg = f"✅ CSV abierto en modo streaming: {len(files)} archivo(s), bloques de {chunksize} filas.{comp}"
+            return 0, msg, reader
+
+        key = None
+        if cache_dir:
+            key = cache_key(cache_dir, files, {"delimitador": delimitador, "schema": schema})
+            df = load_cached(cache_dir, key)
+            if df is not None:
+                filas, cols = df.shape
+                msg = f"✅ CSV recuperado de la caché ({key[:12]}): {filas} filas, {cols} columnas."
+                return 0, msg, df
+
+        if len(files) == 1:
+            df, csv_bytes = _read_csv_file(files[0], delimitador, schema)
+            filas, cols = df.shape
+            msg = f"✅ CSV extraído con éxito: {filas} filas, {cols} columnas.{_ratio_msg(files, csv_bytes)}"
+            if key:
+                store_cached(cache_dir, key, df, cache_max_mb)
+            return 0, msg, df
+
+        # Varios archivos: el parseo (CPU) se reparte en procesos, uno por archivo
+        workers = min(len(files), max_workers or os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_read_csv_file, files, [delimitador] * len(files), [schema] * len(files)))
+        parts = [part for part, _ in results]
+        df = pd.concat(parts, ignore_index=True)
+        detalle = ", ".join(f"{p.name}: {len(part)}" for p, part in zip(files, parts))
         filas, cols = df.shape
-        msg = f"✅ CSV extraído con éxito: {filas} filas, {cols} columnas."
+        msg = (f"✅ CSV extraído con éxito: {filas} filas, {cols} columnas de {len(files)} archivos "
+               f"({workers} procesos) → {detalle}.{_ratio_msg(files, sum(n for _, n in results))}")
+        if key:
+            store_cached(cache_dir, key, df, cache_max_mb)
         return 0, msg, df
     except pd.errors.EmptyDataError as e:
         msg = f"❌ El archivo parece estar vacío o no es un CSV válido: {e}"
         return 2, msg, pd.DataFrame()
-    except pd.errors.ParserError as e:
+    except (pd.errors.ParserError, pa.ArrowInvalid) as e:
         msg = f"❌ El archivo no es un CSV válido o está dañado: {e}"
         return 2, msg, pd.DataFrame()
+    except SchemaMismatchError as e:
+        msg = f"❌ {e}"
+        return 3, msg, pd.DataFrame()
     except Exception as e:
         msg = f"❌ Error inesperado en extract_csv: {e}"
         return 9, msg, pd.DataFrame()
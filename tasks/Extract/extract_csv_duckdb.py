@@ -0,0 +1,45 @@
+# tasks/Extract/extract_csv_duckdb.py
+
+import duckdb
+from pathlib import Path
+from typing import Tuple
+from prefect import task
+
+@task(cache_key_fn=lambda *args, **kwargs: None)
+def extract_csv_duckdb(
+    ruta: str,
+    delimitador: str,
+    con,
+    rel_name: str
+) -> Tuple[int, str, str]:
+    """
+    Equivalente de extract_csv para el modo de ejecución DuckDB: lee el CSV con
+    read_csv dentro de la conexión `con` y lo deja en la tabla temporal `rel_name`,
+    sin pasar por pandas. DuckDB paraleliza la lectura y puede volcar a disco.
+
+    Devuelve (code, message, rel_name).
+
+    Códigos de retorno:
+      - 1 → Ruta o archivo no existe.
+      - 2 → El archivo no es un CSV válido o no se pudo abrir.
+      - 9 → Cualquier otro error inesperado.
+      - 0 → Éxito.
+    """
+    path = Path(ruta)
+    if not path.exists():
+        return 1, f"❌ Ruta o archivo no existe: {ruta}", rel_name
+    try:
+        ruta_sql = str(path).replace("'", "''")
+        delim_sql = delimitador.replace("'", "''")
+        con.execute(f"""
+            CREATE OR REPLACE TEMP TABLE {rel_name} AS
+            SELECT * FROM read_csv('{ruta_sql}', delim = '{delim_sql}', header = true)
+        """)
+        filas = con.execute(f"SELECT COUNT(*) FROM {rel_name}").fetchone()[0]
+        cols = len(con.execute(f"DESCRIBE {rel_name}").fetchall())
+        msg = f"✅ CSV extraído con éxito en DuckDB ('{rel_name}'): {filas} filas, {cols} columnas."
+        return 0, msg, rel_name
+    except (duckdb.InvalidInputException, duckdb.ConversionException) as e:
+        return 2, f"❌ El archivo no es un CSV válido o está dañado: {e}", rel_name
+    except Exception as e:
+        return 9, f"❌ Error inesperado en extract_csv_duckdb: {e}", rel_name
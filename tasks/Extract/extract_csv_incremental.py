@@ -0,0 +1,233 @@
+# tasks/Extract/extract_csv_incremental.py
+
+import io
+import json
+import hashlib
+import pandas as pd
+import pyarrow as pa
+from pathlib import Path
+from typing import Tuple, Optional, Dict, Any, Iterator, Union
+from prefect import task
+
+from tasks.Extract.extract_csv import _read_csv_arrow, _PANDAS_DTYPES, resolve_source_files
+from tasks.Extract.compressed_source import compression_of
+
+# Bytes anteriores al offset cuyo hash se guarda para detectar reescrituras del archivo
+TAIL_BYTES = 4096
+BLOCK_BYTES = 1 << 20
+
+
+def load_watermarks(watermark_path: str) -> Dict[str, Any]:
+    """Lee el archivo de watermarks JSON; si no existe o está dañado devuelve un dict vacío."""
+    try:
+        with open(watermark_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _sha256_range(f, start: int, end: int) -> str:
+    f.seek(start)
+    return hashlib.sha256(f.read(end - start)).hexdigest()
+
+
+def _last_newline(f, start: int, end: int) -> int:
+    """Offset justo después del último salto de línea en [start, end), o `start` si no hay."""
+    pos = end
+    while pos > start:
+        block_start = max(start, pos - BLOCK_BYTES)
+        f.seek(block_start)
+        idx = f.read(pos - block_start).rfind(b"\n")
+        if idx >= 0:
+            return block_start + idx + 1
+        pos = block_start
+    return start
+
+
+def _count_newlines(f, start: int, end: int) -> int:
+    f.seek(start)
+    total, remaining = 0, end - start
+    while remaining > 0:
+        block = f.read(min(BLOCK_BYTES, remaining))
+        if not block:
+            break
+        total += block.count(b"\n")
+        remaining -= len(block)
+    return total
+
+
+class _RangeStream(io.RawIOBase):
+    """
+    Flujo de solo lectura con la cabecera seguida de los bytes [start, end) del archivo,
+    leídos bajo demanda: el rango nuevo no se copia entero en memoria.
+    """
+
+    def __init__(self, path: Path, header_line: bytes, start: int, end: int):
+        self._f = open(path, "rb")
+        self._f.seek(start)
+        self._head = header_line
+        self._remaining = end - start
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        if self._head:
+            n = min(len(b), len(self._head))
+            b[:n] = self._head[:n]
+            self._head = self._head[n:]
+            return n
+        n = self._f.readinto(memoryview(b)[:min(len(b), self._remaining)]) if self._remaining > 0 else 0
+        self._remaining -= n
+        return n
+
+    def close(self) -> None:
+        self._f.close()
+        super().close()
+
+
+class _RangeChunkReader:
+    """Lector por bloques del rango nuevo; close() cierra también el archivo (como extract_csv)."""
+
+    def __init__(self, stream: io.BufferedReader, delimitador: str, chunksize: int, columns: Optional[list],
+                 schema: Optional[Dict[str, str]]):
+        dtypes = None
+        if schema:
+            dtypes = {
+                col: _PANDAS_DTYPES[schema[col].lower()]
+                for col in columns if schema[col].lower() in _PANDAS_DTYPES
+            }
+        self._stream = stream
+        self._reader = pd.read_csv(stream, sep=delimitador, chunksize=chunksize, usecols=columns, dtype=dtypes)
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        try:
+            yield from self._reader
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        self._reader.close()
+        self._stream.close()
+
+
+@task
+def extract_csv_incremental(
+    ruta: str,
+    delimitador: str = ";",
+    watermark_path: Optional[str] = None,
+    schema: Optional[Dict[str, str]] = None,
+    chunksize: Optional[int] = None
+) -> Tuple[int, str, Union[pd.DataFrame, _RangeChunkReader], Dict[str, Any]]:
+    """
+    Extracción incremental de un CSV que solo crece por el final (los CSV diarios de hechos).
+    Devuelve (code, message, df, watermark): df contiene únicamente las filas añadidas desde
+    la última carga correcta y watermark es el estado a guardar con update_watermark tras
+    cargar esas filas.
+
+    El watermark de cada archivo guarda el offset en bytes leído hasta ahora (siempre al final
+    de una línea completa), el número de filas, el hash de la cabecera, el hash de los
+    TAIL_BYTES anteriores al offset y los contadores de create_new_index ("counters"), para
+    que los índices de las filas nuevas continúen la numeración de las ya cargadas.
+
+    Se vuelve a leer el archivo completo (y se reinician los contadores) si no hay watermark,
+    si el archivo es más pequeño que el offset guardado (truncado) o si la cabecera o los
+    bytes anteriores al offset han cambiado (reescrito). Una última línea sin salto de línea
+    final se considera incompleta y se deja para la siguiente ejecución.
+
+    El rango nuevo se lee en streaming desde el archivo (sin copiarlo entero en memoria). Con
+    `chunksize` (> 0), en lugar de un DataFrame se devuelve un lector por bloques de como
+    máximo `chunksize` filas, como extract_csv (si no hay filas nuevas, un DataFrame vacío).
+
+    Códigos de retorno:
+      - 1 → Ruta o archivo no existe.
+      - 2 → El archivo no es un CSV válido o no se pudo abrir.
+      - 3 → `schema` o `chunksize` inválidos, o `ruta` es un directorio/patrón o un archivo comprimido.
+      - 9 → Cualquier otro error inesperado.
+      - 0 → Éxito (df puede estar vacío si no hay filas nuevas).
+    """
+    path = Path(ruta)
+    files = resolve_source_files(ruta)
+    if not files:
+        return 1, f"❌ Ruta o archivo no existe: {ruta}", pd.DataFrame(), {}
+    if len(files) > 1 or files[0] != path:
+        return 3, f"❌ El modo incremental requiere un único archivo, no un directorio o patrón: {ruta}", pd.DataFrame(), {}
+    if compression_of(path):
+        return 3, f"❌ El modo incremental necesita offsets de bytes y no admite archivos comprimidos: {ruta}", pd.DataFrame(), {}
+    if schema is not None and (not isinstance(schema, dict) or not schema):
+        return 3, f"❌ schema inválido: debe ser un dict no vacío {{columna: tipo}}.", pd.DataFrame(), {}
+    if chunksize is not None and (not isinstance(chunksize, int) or chunksize <= 0):
+        return 3, f"❌ chunksize inválido: {chunksize!r}. Debe ser un entero mayor que 0.", pd.DataFrame(), {}
+    try:
+        previous = load_watermarks(watermark_path).get(str(path), {}) if watermark_path else {}
+
+        with open(path, "rb") as f:
+            # Tamaño fijado al inicio: lo que se añada durante la lectura queda para la siguiente
+            size = path.stat().st_size
+            header_line = f.readline()
+            header_end = len(header_line)
+            if not header_line.strip():
+                return 2, f"❌ El archivo parece estar vacío o no tiene cabecera: {ruta}", pd.DataFrame(), {}
+            header_sha = hashlib.sha256(header_line).hexdigest()
+
+            old_offset = int(previous.get("offset", 0))
+            reason = None
+            if not previous:
+                reason = "sin watermark previo"
+            elif size < old_offset:
+                reason = f"archivo truncado ({size} < {old_offset} bytes)"
+            elif previous.get("header_sha256") != header_sha:
+                reason = "cabecera distinta"
+            elif previous.get("tail_sha256") != _sha256_range(f, max(header_end, old_offset - TAIL_BYTES), old_offset):
+                reason = "contenido anterior al watermark modificado"
+
+            start = header_end if reason else old_offset
+            end = _last_newline(f, start, size)
+            new_rows = _count_newlines(f, start, end)
+            tail_sha = _sha256_range(f, max(header_end, end - TAIL_BYTES), end)
+
+        columns = pd.read_csv(io.BytesIO(header_line), sep=delimitador, nrows=0).columns
+        if schema:
+            columns = [c for c in columns if c in schema]
+            if not columns:
+                return 3, f"❌ Ninguna columna del schema está en el archivo.", pd.DataFrame(), {}
+
+        if end <= start:
+            df = pd.DataFrame(columns=list(columns))
+        else:
+            stream = io.BufferedReader(_RangeStream(path, header_line, start, end), BLOCK_BYTES)
+            if chunksize:
+                df = _RangeChunkReader(stream, delimitador, chunksize, list(columns) if schema else None, schema)
+            else:
+                with stream:
+                    if schema:
+                        df = _read_csv_arrow(stream, delimitador, schema, list(columns))
+                    else:
+                        df = pd.read_csv(stream, sep=delimitador)
+
+        watermark = {
+            "offset": end,
+            "rows": new_rows if reason else int(previous.get("rows", 0)) + new_rows,
+            "header_sha256": header_sha,
+            "tail_sha256": tail_sha,
+            "counters": {} if reason else dict(previous.get("counters", {})),
+        }
+        if not isinstance(df, pd.DataFrame):
+            origen = f"completo ({reason})" if reason else f"desde el byte {old_offset}"
+            msg = (f"✅ CSV abierto en modo incremental {origen}, bloques de {chunksize} filas: "
+                   f"{new_rows} filas nuevas ({watermark['rows']} filas en total).")
+        elif reason:
+            msg = f"✅ CSV extraído completo ({reason}): {len(df)} filas, {df.shape[1]} columnas."
+        elif df.empty:
+            msg = f"✅ Sin filas nuevas desde el último watermark ({watermark['rows']} filas ya cargadas)."
+        else:
+            msg = (f"✅ CSV extraído en modo incremental: {len(df)} filas nuevas desde el byte "
+                   f"{old_offset} ({watermark['rows']} filas en total).")
+        return 0, msg, df, watermark
+
+    except pd.errors.EmptyDataError as e:
+        return 2, f"❌ El archivo parece estar vacío o no es un CSV válido: {e}", pd.DataFrame(), {}
+    except (pd.errors.ParserError, pa.ArrowInvalid) as e:
+        return 2, f"❌ El archivo no es un CSV válido o está dañado: {e}", pd.DataFrame(), {}
+    except Exception as e:
+        return 9, f"❌ Error inesperado en extract_csv_incremental: {e}", pd.DataFrame(), {}
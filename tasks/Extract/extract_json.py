@@ -1,19 +1,107 @@
 # tasks/Extract/extract_json.py
 
+import io
 import json
-import re
 from pathlib import Path
-from typing import Dict, Tuple
+from typing import Dict, Tuple, Optional, Iterator, List
 import pandas as pd
 from prefect import task, get_run_logger
 
+from tasks.Extract.compressed_source import base_suffix, compression_of, open_source, compression_ratio
+
+try:
+    # Parser incremental opcional (pip install ijson) para JSON con un array en la raíz.
+    # No es una dependencia obligatoria: sin él, el array se carga completo con json.load.
+    import ijson
+except ImportError:
+    ijson = None
+
+# Registros por lote en los modos streaming
+DEFAULT_CHUNKSIZE = 100_000
+NDJSON_SUFFIXES = (".ndjson", ".jsonl")
+
+
+def _is_ndjson(json_path: Path) -> bool:
+    """
+    NDJSON (un objeto por línea) por extensión o, si no, porque la primera línea ya es un
+    objeto JSON completo y hay más líneas detrás.
+    """
+    if base_suffix(json_path) in NDJSON_SUFFIXES:
+        return True
+    with io.TextIOWrapper(open_source(json_path), encoding="utf-8") as f:
+        first = f.readline()
+        if not first.lstrip().startswith("{"):
+            return False
+        try:
+            json.loads(first)
+        except json.JSONDecodeError:
+            return False
+        return any(line.strip() for line in f)
+
+
+def _iter_ndjson(f, chunksize: int) -> Iterator[pd.DataFrame]:
+    # Parser C de pandas por lotes; sin inferir fechas ni tipos (se convierten después)
+    with pd.read_json(
+        io.TextIOWrapper(f, encoding="utf-8"), lines=True, chunksize=chunksize,
+        dtype=False, convert_dates=False
+    ) as reader:
+        yield from reader
+
+
+def _iter_json_array(f, chunksize: int) -> Iterator[Tuple[pd.DataFrame, dict]]:
+    """Lotes normalizados de un JSON con array en la raíz, junto con el primer objeto del lote."""
+    # peek no consume: el parser recibe el flujo desde el principio (también comprimido)
+    head = f.peek(1024)[:1024].lstrip()
+    if ijson is not None and head.startswith(b"["):
+        batch = []
+        for obj in ijson.items(f, "item", use_float=True):
+            batch.append(obj)
+            if len(batch) >= chunksize:
+                yield pd.json_normalize(batch), batch[0]
+                batch = []
+        if batch:
+            yield pd.json_normalize(batch), batch[0]
+        return
+    # Sin ijson (o con un objeto en la raíz): carga completa como antes
+    data = json.load(f)
+    ejemplo = data[0] if isinstance(data, list) and data else data
+    yield pd.json_normalize(data), ejemplo
+
+
+def _to_text(s: pd.Series) -> pd.Series:
+    """
+    Listas unidas con ' , ' y el resto convertido a str, sin lambdas por celda. Los nulos
+    (null en el JSON o clave ausente) se quedan como None en lugar de 'None'/'nan', igual
+    en NDJSON que en array.
+    """
+    out = s.astype(str).astype(object)
+    is_list = s.map(type).eq(list)
+    if is_list.any():
+        out[is_list] = s[is_list].str.join(" , ")
+    out[s.isna()] = None
+    return out
+
+
 @task
 def extract_json(
     path: str,
-    settings: Dict[str, str]
+    settings: Dict[str, str],
+    chunksize: Optional[int] = None
 ) -> Tuple[int, str, pd.DataFrame]:
     """
     Lee un JSON en `path` y extrae solo las columnas de `settings` (col: tipo).
+
+    Acepta JSON con un array de objetos en la raíz o NDJSON (un objeto por línea, extensión
+    .ndjson/.jsonl o detectado por contenido). Ambos se leen por lotes de `chunksize`
+    registros (por defecto DEFAULT_CHUNKSIZE) y de cada lote solo se conservan las columnas
+    pedidas, así que la memoria depende del resultado y no del archivo. El array JSON se lee
+    en streaming solo si está instalado el paquete opcional `ijson` (pip install ijson); si
+    no, se carga completo como antes y se avisa en el log.
+    En las columnas de texto los nulos se devuelven como None en ambos formatos.
+    Los archivos comprimidos (.gz, .bz2, .xz, .zst) se descomprimen en streaming y el
+    mensaje incluye el ratio de compresión.
+    Las conversiones de tipo son vectorizadas (sin lambdas por celda).
+
     - 1: ruta/archivo no existe
     - 2: no es JSON válido
     - 3: faltan columnas solicitadas
@@ -27,38 +115,55 @@ def extract_json(
         json_path = Path(path)
         if not json_path.exists():
             return 1, f"{task_name} ❌ Ruta o archivo no existe: {path}", pd.DataFrame()
+        chunksize = chunksize or DEFAULT_CHUNKSIZE
+        cols: List[str] = list(settings.keys())
 
-        # Cargar JSON
+        # Cargar JSON por lotes, conservando solo las columnas pedidas
+        parts, seen, ejemplo = [], set(), None
         try:
-            with open(json_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except Exception as e:
+            ndjson = _is_ndjson(json_path)
+            with open_source(json_path) as f:
+                if ndjson:
+                    modo = "NDJSON"
+                    for part in _iter_ndjson(f, chunksize):
+                        if ejemplo is None and not part.empty:
+                            ejemplo = part.iloc[0].to_dict()
+                        seen.update(part.columns)
+                        parts.append(part.reindex(columns=cols))
+                else:
+                    modo = "JSON (streaming)" if ijson is not None else "JSON"
+                    if ijson is None:
+                        logger.warning(f"{task_name} ⚠️ ijson no está instalado: el array JSON se "
+                                       "carga completo en memoria (pip install ijson para leerlo en streaming).")
+                    for part, first in _iter_json_array(f, chunksize):
+                        ejemplo = first if ejemplo is None else ejemplo
+                        seen.update(part.columns)
+                        parts.append(part.reindex(columns=cols))
+                json_bytes = f.raw.bytes_read
+        except (ValueError, UnicodeDecodeError) as e:
+            # json.JSONDecodeError, errores de ijson y de pd.read_json derivan de ValueError
             return 2, f"{task_name} ❌ El archivo no es un JSON válido o no se pudo abrir: {e}", pd.DataFrame()
-
-        # Normalizar
-        try:
-            df_full = pd.json_normalize(data)
         except Exception as e:
+            if ijson is not None and isinstance(e, ijson.JSONError):
+                return 2, f"{task_name} ❌ El archivo no es un JSON válido o no se pudo abrir: {e}", pd.DataFrame()
             return 9, f"{task_name} ❌ Error al convertir JSON a DataFrame: {e}", pd.DataFrame()
 
         # Comprobar columnas
-        missing = [c for c in settings if c not in df_full.columns]
+        missing = [c for c in cols if c not in seen]
         if missing:
-            ejemplo = (data[0] if isinstance(data, list) and data else data)
             return 3, (
                 f"{task_name} ❌ No se pudieron extraer las columnas pedidas: {missing}. "
                 f"Primer objeto JSON: {ejemplo}"
             ), pd.DataFrame()
 
-        # Extraer y convertir
-        df = df_full[list(settings.keys())].copy()
+        df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=cols)
+
+        # Convertir
         for col, dtype in settings.items():
             dt = dtype.lower()
             # si el tipo es texto, unimos listas y convertimos todo a str
             if dt in ("str", "string", "object"):
-                df[col] = df[col].apply(
-                    lambda v: " , ".join(v) if isinstance(v, list) else str(v)
-                )
+                df[col] = _to_text(df[col])
                 continue
 
             if dt == "date":
@@ -69,7 +174,7 @@ def extract_json(
                 df[col] = (
                     df[col]
                     .astype(str)
-                    .apply(lambda s: re.sub(r"\D", "", s))
+                    .str.replace(r"\D", "", regex=True)
                     .replace("", pd.NA)
                 )
                 continue
@@ -79,8 +184,6 @@ def extract_json(
                     df[col] = pd.to_numeric(df[col], errors="raise").astype("Int64")
                 elif dt in ("float", "double"):
                     df[col] = pd.to_numeric(df[col], errors="raise").astype(float)
-                elif dt in ("str", "string", "object"):
-                    df[col] = df[col].astype(str)
                 elif dt in ("bool", "boolean"):
                     df[col] = df[col].astype(bool)
                 else:
@@ -89,7 +192,10 @@ def extract_json(
             except Exception as e:
                 return 9, f"{task_name} ❌ Error al convertir columna '{col}' al tipo '{dtype}': {e}", pd.DataFrame()
 
-        msg = f"{task_name} ✅ JSON extraído correctamente: {len(df)} registros y {df.shape[1]} columnas."
+        ratio = compression_ratio(json_path, json_bytes)
+        comp = f" Comprimido ({compression_of(json_path)}): ratio {ratio:.1f}x." if ratio else ""
+        msg = (f"{task_name} ✅ {modo} extraído correctamente: {len(df)} registros y "
+               f"{df.shape[1]} columnas ({len(parts)} lote(s)).{comp}")
         return 0, msg, df
 
     except Exception as e:
@@ -1,7 +1,13 @@
+import argparse
+import hashlib
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
 import requests
 from bs4 import BeautifulSoup
-from datetime import datetime
-import json
 
 # 1. Definimos las comunidades y sus slugs
 REGIONS = {
@@ -28,13 +34,54 @@ REGIONS = {
 
 YEAR = 2015
 BASE_URL = "https://www.officeholidays.com/countries/spain/{slug}/{year}"
+CACHE_DIR = Path(".holidays_cache")
+MAX_WORKERS = 16
+
+# Una sesión HTTP por hilo (requests.Session no es segura entre hilos)
+_local = threading.local()
+
+
+def _session():
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+    return _local.session
+
+
+def fetch_page(slug, year, base_url=BASE_URL, cache_dir=CACHE_DIR):
+    """
+    Descarga la página de festivos de una región y año con caché en disco.
+    Si ya está en caché, se revalida con una petición condicional (If-None-Match /
+    If-Modified-Since): un 304 reutiliza la copia local sin volver a descargarla.
+    Devuelve (html, estado) con estado "descargada", "revalidada" o "modificada".
+    """
+    html_path = cache_dir / f"{slug}_{year}.html"
+    meta_path = cache_dir / f"{slug}_{year}.meta.json"
+    headers = {}
+    cached = html_path.exists() and meta_path.exists()
+    if cached:
+        meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
 
-def parse_table(region_name, slug):
-    """Descarga y parsea la tabla de festivos para una región."""
-    url = BASE_URL.format(slug=slug, year=YEAR)
-    resp = requests.get(url)
+    resp = _session().get(base_url.format(slug=slug, year=year), headers=headers, timeout=30)
+    if cached and resp.status_code == 304:
+        return html_path.read_text(encoding="utf-8"), "revalidada"
     resp.raise_for_status()
-    soup = BeautifulSoup(resp.text, "html.parser")
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    html_path.write_text(resp.text, encoding="utf-8")
+    meta_path.write_text(json.dumps({
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+    }), encoding="utf-8")
+    return resp.text, ("modificada" if cached else "descargada")
+
+
+def parse_table(region_name, html, year):
+    """Parsea la tabla de festivos de una región (HTML ya descargado) para `year`."""
+    soup = BeautifulSoup(html, "html.parser")
     table = soup.find("table", {"class": "country-table"})
     holidays = []
     for row in table.tbody.find_all("tr"):
@@ -49,7 +96,7 @@ def parse_table(region_name, slug):
             continue
         comment = cols[4].get_text(strip=True) if len(cols) > 4 else ""
         # Convertimos fecha a DD-MM-YYYY
-        dt = datetime.strptime(f"{date_str} {YEAR}", "%b %d %Y")
+        dt = datetime.strptime(f"{date_str} {year}", "%b %d %Y")
         day = dt.strftime("%d-%m-%Y")
         holidays.append({
             "Day": day,
@@ -75,7 +122,7 @@ def merge_holidays(all_hols):
         region = entry["Region"]
         name   = entry["Name"]
         htype  = entry["Type"]      # "Nacional" o "Regional"
-        comment = entry.get("Comment", "")
+        comment = entry.get("Comments", "")
 
         if day not in merged:
             merged[day] = {
@@ -134,20 +181,72 @@ def merge_holidays(all_hols):
 
     return final
 
-def main():
-    # 2. Recolectamos todos los festivos
+def merge_year(year, pages, cache_dir=CACHE_DIR):
+    """
+    merge_holidays de un año, con caché: los festivos se agrupan por fecha, así que cada año
+    se fusiona por separado. Si las páginas de todas las regiones son las mismas que en la
+    última fusión (mismo hash), se reutiliza el resultado guardado sin volver a parsear.
+    `pages` es una lista (region_name, html) en el orden de REGIONS.
+    """
+    key = hashlib.sha256("".join(html for _, html in pages).encode("utf-8")).hexdigest()
+    merged_path = cache_dir / f"merged_{year}.json"
+    if merged_path.exists():
+        cached = json.loads(merged_path.read_text(encoding="utf-8"))
+        if cached.get("key") == key:
+            return cached["holidays"], True
+
     all_holidays = []
-    for region_name, slug in REGIONS.items():
-        all_holidays.extend(parse_table(region_name, slug))
+    for region_name, html in pages:
+        all_holidays.extend(parse_table(region_name, html, year))
+    holidays = merge_holidays(all_holidays)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    merged_path.write_text(json.dumps({"key": key, "holidays": holidays}, ensure_ascii=False), encoding="utf-8")
+    return holidays, False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Descarga y fusiona los festivos de España por región.")
+    parser.add_argument("--start-year", type=int, default=YEAR)
+    parser.add_argument("--end-year", type=int, default=None, help="Incluido (por defecto = start-year)")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS, help="Peticiones simultáneas máximas")
+    parser.add_argument("--cache-dir", type=Path, default=CACHE_DIR)
+    parser.add_argument("--base-url", default=BASE_URL, help="Plantilla con {slug} y {year}")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+
+    end_year = args.end_year or args.start_year
+    years = list(range(args.start_year, end_year + 1))
+    output = args.output or (
+        f"holidays_{args.start_year}.json" if len(years) == 1
+        else f"holidays_{args.start_year}_{end_year}.json"
+    )
+
+    # 2. Descargamos (o revalidamos) todas las páginas región × año en paralelo
+    jobs = [(year, region_name, slug) for year in years for region_name, slug in REGIONS.items()]
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = {
+            (year, slug): pool.submit(fetch_page, slug, year, args.base_url, args.cache_dir)
+            for year, _, slug in jobs
+        }
+        pages, estados = {}, {}
+        for key, fut in futures.items():
+            pages[key], estado = fut.result()
+            estados[estado] = estados.get(estado, 0) + 1
 
-    # 3. Normalizamos y fusionamos
-    holidays_2015 = merge_holidays(all_holidays)
+    # 3. Normalizamos y fusionamos año a año (reutilizando los años sin cambios)
+    holidays, reused = [], 0
+    for year in years:
+        year_pages = [(region_name, pages[(year, slug)]) for region_name, slug in REGIONS.items()]
+        year_holidays, was_cached = merge_year(year, year_pages, args.cache_dir)
+        holidays.extend(year_holidays)
+        reused += was_cached
 
     # 4. Guardamos JSON
-    with open("holidays_2015.json", "w", encoding="utf-8") as f:
-        json.dump(holidays_2015, f, ensure_ascii=False, indent=2)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(holidays, f, ensure_ascii=False, indent=2)
 
-    print(f"Generado holidays_2015.json con {len(holidays_2015)} registros.")
+    print(f"Páginas: {estados}. Años reutilizados de caché: {reused}/{len(years)}.")
+    print(f"Generado {output} con {len(holidays)} registros.")
 
 if __name__ == "__main__":
     main()
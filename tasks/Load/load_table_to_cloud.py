@@ -6,26 +6,59 @@ import pandas as pd
 from pathlib import Path
 from datetime import datetime
 from prefect import task, get_run_logger
-from typing import Tuple, Dict
+from typing import Tuple, Dict, Union, Optional
+
+from tasks.Quality.quality_engine import profile_matches
 
 @task(cache_key_fn=lambda *args, **kwargs: None)
 def load_table_to_cloud(
-    df: pd.DataFrame,
+    df: Union[pd.DataFrame, str],
     table_name: str,
-    con
+    con,
+    profile: Optional[dict] = None
 ) -> Tuple[int, str, Dict[str, int]]:
+    """
+    Crea o actualiza (upsert por la primera columna, que actúa de PK) `table_name` en `con`.
+    `df` puede ser un DataFrame (se pasa por un Parquet temporal) o, en el modo de ejecución
+    DuckDB, el nombre de una relación ya preparada en la misma conexión (sin pasar por pandas).
+    Si se pasa `profile` (profile_columns con la PK) y sigue describiendo `df`, la comprobación
+    de duplicados de la PK se lee del perfil en lugar de recorrer la columna otra vez.
+    Devuelve (code, mensaje, load_report).
+    """
     logger = get_run_logger()
 
-    if not isinstance(df, pd.DataFrame) or df.empty:
+    staged = isinstance(df, str)
+    if staged:
+        try:
+            staged_types = {row[0]: row[1] for row in con.execute(f"DESCRIBE {df}").fetchall()}
+            n_rows = con.execute(f"SELECT COUNT(*) FROM {df}").fetchone()[0]
+        except Exception as e:
+            return 1, f"❌ Error: relación '{df}' inválida para tabla '{table_name}': {e}", {}
+        if n_rows == 0:
+            return 1, f"❌ Error: relación '{df}' vacía para tabla '{table_name}'.", {}
+        cols = list(staged_types)
+    elif not isinstance(df, pd.DataFrame) or df.empty:
         return 1, f"❌ Error: df inválido o vacío para tabla '{table_name}'.", {}
+    else:
+        n_rows = len(df)
+        cols = df.columns.tolist()
 
     if not isinstance(table_name, str) or not table_name.strip():
         return 1, f"❌ Error: table_name inválido: '{table_name}'.", {}
 
-    pk_col = df.columns[0]
-    dupes = df[pk_col].duplicated()
-    if dupes.any():
-        duplicated_keys = df.loc[dupes, pk_col].unique().tolist()
+    pk_col = cols[0]
+    if staged:
+        duplicated_keys = [row[0] for row in con.execute(f"""
+            SELECT {pk_col} FROM {df} GROUP BY {pk_col} HAVING COUNT(*) > 1
+        """).fetchall()]
+    elif profile and profile.get("pk") == pk_col and profile_matches(profile, df, [pk_col]):
+        duplicated_keys = [val for val, _ in profile["pk_duplicates"]["top"]]
+        if profile["pk_duplicates"]["values"] > len(duplicated_keys):
+            duplicated_keys.append(f"… {profile['pk_duplicates']['values']} en total")
+    else:
+        dupes = df[pk_col].duplicated()
+        duplicated_keys = df.loc[dupes, pk_col].unique().tolist() if dupes.any() else []
+    if duplicated_keys:
         return 1, (
             f"❌ Error: valores duplicados en la clave primaria '{pk_col}': {duplicated_keys}"
         ), {}
@@ -36,16 +69,21 @@ def load_table_to_cloud(
         "total_ignored": 0
     }
 
-    try:
-        temp_dir = Path.cwd() / "TEMP"
-        temp_dir.mkdir(exist_ok=True)
-        parquet_path = temp_dir / f"{table_name}.parquet"
-        if parquet_path.exists():
-            parquet_path.unlink()
-        df.to_parquet(parquet_path, index=False)
-        logger.info(f"✅ Parquet temporal escrito: '{parquet_path}', filas: {len(df)}.")
-    except Exception as e:
-        return 3, f"❌ Error escribiendo Parquet: {e}", {}
+    parquet_path = None
+    if staged:
+        source_sql = df
+    else:
+        try:
+            temp_dir = Path.cwd() / "TEMP"
+            temp_dir.mkdir(exist_ok=True)
+            parquet_path = temp_dir / f"{table_name}.parquet"
+            if parquet_path.exists():
+                parquet_path.unlink()
+            df.to_parquet(parquet_path, index=False)
+            logger.info(f"✅ Parquet temporal escrito: '{parquet_path}', filas: {len(df)}.")
+        except Exception as e:
+            return 3, f"❌ Error escribiendo Parquet: {e}", {}
+        source_sql = f"read_parquet('{parquet_path}')"
 
     try:
         exists_df = con.execute(
@@ -69,9 +107,12 @@ def load_table_to_cloud(
                 'boolean': 'BOOLEAN'
             }
             def duck_type(dtype_str): return type_map.get(dtype_str, 'VARCHAR')
+            col_types = staged_types if staged else {
+                col: duck_type(str(dtype)) for col, dtype in df.dtypes.items()
+            }
             cols_ddl = [
-                f"{col} {duck_type(str(dtype))}" + (" PRIMARY KEY" if col == pk_col else "")
-                for col, dtype in df.dtypes.items()
+                f"{col} {sql_type}" + (" PRIMARY KEY" if col == pk_col else "")
+                for col, sql_type in col_types.items()
             ]
             ddl = f"CREATE TABLE {table_name} (\n  " + ",\n  ".join(cols_ddl) + "\n)"
             con.execute(ddl)
@@ -82,8 +123,11 @@ def load_table_to_cloud(
             return 4, f"❌ Error creando tabla: {e}", {}
 
         try:
-            con.execute(f"COPY {table_name} FROM '{parquet_path}' (FORMAT 'parquet')")
-            load_report["total_inserted"] = len(df)
+            if staged:
+                con.execute(f"INSERT INTO {table_name} SELECT * FROM {source_sql}")
+            else:
+                con.execute(f"COPY {table_name} FROM '{parquet_path}' (FORMAT 'parquet')")
+            load_report["total_inserted"] = n_rows
             try: parquet_path.unlink()
             except: pass
             return 0, (
@@ -95,61 +139,57 @@ def load_table_to_cloud(
             return 5, f"❌ Error insertando datos en nueva tabla: {e}", {}
 
     # ----- Si la tabla ya existe -----
-    total_keys = set(df[pk_col].tolist())
-    substituted_keys = []
-    ignored_keys = []
-
     try:
         tmp_table = f"tmp_{table_name}_{int(datetime.utcnow().timestamp())}"
         con.execute(f"""
             CREATE TEMPORARY TABLE {tmp_table} AS 
-            SELECT * FROM read_parquet('{parquet_path}')
+            SELECT * FROM {source_sql}
         """)
 
-        cols = df.columns.tolist()
         non_pk_cols = [col for col in cols if col != pk_col]
 
         comparison_clauses = " OR ".join([
             f"(t.\"{col}\" IS DISTINCT FROM tmp.\"{col}\")" for col in non_pk_cols
-        ])
+        ]) or "FALSE"
 
-        changed_keys_df = con.execute(f"""
-            SELECT t.{pk_col} FROM {table_name} t
-            INNER JOIN {tmp_table} tmp ON t.{pk_col} = tmp.{pk_col}
+        # Claves que ya existen en destino con algún valor distinto → se sustituyen
+        con.execute(f"""
+            CREATE TEMPORARY TABLE {tmp_table}_chg AS
+            SELECT tmp.{pk_col} FROM {tmp_table} tmp
+            INNER JOIN {table_name} t ON t.{pk_col} = tmp.{pk_col}
             WHERE {comparison_clauses}
-        """).fetchdf()
+        """)
+        n_updated = con.execute(f"SELECT COUNT(*) FROM {tmp_table}_chg").fetchone()[0]
 
-        substituted_keys = changed_keys_df[pk_col].tolist()
-        all_keys_df = con.execute(f"SELECT {pk_col} FROM {tmp_table}").fetchdf()
-        all_tmp_keys = set(all_keys_df[pk_col].tolist())
-        ignored_keys = list(all_tmp_keys - set(substituted_keys))
-        inserted_keys = list(total_keys - all_tmp_keys)
+        # Claves que no existen en destino → se insertan (p.ej. bloques nuevos en streaming)
+        n_inserted = con.execute(f"""
+            SELECT COUNT(*) FROM {tmp_table} tmp
+            WHERE NOT EXISTS (SELECT 1 FROM {table_name} t WHERE t.{pk_col} = tmp.{pk_col})
+        """).fetchone()[0]
 
-        if substituted_keys:
+        if n_updated:
             con.execute(f"""
-                DELETE FROM {table_name} 
-                WHERE {pk_col} IN (
-                    SELECT {pk_col} FROM {tmp_table}
-                    WHERE {pk_col} IN ({','.join(map(str, substituted_keys))})
-                )
+                DELETE FROM {table_name}
+                WHERE {pk_col} IN (SELECT {pk_col} FROM {tmp_table}_chg)
             """)
             con.execute(f"""
                 INSERT INTO {table_name}
                 SELECT * FROM {tmp_table}
-                WHERE {pk_col} IN ({','.join(map(str, substituted_keys))})
+                WHERE {pk_col} IN (SELECT {pk_col} FROM {tmp_table}_chg)
             """)
-            load_report["total_updated"] = len(substituted_keys)
+            load_report["total_updated"] = int(n_updated)
 
-        if inserted_keys:
+        if n_inserted:
             con.execute(f"""
                 INSERT INTO {table_name}
-                SELECT * FROM {tmp_table}
-                WHERE {pk_col} IN ({','.join(map(str, inserted_keys))})
+                SELECT * FROM {tmp_table} tmp
+                WHERE NOT EXISTS (SELECT 1 FROM {table_name} t WHERE t.{pk_col} = tmp.{pk_col})
             """)
-            load_report["total_inserted"] = len(inserted_keys)
+            load_report["total_inserted"] = int(n_inserted)
 
-        load_report["total_ignored"] = len(ignored_keys)
+        load_report["total_ignored"] = n_rows - int(n_updated) - int(n_inserted)
 
+        con.execute(f"DROP TABLE IF EXISTS {tmp_table}_chg")
         con.execute(f"DROP TABLE IF EXISTS {tmp_table}")
 
     except Exception as e:
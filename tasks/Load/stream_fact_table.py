@@ -0,0 +1,95 @@
+# tasks/Load/stream_fact_table.py
+
+from typing import Any, Dict, Iterable, Optional, Tuple
+from prefect import task, get_run_logger
+
+from tasks.Quality.check_nulls import check_nulls
+from tasks.Quality.profile_columns import profile_columns, merge_profiles
+from tasks.Transform.create_new_index import create_new_index, DEFAULT_STRIDE
+from tasks.Transform.transform_date import transform_date
+from tasks.Load.load_table_to_cloud import load_table_to_cloud
+
+
+@task(cache_key_fn=lambda *args, **kwargs: None)
+def stream_fact_table(
+    reader: Iterable,
+    day_col: str,
+    pk: str,
+    table_name: str,
+    con,
+    counters: Optional[Dict[str, int]] = None,
+    key_mode: str = "str",
+    stride: int = DEFAULT_STRIDE,
+    quality_engine: str = "native"
+) -> Tuple[int, str, Dict[str, int], Optional[Dict[str, Any]]]:
+    """
+    Modo streaming de los flows de hechos (sales, delivery, oos): recorre los bloques de
+    `reader` (extract_csv o extract_csv_incremental con chunksize) y a cada uno le aplica
+    create_new_index sobre `day_col` (PK `pk`), transform_date (YYYYMMDD), profile_columns,
+    check_nulls (con los nulos del perfil) y load_table_to_cloud en `table_name`.
+
+    sort_dates y check_unique necesitan la tabla completa y se omiten; los contadores de
+    create_new_index (`counters`, que se actualiza) continúan entre bloques, así que la PK
+    sigue siendo única (load_table_to_cloud la verifica de nuevo en cada bloque). El lector
+    se cierra siempre al terminar.
+
+    Devuelve (code, msg, load_report, profile): el informe de carga acumulado y el perfil de
+    todos los bloques combinado con merge_profiles (None si no hubo bloques), para
+    update_quality_profiles. code/msg son los del primer paso que falla, 2 si no se pudo
+    leer un bloque, o 0 si todos se cargan.
+    """
+    logger = get_run_logger()
+    counters = {} if counters is None else counters
+    load_report = {"total_inserted": 0, "total_updated": 0, "total_ignored": 0}
+    n_chunks, n_rows = 0, 0
+    profile = None
+    code, msg = 0, ""
+    try:
+        for df in reader:
+            if df.empty:
+                continue
+            n_chunks += 1
+
+            # Create new index (contadores compartidos entre bloques)
+            code, msg, df = create_new_index.fn(df, day_col, pk, counters, key_mode, stride)
+            logger.info(msg)
+            if code != 0:
+                break
+
+            # Transform date
+            code, msg, df = transform_date.fn(df, day_col, "YYYYMMDD")
+            logger.info(msg)
+            if code != 0:
+                break
+
+            # Perfil del bloque, reutilizado por check_nulls y la carga y acumulado para la tabla
+            code, msg, chunk_profile = profile_columns.fn(df, pk)
+            logger.info(msg)
+            if code != 0:
+                break
+
+            # Check nulls
+            code, msg = check_nulls.fn(df, quality_engine, chunk_profile)
+            logger.info(msg)
+            if code != 0:
+                break
+
+            # Cargar el bloque
+            code, msg, chunk_report = load_table_to_cloud.fn(df, table_name, con, chunk_profile)
+            logger.info(f"[bloque {n_chunks}] {msg}")
+            if code != 0:
+                break
+            for key in load_report:
+                load_report[key] += chunk_report[key]
+            n_rows += len(df)
+            profile = merge_profiles(profile, chunk_profile)
+    except Exception as e:
+        code, msg = 2, f"❌ Error leyendo bloque {n_chunks + 1} del CSV: {e}"
+    finally:
+        close = getattr(reader, "close", None)
+        if close is not None:
+            close()
+
+    if code != 0:
+        return code, msg, load_report, profile
+    return 0, f"✅ Modo streaming: {n_chunks} bloques ({n_rows} filas) cargados en '{table_name}'.", load_report, profile
@@ -0,0 +1,104 @@
+# tasks/Load/update_quality_profiles.py
+
+import pandas as pd
+from prefect import task, get_run_logger
+from typing import Tuple, Any, Dict
+
+
+@task(cache_key_fn=lambda *args, **kwargs: None)
+def update_quality_profiles(
+    profile: Dict[str, Any],
+    table_id: Any,
+    table_name: Any,
+    con,
+    profiles_table: str = "quality_profiles"
+) -> Tuple[int, str]:
+    """
+    Persiste el perfil de profile_columns en `profiles_table` (una fila por columna y carga)
+    para seguir la deriva de los datos (nulos, distintos, rangos, tipos) entre cargas sin
+    volver a recorrer cargas anteriores.
+
+    Columnas: profiled_at, table_id, table_name, column_name, dtype, rows, nulls,
+    distinct_approx, min_value, max_value, is_pk, pk_duplicates.
+
+    Códigos de retorno:
+    1 → parámetros inválidos (perfil vacío, table_id no entero, table_name vacío).
+    2 → error con la conexión.
+    3 → error creando/verificando la tabla de perfiles.
+    4 → error insertando el perfil.
+    0 → éxito.
+    """
+    logger = get_run_logger()
+
+    # 1) Validar parámetros
+    if not isinstance(profile, dict) or not profile.get("columns"):
+        return 1, "update_quality_profiles ❌ Parámetros inválidos: profile vacío o sin columnas."
+    try:
+        tid_int = int(table_id)
+    except Exception:
+        return 1, f"update_quality_profiles ❌ table_id debe ser entero, se recibió: {table_id}"
+    if not isinstance(table_name, str) or not table_name.strip():
+        return 1, f"update_quality_profiles ❌ table_name inválido: '{table_name!r}'"
+
+    try:
+        con.execute("SELECT 1").fetchall()
+    except Exception as e:
+        return 2, f"update_quality_profiles ❌ Error con la conexión: {e}"
+
+    # 2) Crear la tabla de perfiles si no existe
+    try:
+        con.execute(f"""
+            CREATE TABLE IF NOT EXISTS {profiles_table} (
+                profiled_at     TIMESTAMP,
+                table_id        INTEGER,
+                table_name      VARCHAR,
+                column_name     VARCHAR,
+                dtype           VARCHAR,
+                rows            BIGINT,
+                nulls           BIGINT,
+                distinct_approx BIGINT,
+                min_value       VARCHAR,
+                max_value       VARCHAR,
+                is_pk           BOOLEAN,
+                pk_duplicates   BIGINT
+            )
+        """)
+        logger.info(f"✅ Tabla '{profiles_table}' verificada/creada.")
+    except Exception as e:
+        return 3, f"❌ Error creando/verificando '{profiles_table}': {e}"
+
+    # 3) Una fila por columna, insertadas en bloque
+    try:
+        pk = profile.get("pk")
+        pk_dups = (profile.get("pk_duplicates") or {}).get("values")
+        profiled_at = pd.Timestamp(profile.get("profiled_at") or pd.Timestamp.now(tz="UTC")).tz_convert(None)
+        rows = pd.DataFrame([
+            {
+                "profiled_at": profiled_at,
+                "table_id": tid_int,
+                "table_name": table_name,
+                "column_name": str(col),
+                "dtype": stats["dtype"],
+                "rows": int(profile["rows"]),
+                "nulls": stats["nulls"],
+                "distinct_approx": stats["distinct"],
+                "min_value": stats["min"],
+                "max_value": stats["max"],
+                "is_pk": col == pk,
+                "pk_duplicates": pk_dups if col == pk else None,
+            }
+            for col, stats in profile["columns"].items()
+        ])
+        con.register("__quality_profile", rows)
+        try:
+            con.execute(f"INSERT INTO {profiles_table} SELECT * FROM __quality_profile")
+        finally:
+            con.unregister("__quality_profile")
+    except Exception as e:
+        return 4, f"❌ Error insertando el perfil en '{profiles_table}': {e}"
+
+    msg = (
+        f"✅ update_quality_profiles: perfil de '{table_name}' ({len(rows)} columnas, "
+        f"{profile['rows']} filas) registrado en '{profiles_table}'."
+    )
+    return 0, msg
@@ -0,0 +1,44 @@
+# tasks/Load/update_source_manifest.py
+
+import os
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Tuple, Dict, Any
+from prefect import task
+
+from tasks.Extract.check_source_manifest import load_manifest
+
+@task
+def update_source_manifest(
+    alias: str,
+    fingerprint: Dict[str, Any],
+    manifest_path: str
+) -> Tuple[int, str]:
+    """
+    Registra en el manifiesto la huella de entradas con la que el flow `alias` acaba de
+    completar una carga correcta, junto con la fecha (UTC). La escritura es atómica
+    (archivo temporal + replace) para no dejar un manifiesto a medias.
+
+    Códigos de retorno:
+      - 1 → Parámetros inválidos (fingerprint vacío o no dict).
+      - 9 → Error escribiendo el manifiesto.
+      - 0 → Éxito.
+    """
+    if not isinstance(fingerprint, dict) or not fingerprint.get("files"):
+        return 1, f"⚠️ {alias}: sin huella de entradas; no se actualiza el manifiesto."
+    try:
+        manifest = load_manifest(manifest_path)
+        manifest[alias] = {
+            "fingerprint": fingerprint,
+            "last_success": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        path = Path(manifest_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        return 0, f"✅ Manifiesto actualizado para '{alias}'."
+    except Exception as e:
+        return 9, f"❌ Error actualizando el manifiesto para '{alias}': {e}"
@@ -0,0 +1,40 @@
+# tasks/Load/update_watermark.py
+
+import os
+import json
+from pathlib import Path
+from typing import Tuple, Dict, Any
+from prefect import task
+
+from tasks.Extract.extract_csv_incremental import load_watermarks
+
+@task
+def update_watermark(
+    ruta: str,
+    watermark: Dict[str, Any],
+    watermark_path: str
+) -> Tuple[int, str]:
+    """
+    Guarda el watermark devuelto por extract_csv_incremental para `ruta` una vez cargadas
+    sus filas, de modo que la siguiente ejecución lea solo lo añadido a partir de ahí.
+    La escritura es atómica (archivo temporal + replace).
+
+    Códigos de retorno:
+      - 1 → Parámetros inválidos (watermark vacío o sin offset).
+      - 9 → Error escribiendo el archivo de watermarks.
+      - 0 → Éxito.
+    """
+    if not isinstance(watermark, dict) or "offset" not in watermark:
+        return 1, f"⚠️ Watermark inválido para '{ruta}'; no se actualiza."
+    try:
+        watermarks = load_watermarks(watermark_path)
+        watermarks[str(Path(ruta))] = watermark
+        path = Path(watermark_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(watermarks, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return 0, f"✅ Watermark actualizado para '{Path(ruta).name}': byte {watermark['offset']}, {watermark.get('rows', 0)} filas."
+    except Exception as e:
+        return 9, f"❌ Error actualizando el watermark de '{ruta}': {e}"
@@ -1,21 +1,107 @@
 # tasks/Quality/check_datatypes.py
 
 import pandas as pd
-import great_expectations as ge
 from prefect import task, get_run_logger
-from typing import Tuple, Any, Dict
+from pathlib import Path
+from typing import Tuple, Any, Dict, Optional, Union
 
-@task
+from tasks.Quality.quality_engine import (
+    profile_matches, sql_source, sql_columns, quote_ident, SQL_TYPES, SQL_TYPE_ALIASES
+)
+
+
+def _check_datatypes_sql(source: str, expected_types: Dict[str, str], con) -> Tuple[int, str, str]:
+    """
+    check_datatypes sobre una relación de `con` o un Parquet: compara los tipos DuckDB con
+    los esperados y, si alguno no coincide, crea la vista temporal '<fuente>_typed' con las
+    columnas en el orden esperado y TRY_CAST en las que lo necesitan (los valores no
+    convertibles se cuentan en el mismo agregado). Devuelve (code, msg, relación resultante).
+    """
+    with sql_source(source, con) as (sql_con, src):
+        types = sql_columns(sql_con, src)
+        expected_cols = list(expected_types)
+        missing = [c for c in expected_cols if c not in types]
+        extra = [c for c in types if c not in expected_types]
+        structure = "\n".join(f"{c}: {t}" for c, t in types.items())
+        if missing or extra:
+            msg = ""
+            if missing:
+                msg += f"❌ Faltan columnas: {missing}. "
+            if extra:
+                msg += f"❌ Columnas inesperadas: {extra}. "
+            return 1, f"{msg}\n\nEstructura de columnas ('{source}'):\n{structure}", source
+
+        casts = {}
+        for col, type_str in expected_types.items():
+            requested = SQL_TYPE_ALIASES.get(type_str.lower(), type_str.lower())
+            if requested not in SQL_TYPES:
+                raise ValueError(f"Unrecognized type '{type_str}' para columna '{col}'")
+            accepted, target = SQL_TYPES[requested]
+            if not types[col].upper().startswith(accepted):
+                casts[col] = target
+
+        reordered = list(types) != expected_cols
+        if not casts and not reordered:
+            return 0, (
+                f"✅ check_datatypes completado (SQL). No fue necesario ningún cambio.\n\n"
+                f"Estructura de columnas ('{source}'):\n{structure}"
+            ), source
+
+        changes = []
+        if casts:
+            # Valores que TRY_CAST deja en nulo, para todas las columnas en una pasada
+            lost = sql_con.execute("SELECT " + ", ".join(
+                f"COUNT({quote_ident(c)}) - COUNT(TRY_CAST({quote_ident(c)} AS {t}))" for c, t in casts.items()
+            ) + f" FROM {src}").fetchone()
+            for (col, target), n in zip(casts.items(), lost):
+                suffix = f" ({n} valores no convertibles → nulos)" if n else ""
+                changes.append(f"Columna '{col}' ({types[col]}) convertida a {target}{suffix}")
+        if reordered:
+            changes.append(f"Columnas reordenadas a {expected_cols}")
+
+        if con is None:
+            # Parquet sin conexión: solo se informa; no hay dónde dejar la vista
+            changes_str = "\n".join(f"⚠️ {c}" for c in changes)
+            return 0, f"⚠️ check_datatypes (SQL) sin conexión: cambios necesarios no aplicados:\n{changes_str}", source
+
+        view = f"{Path(source).stem if source.lower().endswith('.parquet') else source}_typed"
+        select = ", ".join(
+            f"TRY_CAST({quote_ident(c)} AS {casts[c]}) AS {quote_ident(c)}" if c in casts else quote_ident(c)
+            for c in expected_cols
+        )
+        sql_con.execute(f"CREATE OR REPLACE TEMP VIEW {view} AS SELECT {select} FROM {src}")
+        changes_str = "\n".join(f"✅ {c}" for c in changes)
+        new_structure = "\n".join(f"{c}: {t}" for c, t in sql_columns(sql_con, view).items())
+        return 0, (
+            f"✅ check_datatypes completado (SQL). Se aplicaron cambios en la vista '{view}':\n"
+            f"{changes_str}\n\n"
+            f"Estructura de columnas:\n{new_structure}"
+        ), view
+
+
+@task(cache_key_fn=lambda *args, **kwargs: None)
 def check_datatypes(
-    df: pd.DataFrame,
-    expected_types: Dict[str, str]
-) -> Tuple[int, str, pd.DataFrame]:
+    df: Union[pd.DataFrame, str],
+    expected_types: Dict[str, str],
+    profile: Optional[dict] = None,
+    con=None
+) -> Tuple[int, str, Union[pd.DataFrame, str]]:
     """
     Verifica que `df` tenga exactamente las columnas y tipos indicados en `expected_types`,
     en el orden especificado. Si faltan o sobran columnas, reporta error. Si el orden es distinto,
     reordena. Si el tipo no coincide, intenta convertir y reporta el cambio.
 
     expected_types: { column_name: type_string }, donde type_string ∈ {"str", "string", "int", "integer", "float", "number", "bool", "boolean", "datetime"}
+      "str" acepta columnas object y categóricas de texto (los nombres de día y mes de
+      create_calendar), que se mantienen sin convertir; en SQL, VARCHAR y ENUM.
+    profile: perfil de profile_columns; si describe `df`, las conversiones con coerción
+      informan de cuántos valores no convertibles pasaron a nulo (comparando con los nulos
+      del perfil, sin recorrer la columna original).
+
+    Motor SQL: si `df` es un str (tabla/relación de `con` o ruta Parquet), la comprobación se
+    hace con DuckDB sobre la fuente preparada, sin traerla a pandas. Las conversiones se
+    aplican con TRY_CAST en una vista temporal '<fuente>_typed', que se devuelve en lugar
+    del DataFrame; si faltan o sobran columnas, code = 1.
 
     Devuelve:
       * code = 1 si logra dejar df con columnas y tipos correctos.
@@ -24,6 +110,12 @@ def check_datatypes(
       * code = 0 si error bloqueante, con mensaje que incluye HEAD(5) y estructura.
     """
     logger = get_run_logger()
+    if isinstance(df, str):
+        try:
+            return _check_datatypes_sql(df, expected_types, con)
+        except Exception as e:
+            return 9, f"❌ Error en check_datatypes (SQL) sobre '{df}': {e}", df
+
     try:
         # 1. Verificar columnas exactas (sin extras ni faltantes)
         expected_cols = list(expected_types.keys())
@@ -61,6 +153,15 @@ def check_datatypes(
         }
 
         changes = []
+        profiled = profile_matches(profile, df)
+
+        def coerced(col: str) -> str:
+            """Sufijo con los valores que la coerción dejó en nulo (solo con perfil válido)."""
+            if not profiled or col not in profile["columns"]:
+                return ""
+            lost = int(df[col].isna().sum()) - profile["columns"][col]["nulls"]
+            return f" ({lost} valores no convertibles → nulos)" if lost > 0 else ""
+
         for col, type_str in expected_types.items():
             requested = type_str.lower()
             if requested not in type_map:
@@ -72,23 +173,27 @@ def check_datatypes(
             if target_type == "datetime":
                 if not pd.api.types.is_datetime64_any_dtype(current_dtype):
                     df[col] = pd.to_datetime(df[col], errors="coerce")
-                    changes.append(f"Columna '{col}' convertida a datetime")
+                    changes.append(f"Columna '{col}' convertida a datetime{coerced(col)}")
             else:
                 # Para tipos numéricos y de texto
                 if requested in ("int", "integer"):
                     if not pd.api.types.is_integer_dtype(current_dtype) and not pd.api.types.is_dtype_equal(current_dtype, "Int64"):
                         df[col] = pd.to_numeric(df[col], errors="coerce").astype("Int64")
-                        changes.append(f"Columna '{col}' convertida a Int64 (nullable)")
+                        changes.append(f"Columna '{col}' convertida a Int64 (nullable){coerced(col)}")
                 elif requested in ("float", "number"):
                     if not pd.api.types.is_float_dtype(current_dtype):
                         df[col] = pd.to_numeric(df[col], errors="coerce").astype(float)
-                        changes.append(f"Columna '{col}' convertida a float64, nulos forzados a NaN")
+                        changes.append(f"Columna '{col}' convertida a float64, nulos forzados a NaN{coerced(col)}")
                 elif requested in ("bool", "boolean"):
                     if not pd.api.types.is_dtype_equal(current_dtype, "boolean"):
                         df[col] = df[col].astype("boolean")
                         changes.append(f"Columna '{col}' convertida a BooleanDtype (nullable)")
-                else:  # str / string
-                    if not pd.api.types.is_object_dtype(current_dtype):
+                else:  # str / string (los categóricos de texto se aceptan tal cual, como ENUM en SQL)
+                    text_categorical = isinstance(current_dtype, pd.CategoricalDtype) and (
+                        pd.api.types.is_object_dtype(current_dtype.categories.dtype)
+                        or pd.api.types.is_string_dtype(current_dtype.categories.dtype)
+                    )
+                    if not pd.api.types.is_object_dtype(current_dtype) and not text_categorical:
                         df[col] = df[col].astype(str)
                         changes.append(f"Columna '{col}' convertida a string")
 
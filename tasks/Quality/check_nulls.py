@@ -1,51 +1,73 @@
-# tasks/Quality/check_nulls_ge.py
+# tasks/Quality/check_nulls.py
 
 import pandas as pd
-import great_expectations as ge
 from prefect import task, get_run_logger
-from typing import Tuple
+from typing import Optional, Tuple, Union
 
-@task
-def check_nulls(df: pd.DataFrame) -> Tuple[int, str]:
+from tasks.Quality.quality_engine import (
+    resolve_engine, null_counts, ge_null_counts, profile_matches, sql_source, sql_null_counts
+)
+
+@task(cache_key_fn=lambda *args, **kwargs: None)
+def check_nulls(
+    df: Union[pd.DataFrame, str],
+    engine: str = "native",
+    profile: Optional[dict] = None,
+    con=None
+) -> Tuple[int, str]:
     """
-    Usa Great Expectations para verificar valores nulos en cada columna de `df`.
+    Verifica valores nulos en cada columna de `df`: un DataFrame o, con el motor SQL, el
+    nombre de una tabla/relación de `con` o la ruta de un Parquet.
     - Si no hay columnas con nulos: devuelve (0, mensaje).
-    - Si hay N columnas con nulos: devuelve (N, mensaje que lista columnas y nulos).
-    
+    - Si hay columnas con nulos: emite un warning que lista columnas y nulos y devuelve
+      (0, mensaje); el flujo continúa.
+
+    engine:
+      - "native" (por defecto): cuenta los nulos de todas las columnas en una sola pasada
+        vectorizada de pandas.
+      - "ge": Great Expectations (expect_column_values_to_not_be_null por columna); se
+        importa solo en este caso.
+      - "sql": un único agregado de DuckDB (multihilo, fuera de memoria) para todas las
+        columnas. Se usa siempre que `df` es un str (relación en `con` o Parquet); con un
+        DataFrame, este se registra en DuckDB sin copiarlo.
+    profile: perfil de profile_columns; si sigue describiendo `df`, los nulos se leen de
+      él sin recorrer el DataFrame (salvo con engine="ge", que siempre ejecuta GE).
+
     Códigos de retorno:
-    - 0 → no hay nulos en ninguna columna.
-    - 1, 2, 3,... → número de columnas que tienen al menos un nulo.
+    - 0 → comprobación completada (con o sin nulos).
+    - 1 → motor desconocido, great_expectations no disponible o relación sin conexión.
+    - 9 → error al consultar la fuente en DuckDB.
     """
 
-    # Convertir el DataFrame normal a un PandasDataset GE
-    ge_df = ge.from_pandas(df)
-
     logger = get_run_logger()
     task_name = "check_nulls"
 
+    try:
+        engine = resolve_engine(engine, df)
+        if engine == "sql":
+            with sql_source(df, con) as (sql_con, src):
+                counts = sql_null_counts(sql_con, src)
+        elif engine == "ge":
+            # Con "ge" se ejecutan siempre las expectations, aunque haya perfil
+            counts = ge_null_counts(df)
+        elif profile_matches(profile, df, df.columns):
+            counts = pd.Series(
+                {col: s["nulls"] for col, s in profile["columns"].items() if s["nulls"]}, dtype="int64"
+            )
+        else:
+            counts = null_counts(df)
+    except (ValueError, ImportError) as e:
+        return 1, f"{task_name}: ❌ {e}"
+    except Exception as e:
+        return 9, f"{task_name}: ❌ Error inesperado: {e}"
 
-    columnas_con_nulos = []
-    detalle = []
-
-    for col in ge_df.columns:
-        # Expectation: los valores de la columna NO deben ser null
-        resultado = ge_df.expect_column_values_to_not_be_null(column=col)
-        if not resultado.success:
-            # Contamos cuántos nulos hay (GE devuelve "unexpected_count" en resultado['result'])
-            null_count = resultado.result.get("unexpected_count", None)
-            # Si Unexpected_count no existe, calculamos con pandas
-            if null_count is None:
-                null_count = int(df[col].isna().sum())
-            columnas_con_nulos.append(col)
-            detalle.append(f"'{col}' → {null_count} nulos")
-
-    if not columnas_con_nulos:
+    if counts.empty:
         msg = f"{task_name}: ✅ No se encontraron nulos en ninguna columna."
         return 0, msg
 
     # Si hay columnas con nulos:
-    num_cols = len(columnas_con_nulos)
-    cols_lista = "; ".join(detalle)
+    num_cols = len(counts)
+    cols_lista = "; ".join(f"'{col}' → {n} nulos" for col, n in counts.items())
     logger.warning(f"{task_name}:⚠️ Se encontraron nulos en {num_cols} columna(s): {cols_lista}")
     msg = f"{task_name}: tarea completada con éxito."
     return 0, msg
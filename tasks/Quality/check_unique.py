@@ -1,70 +1,120 @@
-# tasks/Quality/check_unique_ge.py
+# tasks/Quality/check_unique.py
 
 import pandas as pd
-import great_expectations as ge
 from prefect import task, get_run_logger
-from typing import Tuple, List, Any
+from typing import Tuple, Any, Optional
 
-@task
-def check_unique(df: Any, col: str) -> Tuple[int, str]:
+from tasks.Quality.quality_engine import (
+    resolve_engine, duplicate_values, ge_duplicate_values, describe_duplicates, profile_matches,
+    sql_source, sql_columns, sql_duplicates, quote_ident, DEFAULT_MAX_LISTED
+)
+
+
+def _spill_duplicates(con, src: str, col: str, dup_table: str, max_listed: int):
+    """
+    Calcula los duplicados de `col` con un GROUP BY de DuckDB sobre `src` y los guarda en
+    `dup_table` (columnas value, n). Devuelve (valores duplicados, filas afectadas, los
+    `max_listed` más repetidos). Los nulos se ignoran.
     """
-    Usa Great Expectations para verificar unicidad en la columna `col` de `df`.
+    q = quote_ident(col)
+    con.execute(f"""
+        CREATE OR REPLACE TABLE {dup_table} AS
+        SELECT {q} AS value, COUNT(*) AS n FROM {src} WHERE {q} IS NOT NULL
+        GROUP BY {q} HAVING COUNT(*) > 1
+    """)
+    n_values, n_rows = con.execute(f"SELECT COUNT(*), COALESCE(SUM(n), 0) FROM {dup_table}").fetchone()
+    top = con.execute(f"SELECT value, n FROM {dup_table} ORDER BY n DESC LIMIT {int(max_listed)}").fetchall()
+    return int(n_values), int(n_rows), top
+
+
+@task(cache_key_fn=lambda *args, **kwargs: None)
+def check_unique(
+    df: Any,
+    col: str,
+    engine: str = "native",
+    max_listed: int = DEFAULT_MAX_LISTED,
+    con=None,
+    dup_table: Optional[str] = None,
+    profile: Optional[dict] = None
+) -> Tuple[int, str]:
+    """
+    Verifica unicidad en la columna `col` de `df`: un DataFrame o, con el motor SQL, el
+    nombre de una tabla/relación de `con` o la ruta de un Parquet.
     - Siempre devuelve code=0 si la tarea se ejecuta correctamente (aunque existan duplicados).
-      El mensaje indicará si todos los valores son únicos o listará los duplicados encontrados.
+      El mensaje indicará si todos los valores son únicos o resumirá los duplicados: número
+      de valores duplicados, filas afectadas y los `max_listed` valores más repetidos.
     - Si ocurre un error interno:
-        * code=1 si `df` no es un DataFrame válido.
+        * code=1 si `df` no es un DataFrame ni un str, el motor es desconocido,
+          great_expectations no está disponible o falta `con` para una relación.
         * code=2 si la columna `col` no existe en `df`.
         * code=9 para cualquier otro error inesperado.
 
+    engine:
+      - "native" (por defecto): un solo value_counts da los valores duplicados y sus
+        apariciones.
+      - "ge": Great Expectations (expect_column_values_to_be_unique); se importa solo en
+        este caso.
+      - "sql": un GROUP BY de DuckDB (multihilo, fuera de memoria). Se usa siempre que `df`
+        es un str; con un DataFrame, este se registra en DuckDB sin copiarlo.
+
+    Modo tablas grandes: si se pasan `con` (conexión DuckDB) y `dup_table`, los duplicados
+    se calculan en DuckDB y el conjunto completo se guarda en la tabla `dup_table`
+    (value, n) en lugar de construirse en memoria; el mensaje solo incluye los totales y
+    los más repetidos.
+
+    profile: perfil de profile_columns; si `col` es su PK y el perfil sigue describiendo
+    `df`, el resultado se lee del perfil sin recorrer la columna (salvo con engine="ge",
+    que siempre ejecuta la expectation).
+
     En caso de duplicados, se emite un logger.warning con los detalles, 
     pero el flujo continúa (devuelve siempre código 0 salvo error interno).
     """
 
     logger = get_run_logger()
 
-    # 1) Validar que df es un DataFrame
-    if not isinstance(df, pd.DataFrame):
+    # 1) Validar que df es un DataFrame (o una relación/Parquet para el motor SQL)
+    if not isinstance(df, (pd.DataFrame, str)):
         return 1, "❌ check_unique: el objeto proporcionado no es un DataFrame válido."
 
-    # 2) Validar que la columna existe
-    if col not in df.columns:
+    # 2) Validar que la columna existe (en la fuente SQL se comprueba al consultarla)
+    if isinstance(df, pd.DataFrame) and col not in df.columns:
         return 2, f"❌ check_unique: la columna '{col}' no existe en el DataFrame."
 
     try:
-        # 3) Crear un DataFrame de Great Expectations
-        ge_df = ge.from_pandas(df)
-
-        # 4) Expectation para unicidad
-        resultado = ge_df.expect_column_values_to_be_unique(column=col)
-
-        if resultado.success:
-            mensaje = f"✅ Todos los valores de la columna '{col}' son únicos."
-            return 0, mensaje
-
-        # 5) Si hay duplicados, extraer lista de valores duplicados
-        try:
-            unexpected = resultado.result.get("unexpected_list", [])
-        except Exception:
-            unexpected = []
-
-        if not unexpected:
-            # Fallback usando pandas directamente
-            dup_serie = df[col][df[col].duplicated(keep=False)]
-            unexpected = dup_serie.unique().tolist()
-
-        # 6) Construir mensaje con conteo de duplicados
-        conteos: List[str] = []
-        for val in unexpected:
-            count = int((df[col] == val).sum())
-            conteos.append(f"'{val}' aparece {count} veces")
-        detalles = "; ".join(conteos)
+        engine = resolve_engine(engine, df)
+        where = ""
+        pk_dups = (profile or {}).get("pk_duplicates")
+        if engine != "ge" and pk_dups is not None and profile.get("pk") == col and profile_matches(profile, df, [col]):
+            # 3a) Estado de duplicados de la PK ya calculado en el perfil
+            n_values, n_rows = pk_dups["values"], pk_dups["rows"]
+            listed = pk_dups["top"][:max(int(max_listed), 0)]
+        elif engine == "sql" or (con is not None and dup_table):
+            # 3b) GROUP BY en DuckDB, con los duplicados a una tabla si se pide
+            with sql_source(df, con) as (sql_con, src):
+                if col not in sql_columns(sql_con, src):
+                    return 2, f"❌ check_unique: la columna '{col}' no existe en '{df if isinstance(df, str) else 'DataFrame'}'."
+                if dup_table:
+                    n_values, n_rows, listed = _spill_duplicates(sql_con, src, col, dup_table, max_listed)
+                    where = f"; lista completa en la tabla '{dup_table}'"
+                else:
+                    n_values, n_rows, listed = sql_duplicates(sql_con, src, col, max_listed)
+        else:
+            # 3c) Un único conteo por hash: {valor: apariciones} de los duplicados
+            dups = ge_duplicate_values(df, col) if engine == "ge" else duplicate_values(df[col])
+            n_values, n_rows = len(dups), int(dups.sum())
+            listed = dups.head(max(int(max_listed), 0)).items()
+    except (ValueError, ImportError) as e:
+        return 1, f"❌ check_unique: {e}"
+    except Exception as e:
+        return 9, f"❌ check_unique: error inesperado → {e}"
 
-        warning_msg = f"⚠️ La columna '{col}' tiene duplicados: {detalles}"
-        logger.warning(warning_msg)
+    if n_values == 0:
+        mensaje = f"✅ Todos los valores de la columna '{col}' son únicos."
+        return 0, mensaje
 
-        # 7) Aunque haya duplicados, devolvemos code=0 y el mensaje de advertencia
-        return 0, warning_msg
+    # 4) Mensaje con totales y los valores más repetidos
+    warning_msg = describe_duplicates(col, listed, n_values, n_rows, where)
+    logger.warning(warning_msg)
 
-    except Exception as e:
-        # 8) Cualquier otro error inesperado
-        return 9, f"❌ check_unique: error inesperado → {e}"
+    # 5) Aunque haya duplicados, devolvemos code=0 y el mensaje de advertencia
+    return 0, warning_msg
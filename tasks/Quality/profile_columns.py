@@ -0,0 +1,154 @@
+# tasks/Quality/profile_columns.py
+
+import duckdb
+import pandas as pd
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+from prefect import task, get_run_logger
+
+from tasks.Quality.quality_engine import duplicate_values, DEFAULT_MAX_LISTED
+
+
+def _scan_duckdb(df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """Nulos, distintos (aproximado, HyperLogLog), min y max de todas las columnas en una sola consulta."""
+    exprs = []
+    for i, col in enumerate(df.columns):
+        q = '"' + str(col).replace('"', '""') + '"'
+        exprs += [
+            f"COUNT(*) - COUNT({q}) AS n{i}",
+            f"approx_count_distinct({q}) AS d{i}",
+            f"CAST(MIN({q}) AS VARCHAR) AS lo{i}",
+            f"CAST(MAX({q}) AS VARCHAR) AS hi{i}",
+        ]
+    con = duckdb.connect()
+    try:
+        con.register("src", df)
+        row = con.execute(f"SELECT {', '.join(exprs)} FROM src").fetchone()
+    finally:
+        con.close()
+    return {
+        col: {"nulls": int(row[4 * i]), "distinct": int(row[4 * i + 1]), "min": row[4 * i + 2], "max": row[4 * i + 3]}
+        for i, col in enumerate(df.columns)
+    }
+
+
+def _scan_pandas(df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
+    """Alternativa en pandas (distintos exactos) para columnas que DuckDB no puede leer."""
+    nulls = df.isna().sum()
+    stats = {}
+    for col in df.columns:
+        try:
+            lo, hi = df[col].min(), df[col].max()
+            lo, hi = (None if pd.isna(lo) else str(lo)), (None if pd.isna(hi) else str(hi))
+        except Exception:
+            lo = hi = None   # tipos mezclados sin orden
+        stats[col] = {"nulls": int(nulls[col]), "distinct": int(df[col].nunique()), "min": lo, "max": hi}
+    return stats
+
+
+def _extreme(a: Optional[str], b: Optional[str], dtype: str, pick) -> Optional[str]:
+    """min/max (`pick`) de dos extremos guardados como texto; numéricos comparados como número."""
+    if a is None or b is None:
+        return a if b is None else b
+    try:
+        numeric = pd.api.types.is_numeric_dtype(pd.api.types.pandas_dtype(dtype))
+    except TypeError:
+        numeric = False
+    return pick(a, b, key=float) if numeric else pick(a, b)
+
+
+def merge_profiles(total: Optional[Dict[str, Any]], part: Dict[str, Any], max_listed: int = DEFAULT_MAX_LISTED) -> Dict[str, Any]:
+    """
+    Acumula el perfil de un bloque (`part`) en `total` (None al empezar) para el modo
+    streaming: filas, nulos y duplicados de la PK se suman y min/max se combinan. Los
+    distintos (HyperLogLog) no se pueden sumar: se guarda el máximo por bloque, que es una
+    cota inferior. Los duplicados de la PK solo cuentan los de dentro de cada bloque.
+    """
+    if total is None:
+        return {**part, "columns": {c: dict(s) for c, s in part["columns"].items()},
+                "pk_duplicates": dict(part["pk_duplicates"]) if part.get("pk_duplicates") else None}
+    total["rows"] += part["rows"]
+    for col, stats in part["columns"].items():
+        acc = total["columns"].setdefault(col, dict(stats, nulls=0, distinct=0))
+        acc["nulls"] += stats["nulls"]
+        acc["distinct"] = max(acc["distinct"], stats["distinct"])
+        acc["min"] = _extreme(acc["min"], stats["min"], acc["dtype"], min)
+        acc["max"] = _extreme(acc["max"], stats["max"], acc["dtype"], max)
+    if total.get("pk_duplicates") and part.get("pk_duplicates"):
+        dups = total["pk_duplicates"]
+        dups["values"] += part["pk_duplicates"]["values"]
+        dups["rows"] += part["pk_duplicates"]["rows"]
+        dups["top"] = (dups["top"] + part["pk_duplicates"]["top"])[:max(int(max_listed), 0)]
+    return total
+
+
+@task(cache_key_fn=lambda *args, **kwargs: None)
+def profile_columns(
+    df: pd.DataFrame,
+    pk: Optional[str] = None,
+    max_listed: int = DEFAULT_MAX_LISTED
+) -> Tuple[int, str, Dict[str, Any]]:
+    """
+    Perfila todas las columnas de `df` en una pasada: dtype, nulos, distintos (estimación
+    HyperLogLog de DuckDB), min y max; y, si se indica `pk`, el estado de duplicados de la
+    clave primaria (conteo exacto por hash).
+
+    El perfil se guarda en el flow y lo reutilizan check_nulls, check_unique,
+    check_datatypes y load_table_to_cloud (parámetro `profile`) en lugar de volver a
+    recorrer el DataFrame; update_quality_profiles lo persiste en 'quality_profiles'.
+
+    Estructura del perfil:
+        {"rows": int, "profiled_at": str (UTC ISO), "pk": str | None,
+         "pk_duplicates": {"values": int, "rows": int, "top": [(valor, apariciones), ...]},
+         "columns": {col: {"dtype": str, "nulls": int, "distinct": int, "min": str, "max": str}}}
+
+    Códigos de retorno:
+    1 → df no es un DataFrame.
+    2 → la columna `pk` no existe en df.
+    9 → error inesperado.
+    0 → éxito.
+    """
+    logger = get_run_logger()
+    if not isinstance(df, pd.DataFrame):
+        return 1, "profile_columns ❌ Error: el objeto proporcionado no es un DataFrame válido.", {}
+    if pk is not None and pk not in df.columns:
+        return 2, f"profile_columns ❌ Error: la columna PK '{pk}' no existe en el DataFrame.", {}
+
+    try:
+        try:
+            stats = _scan_duckdb(df)
+            engine = "duckdb"
+        except Exception as e:
+            logger.warning(f"profile_columns ⚠️ DuckDB no pudo leer el DataFrame ({e}); se usa pandas.")
+            stats = _scan_pandas(df)
+            engine = "pandas"
+
+        for col, dtype in df.dtypes.items():
+            stats[col]["dtype"] = str(dtype)
+
+        profile: Dict[str, Any] = {
+            "rows": len(df),
+            "profiled_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "pk": pk,
+            "pk_duplicates": None,
+            "columns": stats,
+        }
+        if pk is not None:
+            dups = duplicate_values(df[pk])
+            profile["pk_duplicates"] = {
+                "values": len(dups),
+                "rows": int(dups.sum()),
+                "top": list(dups.head(max(int(max_listed), 0)).items()),
+            }
+
+        with_nulls = sum(1 for s in stats.values() if s["nulls"])
+        msg = (
+            f"profile_columns ✅ Perfil de {len(stats)} columnas y {len(df)} filas ({engine}); "
+            f"{with_nulls} columnas con nulos"
+        )
+        if pk is not None:
+            msg += f"; PK '{pk}' con {profile['pk_duplicates']['values']} valores duplicados"
+        return 0, msg + ".", profile
+
+    except Exception as e:
+        return 9, f"profile_columns ❌ Error inesperado: {e}", {}
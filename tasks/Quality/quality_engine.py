@@ -0,0 +1,213 @@
+# tasks/Quality/quality_engine.py
+
+from contextlib import contextmanager
+import duckdb
+import pandas as pd
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Motores de las comprobaciones de calidad:
+#   - "native": pandas vectorizado, todas las columnas en una pasada (por defecto).
+#   - "ge": Great Expectations, una expectation por columna; se importa solo al pedirlo.
+#   - "sql": agregados de DuckDB (multihilo, fuera de memoria) sobre una tabla/relación
+#     ya preparada, un Parquet o un DataFrame registrado. Se usa siempre que la fuente es
+#     un nombre de relación o una ruta Parquet (str) en lugar de un DataFrame.
+ENGINES = ("native", "ge", "sql")
+
+# Máximo de valores duplicados que se enumeran en el mensaje de check_unique
+DEFAULT_MAX_LISTED = 20
+
+
+def resolve_engine(engine: Optional[str], source=None) -> str:
+    """
+    Nombre de motor normalizado ("sql" si `source` es un str: relación o Parquet);
+    lanza ValueError si no es uno de ENGINES.
+    """
+    if isinstance(source, str):
+        return "sql"
+    name = str(engine or "native").lower()
+    if name not in ENGINES:
+        raise ValueError(f"motor de calidad desconocido: {engine!r}; opciones: {ENGINES}")
+    return name
+
+
+def load_ge():
+    """
+    Importa great_expectations bajo demanda. Su importación es lenta (varios segundos),
+    así que solo se paga cuando se pide el motor "ge".
+    """
+    try:
+        import great_expectations as ge
+    except ImportError as e:
+        raise ImportError(
+            "el motor de calidad 'ge' requiere great_expectations (pip install great_expectations)"
+        ) from e
+    return ge
+
+
+def profile_matches(profile: Optional[dict], df: pd.DataFrame, columns: Iterable[str] = ()) -> bool:
+    """
+    True si `profile` (de profile_columns) sigue describiendo `df`: mismo número de filas y,
+    para cada columna de `columns`, presente en ambos con el mismo dtype. Los consumidores
+    solo lo reutilizan en ese caso; si no, vuelven a calcular sobre df.
+    """
+    if not profile or not isinstance(df, pd.DataFrame) or profile.get("rows") != len(df):
+        return False
+    cols = profile.get("columns", {})
+    return all(c in cols and c in df.columns and cols[c]["dtype"] == str(df[c].dtype) for c in columns)
+
+
+# ---- Motor nativo ----------------------------------------------------------------------
+def null_counts(df: pd.DataFrame) -> pd.Series:
+    """Nulos por columna (solo las que tienen alguno), en una pasada vectorizada sobre df."""
+    counts = df.isna().sum()
+    return counts[counts > 0].astype("int64")
+
+
+def duplicate_values(series: pd.Series) -> pd.Series:
+    """
+    {valor: apariciones} de los valores que aparecen más de una vez, ordenados de más a
+    menos repetido. Una sola pasada de hash. Los nulos se ignoran, como en
+    expect_column_values_to_be_unique de Great Expectations.
+    """
+    counts = series.value_counts(dropna=True, sort=False)
+    return counts[counts > 1].sort_values(ascending=False, kind="stable")
+
+
+def duplicate_sets(df: pd.DataFrame, columns: Optional[List[str]] = None) -> Dict[str, pd.Series]:
+    """duplicate_values de cada columna de `columns` (todas por defecto) que tenga duplicados."""
+    result = {}
+    for col in (columns if columns is not None else df.columns):
+        dups = duplicate_values(df[col])
+        if len(dups):
+            result[col] = dups
+    return result
+
+
+def describe_duplicates(
+    col: str,
+    listed: Iterable[Tuple[object, int]],
+    n_values: int,
+    n_rows: int,
+    where: str = ""
+) -> str:
+    """
+    Mensaje de duplicados: totales (valores distintos duplicados y filas afectadas) y los
+    valores de `listed` ((valor, apariciones), ya limitados y ordenados). `where` añade
+    dónde está la lista completa, si se guardó.
+    """
+    listed = list(listed)
+    detalles = "; ".join(f"'{val}' aparece {int(n)} veces" for val, n in listed)
+    resumen = f"{n_values} valores duplicados en {n_rows} filas"
+    if len(listed) < n_values:
+        detalles += f"; … (se muestran los {len(listed)} más repetidos)"
+    return f"⚠️ La columna '{col}' tiene duplicados ({resumen}{where}): {detalles}"
+
+
+# ---- Motor Great Expectations ------------------------------------------------------------
+def ge_null_counts(df: pd.DataFrame) -> pd.Series:
+    """null_counts con una expectation expect_column_values_to_not_be_null por columna."""
+    ge_df = load_ge().from_pandas(df)
+    counts = {}
+    for col in ge_df.columns:
+        resultado = ge_df.expect_column_values_to_not_be_null(column=col)
+        if not resultado.success:
+            null_count = resultado.result.get("unexpected_count", None)
+            counts[col] = int(df[col].isna().sum()) if null_count is None else int(null_count)
+    return pd.Series(counts, dtype="int64")
+
+
+def ge_duplicate_values(df: pd.DataFrame, col: str) -> pd.Series:
+    """duplicate_values de `col` con expect_column_values_to_be_unique."""
+    ge_df = load_ge().from_pandas(df)
+    resultado = ge_df.expect_column_values_to_be_unique(column=col)
+    if resultado.success:
+        return pd.Series(dtype="int64")
+    unexpected = resultado.result.get("unexpected_list", []) or []
+    dups = duplicate_values(df[col])
+    if unexpected:
+        dups = dups[dups.index.isin(pd.unique(pd.Series(unexpected, dtype=object)))]
+    return dups
+
+
+# ---- Motor SQL (DuckDB) ------------------------------------------------------------------
+def quote_ident(name: str) -> str:
+    """Identificador SQL entre comillas dobles."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+@contextmanager
+def sql_source(source, con=None):
+    """
+    (con, expresión FROM) para `source`:
+      - str acabado en .parquet (admite comodines) → read_parquet('...');
+      - otro str → nombre de tabla/vista/relación de `con` (obligatorio);
+      - DataFrame → se registra en `con` sin copiarlo y se elimina al salir.
+    Sin `con` (Parquet o DataFrame) se abre una conexión en memoria que se cierra al salir.
+    """
+    if isinstance(source, str) and not source.lower().endswith(".parquet") and con is None:
+        raise ValueError(f"la relación '{source}' necesita la conexión DuckDB (con)")
+    own = con is None
+    con = duckdb.connect() if own else con
+    registered = None
+    try:
+        if isinstance(source, pd.DataFrame):
+            registered = "__quality_src"
+            con.register(registered, source)
+            yield con, registered
+        elif source.lower().endswith(".parquet"):
+            yield con, "read_parquet('" + source.replace("'", "''") + "')"
+        else:
+            yield con, source
+    finally:
+        if registered and not own:
+            con.unregister(registered)
+        if own:
+            con.close()
+
+
+def sql_columns(con, src: str) -> Dict[str, str]:
+    """{columna: tipo DuckDB} de `src`."""
+    return {row[0]: row[1] for row in con.execute(f"DESCRIBE SELECT * FROM {src}").fetchall()}
+
+
+def sql_null_counts(con, src: str) -> pd.Series:
+    """null_counts con un único agregado COUNT(*) - COUNT(col) para todas las columnas."""
+    cols = list(sql_columns(con, src))
+    exprs = ", ".join(f"COUNT(*) - COUNT({quote_ident(c)})" for c in cols)
+    row = con.execute(f"SELECT {exprs} FROM {src}").fetchone()
+    counts = pd.Series(dict(zip(cols, row)), dtype="int64")
+    return counts[counts > 0]
+
+
+def sql_duplicates(
+    con, src: str, col: str, max_listed: int = DEFAULT_MAX_LISTED
+) -> Tuple[int, int, List[Tuple[object, int]]]:
+    """
+    (valores duplicados, filas afectadas, los `max_listed` más repetidos) de `col` con un
+    GROUP BY; totales y lista en una sola consulta, sin traer todos los duplicados. Los
+    nulos se ignoran (como duplicate_values).
+    """
+    q = quote_ident(col)
+    rows = con.execute(f"""
+        WITH dups AS (
+            SELECT {q} AS value, COUNT(*) AS n FROM {src} WHERE {q} IS NOT NULL
+            GROUP BY {q} HAVING COUNT(*) > 1
+        )
+        SELECT value, n, COUNT(*) OVER (), SUM(n) OVER () FROM dups
+        ORDER BY n DESC LIMIT {max(int(max_listed), 1)}
+    """).fetchall()
+    if not rows:
+        return 0, 0, []
+    return int(rows[0][2]), int(rows[0][3]), [(v, int(n)) for v, n, _, _ in rows[:max(int(max_listed), 0)]]
+
+
+# Tipo esperado de check_datatypes → (prefijos de tipos DuckDB aceptados, tipo de TRY_CAST)
+SQL_TYPES = {
+    "str": (("VARCHAR", "ENUM"), "VARCHAR"),
+    "int": (("TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT", "UTINYINT", "USMALLINT",
+             "UINTEGER", "UBIGINT", "UHUGEINT"), "BIGINT"),
+    "float": (("FLOAT", "DOUBLE", "DECIMAL", "REAL"), "DOUBLE"),
+    "bool": (("BOOLEAN",), "BOOLEAN"),
+    "datetime": (("TIMESTAMP", "DATE"), "TIMESTAMP"),
+}
+SQL_TYPE_ALIASES = {"string": "str", "integer": "int", "number": "float", "boolean": "bool"}
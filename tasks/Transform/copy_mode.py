@@ -0,0 +1,27 @@
+# tasks/Transform/copy_mode.py
+
+import pandas as pd
+
+
+def set_copy_on_write(enabled: bool) -> bool:
+    """
+    Activa o desactiva el copy-on-write de pandas para todo el proceso (todas las tareas
+    de los flows comparten el intérprete). Devuelve el valor anterior.
+    """
+    previous = copy_on_write_enabled()
+    pd.set_option("mode.copy_on_write", bool(enabled))
+    return previous
+
+
+def copy_on_write_enabled() -> bool:
+    return pd.get_option("mode.copy_on_write") is True
+
+
+def working_copy(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Copia de trabajo de `df` para una tarea que va a modificarlo sin alterar la entrada.
+    Con copy-on-write es una copia superficial: los datos se comparten y pandas solo
+    duplica una columna cuando alguien la modifica, así que reasignar o añadir columnas no
+    copia la tabla. Sin copy-on-write se hace la copia completa de siempre.
+    """
+    return df.copy(deep=not copy_on_write_enabled())
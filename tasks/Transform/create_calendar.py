@@ -1,57 +1,61 @@
 # tasks/Transform/create_calendar.py
 
 from datetime import datetime, timedelta
-from typing import Tuple
+from typing import Tuple, Optional
 import pandas as pd
-from pathlib import Path
 from prefect import task
 
-# Mapas para nombres en español
-_DAY_NAME_ES = {
-    0: "Lunes",
-    1: "Martes",
-    2: "Miércoles",
-    3: "Jueves",
-    4: "Viernes",
-    5: "Sábado",
-    6: "Domingo"
-}
-
-_MONTH_NAME_ES = {
-    1: "Enero",
-    2: "Febrero",
-    3: "Marzo",
-    4: "Abril",
-    5: "Mayo",
-    6: "Junio",
-    7: "Julio",
-    8: "Agosto",
-    9: "Septiembre",
-    10: "Octubre",
-    11: "Noviembre",
-    12: "Diciembre"
-}
-
-@task
+# Nombres en español (índice 0 = Lunes / Enero), usados como categorías ordenadas
+_DAY_NAMES_ES = ["Lunes", "Martes", "Miércoles", "Jueves", "Viernes", "Sábado", "Domingo"]
+
+_MONTH_NAMES_ES = [
+    "Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
+    "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"
+]
+
+
+def _last_day(con, table_name: str):
+    """Máximo `Day` ya cargado en `table_name`, o None si la tabla no existe o está vacía."""
+    exists = con.execute(
+        "SELECT table_name FROM information_schema.tables WHERE table_name = ?",
+        (table_name,)
+    ).fetchall()
+    if not exists:
+        return None
+    last = con.execute(f"SELECT MAX(Day) FROM {table_name}").fetchone()[0]
+    return pd.Timestamp(last).date() if last is not None else None
+
+
+@task(cache_key_fn=lambda *args, **kwargs: None)
 def create_calendar(
     fi: str,
-    ff: str
+    ff: str,
+    con=None,
+    table_name: Optional[str] = None
 ) -> Tuple[int, str, pd.DataFrame]:
     """
     Genera un calendario entre fechas fi y ff (ambas inclusive). Las fechas
     de entrada deben estar en formato "DD-MM-YYYY".
-    
+
+    El calendario se construye de forma vectorizada (pd.date_range) y los nombres de día y
+    mes son categóricos ordenados, así que varias décadas se generan en milisegundos.
+
+    Modo incremental: si se pasan `con` y `table_name`, solo se generan los días posteriores
+    al máximo `Day` ya cargado en esa tabla. Si la tabla ya cubre hasta ff, se devuelve un
+    DataFrame vacío con code 0.
+
     Devuelve:
       - code = 1 si el formato de fi/ff es incorrecto
+      - code = 2 si no se pudo consultar la tabla existente (modo incremental)
       - code = 9 si ocurre cualquier otro error al crear el DataFrame
       - code = 0 si todo sale bien
-    
+
     El DataFrame resultante ('calendar') tendrá columnas:
-      - Day (datetime.date)
+      - Day (datetime64)
       - Week_day (1=Lunes … 7=Domingo)
-      - Week_day_name (en español)
+      - Week_day_name (en español, categórico)
       - Month (1–12)
-      - Month_name (en español)
+      - Month_name (en español, categórico)
       - Year
     """
     try:
@@ -65,31 +69,42 @@ def create_calendar(
         if dt_ff < dt_fi:
             return 1, "❌ Fecha final (ff) anterior a fecha inicial (fi).", pd.DataFrame()
 
-        # Generar lista de fechas entre fi y ff inclusive
-        total_days = (dt_ff - dt_fi).days + 1
-        lista_fechas = [dt_fi + timedelta(days=i) for i in range(total_days)]
-
-        # Construir DataFrame
-        records = []
-        for d in lista_fechas:
-            weekday_index = d.weekday()        # 0=Lunes … 6=Domingo
-            records.append({
-                "Day": d,
-                "Week_day": weekday_index + 1,  # Queremos 1–7
-                "Week_day_name": _DAY_NAME_ES[weekday_index],
-                "Month": d.month,
-                "Month_name": _MONTH_NAME_ES[d.month],
-                "Year": d.year
-            })
+        # Modo incremental: empezar el día siguiente al último ya cargado
+        modo = "completo"
+        if con is not None and table_name:
+            try:
+                last = _last_day(con, table_name)
+            except Exception as e:
+                return 2, f"❌ Error consultando el último día de '{table_name}': {e}", pd.DataFrame()
+            if last is not None:
+                modo = f"incremental desde {last + timedelta(days=1):%d-%m-%Y}"
+                dt_fi = max(dt_fi, last + timedelta(days=1))
+                if dt_fi > dt_ff:
+                    return 0, (
+                        f"✅ Calendario al día: '{table_name}' ya contiene hasta {last:%d-%m-%Y}; "
+                        f"no hay días nuevos."
+                    ), pd.DataFrame()
 
         try:
-            calendar = pd.DataFrame(records)
-            calendar["Day"] = pd.to_datetime(calendar["Day"])
+            days = pd.date_range(dt_fi, dt_ff, freq="D")
+            weekday = days.dayofweek            # 0=Lunes … 6=Domingo
+            calendar = pd.DataFrame({
+                "Day": days,
+                "Week_day": (weekday + 1).astype("int64"),  # Queremos 1–7
+                "Week_day_name": pd.Categorical.from_codes(
+                    weekday, categories=_DAY_NAMES_ES, ordered=True
+                ),
+                "Month": days.month.astype("int64"),
+                "Month_name": pd.Categorical.from_codes(
+                    days.month - 1, categories=_MONTH_NAMES_ES, ordered=True
+                ),
+                "Year": days.year.astype("int64"),
+            })
         except Exception as e:
             return 9, f"❌ Error al convertir a DataFrame: {e}", pd.DataFrame()
 
-        # Orden natural ya viene ordenada porque lista_fechas es creciente
-        msg = f"✅ Calendario creado correctamente: {len(calendar)} filas."
+        # Orden natural ya viene ordenada porque date_range es creciente
+        msg = f"✅ Calendario creado correctamente ({modo}): {len(calendar)} filas."
         return 0, msg, calendar
 
     except Exception as e:
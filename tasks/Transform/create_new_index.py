@@ -1,26 +1,54 @@
 # tasks/Transform/create_new_index.py
 
 import pandas as pd
-from typing import Tuple, Any
+from typing import Tuple, Any, Dict, Optional
 from prefect import task
 
+from tasks.Transform.occurrence_index import (
+    factorize_keys, invalid_keys, occurrence_numbers, suffix_keys, surrogate_keys
+)
+from tasks.Transform.copy_mode import working_copy
+
+KEY_MODES = ("str", "int")
+DEFAULT_STRIDE = 1_000_000
+
 @task
 def create_new_index(
     df: pd.DataFrame,
     col: str,
-    name: str = "Index"
+    name: str = "Index",
+    counters: Optional[Dict[str, int]] = None,
+    key_mode: str = "str",
+    stride: int = DEFAULT_STRIDE
 ) -> Tuple[int, str, Any ]:
     """
     Crea una nueva columna 'name' basada en la columna `col` de df, garantizando unicidad.
     - Si df es None o está vacío → code=1.
     - Si col no existe en el DataFrame → code=2.
     - Si col existe pero contiene valores con caracteres no permitidos (ni todos dígitos ni texto con guiones/dígitos) → code=3.
+    - Si key_mode no es válido, o en modo "int" la clave no cabe (ocurrencias ≥ stride o
+      desbordamiento de BIGINT) o dos valores distintos dan la misma clave ('1-23' y '12-3')
+      → code=4.
     - Cualquier otra excepción inesperada → code=9.
     - Si todo OK → code=0, se devuelve df_modificado y mensaje de éxito.
 
     Ejemplo de índice para duplicados:
       123, 123, 124, 123 → '1230', '1231', '1240', '1232'
+
+    Si se pasa `counters` ({valor: ocurrencias ya vistas}), la numeración continúa a partir
+    de esos contadores y el dict se actualiza. Permite procesar un archivo por bloques
+    (modo streaming) sin repetir índices entre bloques.
+
+    La validación y la numeración son vectorizadas (kernel occurrence_index); la columna
+    nueva es de tipo "string[pyarrow]".
+
+    Con key_mode="int" la clave es un entero (BIGINT en la carga) en lugar de texto:
+      valor × stride + ocurrencia → 123, 123, 124, 123 con stride 1000 → 123000, 123001, 124000, 123002
+    Es determinista (mismo archivo → mismas claves), ocupa menos y ordena numéricamente.
+    Cambiar de modo en una tabla ya cargada exige recrearla (cambia el tipo de la PK).
     """
+    if key_mode not in KEY_MODES:
+        return 4, f"❌ Error en create_new_index: key_mode inválido '{key_mode}'. Opciones: {KEY_MODES}.", df
     try:
         # 1) Validar que df existe y no esté vacío
         if df is None or not isinstance(df, pd.DataFrame) or df.empty:
@@ -30,29 +58,29 @@ def create_new_index(
         if col not in df.columns:
             return 2, f"❌ Error en create_new_index: Columna '{col}' no existe en el DataFrame.", df
 
-        # 3) Comprobar que cada valor de la columna sea aceptable:
+        # 3) Comprobar que cada valor de la columna sea aceptable (vectorizado):
         #    – Si todos los caracteres son dígitos, está OK.
         #    – Si contiene guiones y el resto dígitos, lo consideramos texto válido.
         #    – En cualquier otro caso (letras sueltas, símbolos, etc.) → error.
-        for v in df[col].astype(str):
-            if v.isdigit():
-                continue
-            stripped = v.replace("-", "")
-            if stripped.isdigit():
-                continue
-            # cualquier otro caso no permitido
+        #    Se valida cada valor distinto una sola vez.
+        codes, ukeys = factorize_keys(df[col])
+        bad = invalid_keys(ukeys)
+        if bad.any():
+            # primer valor inválido en orden de filas (los códigos siguen el orden de aparición)
+            v = ukeys[bad.argmax()]
             return 3, f"❌ Error en create_new_index: Valor inválido en '{col}': '{v}'.", df
 
         # 4) Construir el nuevo índice con sufijo incremental para duplicados
-        df_mod = df.copy()
-        counters: dict[str, int] = {}
-
-        def make_index(val_str: str) -> str:
-            cnt = counters.get(val_str, 0)
-            counters[val_str] = cnt + 1
-            return f"{val_str}{cnt}"
-
-        df_mod[name] = df_mod[col].astype(str).apply(make_index)
+        occ = occurrence_numbers(codes, ukeys, counters)
+        if key_mode == "int":
+            try:
+                new_keys = pd.Series(surrogate_keys(codes, ukeys, occ, stride), index=df.index)
+            except (OverflowError, ValueError) as e:
+                return 4, f"❌ Error en create_new_index: clave entera para '{col}' no válida: {e}", df
+        else:
+            new_keys = suffix_keys(codes, ukeys, occ).set_axis(df.index)
+        df_mod = working_copy(df)
+        df_mod[name] = new_keys
 
         # 5) Reordenar columnas para que 'name' quede al principio
         cols = df_mod.columns.tolist()
@@ -0,0 +1,99 @@
+# tasks/Transform/create_new_index_duckdb.py
+
+from typing import Tuple
+from prefect import task
+
+from tasks.Transform.create_new_index import KEY_MODES, DEFAULT_STRIDE
+from tasks.Transform.occurrence_index import MAX_BIGINT
+
+@task(cache_key_fn=lambda *args, **kwargs: None)
+def create_new_index_duckdb(
+    con,
+    src: str,
+    col: str,
+    name: str = "Index",
+    key_mode: str = "str",
+    stride: int = DEFAULT_STRIDE
+) -> Tuple[int, str, str]:
+    """
+    Equivalente SQL de create_new_index sobre la tabla temporal `src` (modo DuckDB).
+    Crea la vista '<src>_idx' con la nueva columna `name` al principio: valor de `col`
+    seguido del número de ocurrencia (0, 1, 2...) en orden de lectura del archivo.
+
+    Ejemplo de índice para duplicados:
+      123, 123, 124, 123 → '1230', '1231', '1240', '1232'
+
+    Con key_mode="int" la clave es BIGINT: valor (solo dígitos) × stride + ocurrencia,
+    igual que create_new_index.
+
+    `src` debe ser una tabla (no una vista): el orden de ocurrencia se toma de su rowid.
+    Devuelve (code, message, nombre_de_la_vista). Mismos códigos que create_new_index:
+      - 2 → Columna no existe.
+      - 3 → Valores con caracteres no permitidos (solo dígitos y guiones).
+      - 4 → key_mode inválido o clave entera que no cabe (ocurrencias ≥ stride o BIGINT) o
+            que colisiona (valores distintos con los mismos dígitos).
+      - 9 → Otro error inesperado.
+      - 0 → Éxito.
+    """
+    out = f"{src}_idx"
+    if key_mode not in KEY_MODES:
+        return 4, f"❌ Error en create_new_index: key_mode inválido '{key_mode}'. Opciones: {KEY_MODES}.", src
+    if key_mode == "int" and (not isinstance(stride, int) or stride <= 0):
+        return 4, f"❌ Error en create_new_index: stride inválido: {stride!r}; debe ser un entero mayor que 0.", src
+    try:
+        cols = [row[0] for row in con.execute(f"DESCRIBE {src}").fetchall()]
+        if col not in cols:
+            return 2, f"❌ Error en create_new_index: Columna '{col}' no existe en '{src}'.", src
+
+        # Validación vectorizada: solo dígitos, o dígitos con guiones
+        invalid = con.execute(f"""
+            SELECT CAST("{col}" AS VARCHAR) FROM {src}
+            WHERE "{col}" IS NULL
+               OR NOT regexp_full_match(CAST("{col}" AS VARCHAR), '[0-9-]*[0-9][0-9-]*')
+            LIMIT 1
+        """).fetchone()
+        if invalid is not None:
+            return 3, f"❌ Error en create_new_index: Valor inválido en '{col}': '{invalid[0]}'.", src
+
+        occurrence = f'row_number() OVER (PARTITION BY "{col}" ORDER BY rowid) - 1'
+        if key_mode == "int":
+            digits = f"""CAST(replace(CAST("{col}" AS VARCHAR), '-', '') AS HUGEINT)"""
+            # Valores distintos con los mismos dígitos ('1-23' y '12-3') darían la misma clave
+            clash = con.execute(f"""
+                SELECT string_agg(DISTINCT CAST("{col}" AS VARCHAR), ' y ')
+                FROM {src} GROUP BY {digits}
+                HAVING count(DISTINCT "{col}") > 1
+                LIMIT 1
+            """).fetchone()
+            if clash is not None:
+                return 4, (
+                    f"❌ Error en create_new_index: clave entera para '{col}' no válida: valores distintos "
+                    f"con los mismos dígitos ({clash[0]}); sus claves colisionarían."
+                ), src
+            max_base, max_count = con.execute(f"""
+                SELECT max({digits}), (SELECT max(n) FROM (SELECT count(*) AS n FROM {src} GROUP BY "{col}"))
+                FROM {src}
+            """).fetchone()
+            if max_count and max_count > stride:
+                return 4, (
+                    f"❌ Error en create_new_index: clave entera para '{col}' no válida: hay valores con "
+                    f"{max_count} ocurrencias y el stride es {stride}; aumente el stride."
+                ), src
+            if max_base is not None and max_base * stride + stride - 1 > MAX_BIGINT:
+                return 4, (
+                    f"❌ Error en create_new_index: clave entera para '{col}' no válida: "
+                    f"no cabe en BIGINT; reduzca el stride."
+                ), src
+            key_expr = f"CAST({digits} * {stride} + {occurrence} AS BIGINT)"
+        else:
+            key_expr = f'CAST("{col}" AS VARCHAR) || CAST({occurrence} AS VARCHAR)'
+
+        con.execute(f"""
+            CREATE OR REPLACE TEMP VIEW {out} AS
+            SELECT {key_expr} AS "{name}", *
+            FROM {src}
+        """)
+        return 0, f"✅ Nuevo índice '{name}' creado con éxito basándose en columna '{col}' (DuckDB).", out
+
+    except Exception as e:
+        return 9, f"❌ Error inesperado en create_new_index_duckdb para '{col}': {e}", src
@@ -1,35 +1,166 @@
 # tasks/Transform/group_by.py
 
+import re
+import duckdb
 import pandas as pd
-from typing import Tuple, Dict
+import pyarrow as pa
+import pyarrow.compute as pc
+from typing import Tuple, Dict, List, Optional, Union
 from prefect import task, get_run_logger
 
+# Agregaciones admitidas (además de P## → percentil ##, p. ej. P90 o P99.5)
+ALLOWED_AGGS = {"FIRST", "LAST", "SUM", "MAX", "MIN", "AVG", "COUNT", "COUNT_DISTINCT", "MEDIAN"}
+# Agregaciones que exigen columna numérica (los percentiles también)
+NUMERIC_AGGS = {"SUM", "MAX", "MIN", "AVG", "MEDIAN"}
+BACKENDS = ("pandas", "duckdb", "arrow")
+
+_PERCENTILE = re.compile(r"^P(\d{1,2}(?:\.\d+)?)$")
+
+
+def normalize_agg(agg) -> Optional[str]:
+    """
+    Nombre canónico de una agregación ("count distinct" → "COUNT_DISTINCT", "p90" → "P90")
+    o None si no es válida.
+    """
+    if not isinstance(agg, str):
+        return None
+    agg_u = re.sub(r"[\s_]+", "_", agg.strip().upper())
+    if agg_u in ALLOWED_AGGS:
+        return agg_u
+    match = _PERCENTILE.match(agg_u)
+    if match and 0 < float(match.group(1)) < 100:
+        return agg_u
+    return None
+
+
+def quantile_of(agg_u: str) -> Optional[float]:
+    """Cuantil (0–1) de una agregación P## o None si no es un percentil."""
+    match = _PERCENTILE.match(agg_u)
+    return float(match.group(1)) / 100 if match else None
+
+
+def duckdb_agg_expr(col: str, agg_u: str, order_col: str = "rowid") -> str:
+    """
+    Expresión SQL de DuckDB para una agregación canónica. FIRST/LAST toman el primer/último
+    valor no nulo según `order_col` (orden de lectura); P## usa quantile_cont (interpolación
+    lineal, como pandas).
+    """
+    q = quantile_of(agg_u)
+    if q is not None:
+        return f'quantile_cont("{col}", {q})'
+    if agg_u == "FIRST":
+        return f'arg_min("{col}", {order_col}) FILTER (WHERE "{col}" IS NOT NULL)'
+    if agg_u == "LAST":
+        return f'arg_max("{col}", {order_col}) FILTER (WHERE "{col}" IS NOT NULL)'
+    if agg_u == "COUNT_DISTINCT":
+        return f'COUNT(DISTINCT "{col}")'
+    return f'{agg_u}("{col}")'
+
+
+def _group_pandas(df: pd.DataFrame, keys: List[str], aggs: Dict[str, str]) -> pd.DataFrame:
+    simple = {
+        "FIRST": "first", "LAST": "last", "SUM": "sum", "MAX": "max", "MIN": "min",
+        "AVG": "mean", "COUNT": "count", "COUNT_DISTINCT": "nunique", "MEDIAN": "median",
+    }
+    grouped = df.groupby(keys, observed=True)
+    parts = {}
+    for col, agg_u in aggs.items():
+        q = quantile_of(agg_u)
+        parts[col] = grouped[col].agg(simple[agg_u]) if q is None else grouped[col].quantile(q)
+    return pd.DataFrame(parts).reset_index()
+
+
+def _group_duckdb(df: pd.DataFrame, keys: List[str], aggs: Dict[str, str]) -> pd.DataFrame:
+    keys_sql = ", ".join(f'"{k}"' for k in keys)
+    aggs_sql = ", ".join(f'{duckdb_agg_expr(col, agg_u, "__pos")} AS "{col}"' for col, agg_u in aggs.items())
+    not_null = " AND ".join(f'"{k}" IS NOT NULL' for k in keys)
+    con = duckdb.connect()
+    try:
+        con.register("src", df)
+        return con.execute(f"""
+            SELECT {keys_sql}, {aggs_sql}
+            FROM (SELECT *, row_number() OVER () AS __pos FROM src)
+            WHERE {not_null}
+            GROUP BY {keys_sql} ORDER BY {keys_sql}
+        """).df()
+    finally:
+        con.close()
+
+
+def _group_arrow(df: pd.DataFrame, keys: List[str], aggs: Dict[str, str]) -> pd.DataFrame:
+    simple = {
+        "FIRST": "first", "LAST": "last", "SUM": "sum", "MAX": "max", "MIN": "min",
+        "AVG": "mean", "COUNT": "count", "COUNT_DISTINCT": "count_distinct",
+        "MEDIAN": "approximate_median",
+    }
+    cols = list(dict.fromkeys([*keys, *aggs]))
+    table = pa.Table.from_pandas(df[cols], preserve_index=False)
+    mask = None
+    for k in keys:
+        valid = pc.is_valid(table[k])
+        mask = valid if mask is None else pc.and_(mask, valid)
+    table = table.filter(mask)
+    # Las claves categóricas llegan como dictionary, que Arrow no sabe ordenar
+    for k in keys:
+        if pa.types.is_dictionary(table[k].type):
+            table = table.set_column(table.schema.get_field_index(k), k, table[k].cast(table[k].type.value_type))
+
+    specs, names = [], {}
+    for col, agg_u in aggs.items():
+        q = quantile_of(agg_u)
+        if q is None:
+            specs.append((col, simple[agg_u]))
+            names[f"{col}_{simple[agg_u]}"] = col
+        else:
+            specs.append((col, "tdigest", pc.TDigestOptions(q=q)))
+            names[f"{col}_tdigest"] = col
+    # Sin hilos: FIRST/LAST respetan el orden de lectura
+    grouped = table.group_by(keys, use_threads=False).aggregate(specs)
+    if "tdigest" in (s[1] for s in specs):
+        for name, col in names.items():
+            if name.endswith("_tdigest"):
+                idx = grouped.schema.get_field_index(name)
+                grouped = grouped.set_column(idx, name, pc.list_element(grouped[name], 0))
+    grouped = grouped.rename_columns([names.get(c, c) for c in grouped.column_names])
+    grouped = grouped.sort_by([(k, "ascending") for k in keys])
+    return grouped.select([*keys, *aggs]).to_pandas()
+
+
 @task
 def group_by(
     df: pd.DataFrame,
-    key: str,
-    agg_map: Dict[str, str]
+    key: Union[str, List[str]],
+    agg_map: Dict[str, str],
+    backend: str = "pandas"
 ) -> Tuple[int, str, pd.DataFrame]:
     """
-    Agrupa `df` por la columna `key` y aplica para cada columna especificada
-    en `agg_map` la agregación indicada.
-    
+    Agrupa `df` por la columna `key` (o lista de columnas) y aplica para cada columna
+    especificada en `agg_map` la agregación indicada.
+
     Parámetros:
     - df: DataFrame a procesar.
-    - key: columna sobre la que agrupar (debe existir en df, y ser str).
+    - key: columna o lista de columnas sobre las que agrupar (deben existir en df).
     - agg_map: dict cuyo formato es {columna: agregación}, donde agregación es
-      uno de: "FIRST", "LAST", "SUM", "MAX", "MIN", "AVG".
-    
+      uno de: "FIRST", "LAST", "SUM", "MAX", "MIN", "AVG", "COUNT", "COUNT_DISTINCT"
+      (o "COUNT DISTINCT"), "MEDIAN" o "P##" (percentil, p. ej. "P90", "P99.5").
+    - backend: motor de agregación:
+        * "pandas" (por defecto): groupby de pandas; MEDIAN y P## exactos.
+        * "duckdb": una consulta DuckDB multihilo sobre `df` (sin copiarlo); exacto.
+        * "arrow": group_by de pyarrow.compute; MEDIAN y P## aproximados (t-digest).
+      Las claves nulas se descartan en los tres (como en pandas) y el resultado sale
+      ordenado por las claves.
+
     Códigos de retorno:
-    1 → parámetros inválidos (df no es DataFrame o está vacío, key no es str, agg_map no es dict o está vacío).
+    1 → parámetros inválidos (df no es DataFrame o está vacío, key no es str/lista de str,
+        agg_map no es dict o está vacío, backend desconocido).
     2 → columnas faltantes en df (key o alguna columna de agg_map no existe).
-    3 → agregador inválido (no está en FIRST, LAST, SUM, MAX, MIN, AVG).
+    3 → agregador inválido.
     4 → uso de agregador numérico en columna no numérica.
     9 → otro error inesperado.
     0 → éxito.
-    
+
     Retorna: (code, mensaje, df_resultado)
-    - El DataFrame resultado contendrá solo la columna `key` y las columnas de agg_map,
+    - El DataFrame resultado contendrá solo las columnas de `key` y las de agg_map,
       con los valores agregados, y los nombres de columna permanecerán sin cambiar.
     """
     logger = get_run_logger()
@@ -37,17 +168,19 @@ def group_by(
         # 1) Validación de parámetros
         if not isinstance(df, pd.DataFrame) or df is None or df.empty:
             return 1, "group_by ❌ Error: DataFrame inválido o vacío.", df
-        if not isinstance(key, str):
-            return 1, "group_by ❌ Error: 'key' debe ser string.", df
+        keys = [key] if isinstance(key, str) else list(key) if isinstance(key, (list, tuple)) else []
+        if not keys or not all(isinstance(k, str) for k in keys):
+            return 1, "group_by ❌ Error: 'key' debe ser string o lista de strings.", df
         if not isinstance(agg_map, dict):
             return 1, "group_by ❌ Error: agg_map debe ser un dict {columna: agregación}.", df
         if len(agg_map) == 0:
             return 1, "group_by ❌ Error: agg_map está vacío; se necesita al menos una columna a agregar.", df
+        backend = backend.lower() if isinstance(backend, str) else ""
+        if backend not in BACKENDS:
+            return 1, f"group_by ❌ Error: backend inválido; opciones: {BACKENDS}.", df
 
         # 2) Verificar existencia de columnas
-        missing = []
-        if key not in df.columns:
-            missing.append(key)
+        missing = [k for k in keys if k not in df.columns]
         for col in agg_map.keys():
             if not isinstance(col, str) or col not in df.columns:
                 missing.append(col)
@@ -55,61 +188,51 @@ def group_by(
             return 2, f"group_by ❌ Error: columnas no encontradas en DataFrame: {missing}.", df
 
         # 3) Validar agregaciones
-        allowed = {"FIRST", "LAST", "SUM", "MAX", "MIN", "AVG"}
         agg_map_upper: Dict[str, str] = {}
         for col, agg in agg_map.items():
             if not isinstance(agg, str):
                 return 3, f"group_by ❌ Error: agregación para columna '{col}' debe ser string.", df
-            agg_u = agg.strip().upper()
-            if agg_u not in allowed:
-                return 3, f"group_by ❌ Error: agregación inválida para columna '{col}': '{agg}'. Opciones: {allowed}.", df
+            agg_u = normalize_agg(agg)
+            if agg_u is None:
+                return 3, (
+                    f"group_by ❌ Error: agregación inválida para columna '{col}': '{agg}'. "
+                    f"Opciones: {ALLOWED_AGGS} o P## (percentil)."
+                ), df
             agg_map_upper[col] = agg_u
 
         # 4) Verificar tipos de columna vs agregación
-        numeric_aggs = {"SUM", "MAX", "MIN", "AVG"}
         for col, agg_u in agg_map_upper.items():
-            if agg_u in numeric_aggs and not pd.api.types.is_numeric_dtype(df[col]):
+            numeric = agg_u in NUMERIC_AGGS or quantile_of(agg_u) is not None
+            if numeric and not pd.api.types.is_numeric_dtype(df[col]):
                 return 4, (
                     f"group_by ❌ Error: columna '{col}' no es numérica, "
                     f"no se puede aplicar agregación '{agg_u}'."
                 ), df
 
-        # 5) Construir dict para pandas .agg
-        pandas_agg: Dict[str, str] = {}
-        for col, agg_u in agg_map_upper.items():
-            if agg_u == "FIRST":
-                pandas_agg[col] = "first"
-            elif agg_u == "LAST":
-                pandas_agg[col] = "last"
-            elif agg_u == "SUM":
-                pandas_agg[col] = "sum"
-            elif agg_u == "MAX":
-                pandas_agg[col] = "max"
-            elif agg_u == "MIN":
-                pandas_agg[col] = "min"
-            elif agg_u == "AVG":
-                pandas_agg[col] = "mean"
-
-        # 6) Ejecutar agrupación: resultará un DataFrame con índice = key y columnas de agg_map
+        # 5) Ejecutar agrupación con el motor elegido: claves + columnas de agg_map
         try:
-            df_grouped = df.groupby(key).agg(pandas_agg)
-            # Convertir índice a columna
-            df_res = df_grouped.reset_index()
+            if backend == "duckdb":
+                df_res = _group_duckdb(df, keys, agg_map_upper)
+            elif backend == "arrow":
+                df_res = _group_arrow(df, keys, agg_map_upper)
+            else:
+                df_res = _group_pandas(df, keys, agg_map_upper)
         except Exception as e:
             # Error inesperado al agrupar
             head_str = df.head(5).to_string(index=False)
             dtypes_str = df.dtypes.astype(str).to_string()
             full_msg = (
-                f"group_by ❌ Error al agrupar por '{key}': {e}\n\n"
+                f"group_by ❌ Error al agrupar por {keys} ({backend}): {e}\n\n"
                 f"DataFrame.head(5):\n{head_str}\n\n"
                 f"Estructura de columnas:\n{dtypes_str}"
             )
             logger.error(full_msg)
             return 9, full_msg, df
 
-        # 7) El DataFrame resultante solo contiene 'key' y las columnas agrupadas, con nombres originales
+        # 6) El DataFrame resultante solo contiene las claves y las columnas agrupadas, con nombres originales
         msg = (
-            f"group_by ✅ Agrupación por '{key}' exitosa. "
+            f"group_by ✅ Agrupación por {keys if len(keys) > 1 else repr(keys[0])} exitosa "
+            f"({backend}, {len(df_res)} grupos). "
             f"Columnas agregadas: " +
             ", ".join(f"{col}->{agg_map_upper[col]}" for col in agg_map_upper)
         )
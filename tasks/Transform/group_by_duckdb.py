@@ -0,0 +1,84 @@
+# tasks/Transform/group_by_duckdb.py
+
+from typing import Tuple, Dict, List, Union
+from prefect import task, get_run_logger
+
+from tasks.Transform.group_by import ALLOWED_AGGS, NUMERIC_AGGS, normalize_agg, quantile_of, duckdb_agg_expr
+
+# Tipos DuckDB sobre los que se permiten agregaciones numéricas
+_NUMERIC_TYPES = (
+    "TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT",
+    "UTINYINT", "USMALLINT", "UINTEGER", "UBIGINT",
+    "FLOAT", "DOUBLE", "DECIMAL",
+)
+
+@task(cache_key_fn=lambda *args, **kwargs: None)
+def group_by_duckdb(
+    con,
+    src: str,
+    key: Union[str, List[str]],
+    agg_map: Dict[str, str]
+) -> Tuple[int, str, str]:
+    """
+    Equivalente SQL de group_by (modo DuckDB): agrupa la tabla `src` por `key` (columna o
+    lista de columnas) y crea la vista '<src>_grp' con las claves y las columnas de
+    `agg_map` agregadas.
+    Agregaciones: las mismas que group_by ("FIRST", "LAST", "SUM", "MAX", "MIN", "AVG",
+    "COUNT", "COUNT_DISTINCT", "MEDIAN", "P##"). FIRST/LAST toman el primer/último valor
+    no nulo en orden de lectura (como pandas), por eso `src` debe ser una tabla.
+
+    Códigos de retorno (los mismos que group_by):
+    1 → parámetros inválidos (key no es str, agg_map no es dict o está vacío).
+    2 → columnas faltantes en `src`.
+    3 → agregador inválido.
+    4 → uso de agregador numérico en columna no numérica.
+    9 → otro error inesperado.
+    0 → éxito.
+    """
+    logger = get_run_logger()
+    out = f"{src}_grp"
+    keys = [key] if isinstance(key, str) else list(key) if isinstance(key, (list, tuple)) else []
+    if not keys or not all(isinstance(k, str) for k in keys):
+        return 1, "group_by ❌ Error: 'key' debe ser string o lista de strings.", src
+    if not isinstance(agg_map, dict) or len(agg_map) == 0:
+        return 1, "group_by ❌ Error: agg_map debe ser un dict no vacío {columna: agregación}.", src
+    try:
+        types = {row[0]: row[1] for row in con.execute(f"DESCRIBE {src}").fetchall()}
+        missing = [c for c in [*keys, *agg_map.keys()] if c not in types]
+        if missing:
+            return 2, f"group_by ❌ Error: columnas no encontradas en '{src}': {missing}.", src
+
+        select_aggs, aggs_u = [], {}
+        for col, agg in agg_map.items():
+            agg_u = normalize_agg(agg)
+            if agg_u is None:
+                return 3, (
+                    f"group_by ❌ Error: agregación inválida para columna '{col}': '{agg}'. "
+                    f"Opciones: {ALLOWED_AGGS} o P## (percentil)."
+                ), src
+            numeric = agg_u in NUMERIC_AGGS or quantile_of(agg_u) is not None
+            if numeric and not types[col].startswith(_NUMERIC_TYPES):
+                return 4, (
+                    f"group_by ❌ Error: columna '{col}' no es numérica, "
+                    f"no se puede aplicar agregación '{agg_u}'."
+                ), src
+            aggs_u[col] = agg_u
+            select_aggs.append(f'{duckdb_agg_expr(col, agg_u)} AS "{col}"')
+
+        keys_sql = ", ".join(f'"{k}"' for k in keys)
+        con.execute(f"""
+            CREATE OR REPLACE TEMP VIEW {out} AS
+            SELECT {keys_sql}, {", ".join(select_aggs)}
+            FROM {src} GROUP BY {keys_sql} ORDER BY {keys_sql}
+        """)
+        msg = (
+            f"group_by ✅ Agrupación por {keys if len(keys) > 1 else repr(keys[0])} exitosa (DuckDB). "
+            f"Columnas agregadas: " +
+            ", ".join(f"{col}->{agg_u}" for col, agg_u in aggs_u.items())
+        )
+        logger.info(msg)
+        return 0, msg, out
+    except Exception as e:
+        full_msg = f"group_by ❌ Error inesperado en DuckDB al agrupar por {keys}: {e}"
+        logger.error(full_msg)
+        return 9, full_msg, src
@@ -1,30 +1,113 @@
 # tasks/Transform/join_tables.py
 
+import duckdb
+import numpy as np
 import pandas as pd
-from typing import Tuple
+from typing import Tuple, List, Optional
 from prefect import task, get_run_logger
 
+# Filas totales a partir de las cuales el join se ejecuta en DuckDB
+DEFAULT_DUCKDB_MIN_ROWS = 5_000_000
+
+_HOW_MAP = {
+    "FULL": "outer",
+    "INNER": "inner",
+    "LEFT": "left"
+}
+
+
+def _overlapping_columns(dfs, key: str) -> List[str]:
+    """
+    Columnas (distintas de `key`) presentes en más de uno de los DataFrames. Se comparan sin
+    distinguir mayúsculas, como hace DuckDB con los identificadores.
+    """
+    seen, repeated = set(), []
+    for d in dfs:
+        for c in d.columns:
+            name = str(c).lower()
+            if c != key and name in seen and c not in repeated:
+                repeated.append(c)
+            seen.add(name)
+    return repeated
+
+
+def _join_duckdb(key: str, how_upper: str, dfs) -> pd.DataFrame:
+    """
+    Join de todos los DataFrames en una sola consulta DuckDB (multihilo, sin copiar las
+    entradas: se leen registradas). Devuelve lo mismo que el pd.merge encadenado:
+      - orden: el de las posiciones de cada entrada (primero, segundo...) en LEFT/INNER, y
+        la clave ordenada antes en FULL;
+      - dtypes: los de cada entrada; donde una entrada no tiene fila (LEFT/FULL), los
+        enteros pasan a float64 y los booleanos a object con NaN, como en pandas.
+    """
+    pos = [f"__p{i}" for i in range(len(dfs))]
+    con = duckdb.connect()
+    try:
+        for i, d in enumerate(dfs):
+            con.register(f"t{i}", d)
+        tables = [f"(SELECT *, row_number() OVER () AS {pos[i]} FROM t{i})" for i in range(len(dfs))]
+        joins = " ".join(f'{how_upper} JOIN {tables[i]} USING ("{key}")' for i in range(1, len(dfs)))
+        order = ", ".join(([f'"{key}"'] if how_upper == "FULL" else []) + pos)
+        cols = ", ".join(f'"{c}"' for d in dfs for c in d.columns if c != key)
+        merged = con.execute(
+            f'SELECT "{key}", {cols}, {", ".join(pos)} FROM {tables[0]} {joins} ORDER BY {order}'
+        ).df()
+    finally:
+        con.close()
+
+    # DuckDB devuelve sus propios dtypes (Int64/boolean nullable, categorías ordenadas...):
+    # se restauran los de pandas
+    for i, d in enumerate(dfs):
+        missing = merged[pos[i]].isna()
+        for c in d.columns:
+            if c == key:
+                continue
+            dtype = d[c].dtype
+            if missing.any() and isinstance(dtype, np.dtype) and dtype.kind in "iub":
+                col = merged[c].astype("float64" if dtype.kind in "iu" else object)
+            else:
+                col = merged[c].astype(dtype)
+            if missing.any() and col.dtype == object:
+                col[missing] = np.nan
+            merged[c] = col
+    merged = merged.drop(columns=pos)
+    # La clave, con el dtype del primer DataFrame
+    try:
+        merged[key] = merged[key].astype(dfs[0][key].dtype)
+    except (TypeError, ValueError):
+        pass
+    return merged
+
+
 @task
 def join_tables(
     key: str,
     how: str,
-    *dfs: pd.DataFrame
+    *dfs: pd.DataFrame,
+    duckdb_min_rows: Optional[int] = None
 ) -> Tuple[int, str, pd.DataFrame]:
     """
-    Une exactamente dos DataFrames en base a una columna común `key`.
+    Une dos o más DataFrames en base a una columna común `key` (en orden: el primero
+    con el segundo, el resultado con el tercero...).
     `how` puede ser:
       - "FULL"  → outer join
       - "INNER" → inner join
       - "LEFT"  → left join (todos de df_left y coincidencias en df_right)
-    
+
+    Los DataFrames de entrada no se copian. Si entre todos suman al menos `duckdb_min_rows`
+    filas (por defecto DEFAULT_DUCKDB_MIN_ROWS; 0 → siempre) y no comparten columnas
+    aparte de `key` (sin distinguir mayúsculas), el join se ejecuta en DuckDB en una sola
+    consulta, con el mismo orden de filas y dtypes que pd.merge; si no, con pd.merge (las
+    columnas repetidas reciben los sufijos '_x'/'_y' de pandas).
+
     Códigos de retorno:
       0 → éxito.
       1 → clave inválida (no existe o no es string).
       2 → tipo de join inválido.
-      3 → número de DataFrames diferente de 2 o alguno no es DataFrame.
-      4 → mismatch de tipos en la columna key entre ambos DataFrames.
+      3 → menos de dos DataFrames o alguno no es DataFrame.
+      4 → mismatch de tipos en la columna key entre los DataFrames.
       9 → otro error desconocido.
-    
+
     Retorna: (code, mensaje, df_merged_o_empty).
     """
     logger = get_run_logger()
@@ -35,44 +118,52 @@ def join_tables(
 
     # 2) Validar how
     how_upper = how.upper() if isinstance(how, str) else ""
-    if how_upper not in {"FULL", "INNER", "LEFT"}:
+    if how_upper not in _HOW_MAP:
         return 2, "join_tables ❌ Error: 'how' debe ser 'FULL', 'INNER' o 'LEFT'.", pd.DataFrame()
 
-    # 3) Validar que haya exactamente dos DataFrames
-    if len(dfs) != 2:
-        return 3, "join_tables ❌ Error: se requieren exactamente dos DataFrames para hacer join.", pd.DataFrame()
-    df_left, df_right = dfs
-    if not isinstance(df_left, pd.DataFrame):
-        return 3, "join_tables ❌ Error: el tercer parámetro (df_left) no es un DataFrame.", pd.DataFrame()
-    if not isinstance(df_right, pd.DataFrame):
-        return 3, "join_tables ❌ Error: el cuarto parámetro (df_right) no es un DataFrame.", pd.DataFrame()
+    # 3) Validar que haya al menos dos DataFrames
+    if len(dfs) < 2:
+        return 3, "join_tables ❌ Error: se requieren al menos dos DataFrames para hacer join.", pd.DataFrame()
+    for i, d in enumerate(dfs):
+        if not isinstance(d, pd.DataFrame):
+            return 3, f"join_tables ❌ Error: el DataFrame nº {i + 1} no es un DataFrame.", pd.DataFrame()
 
     try:
-        # 4) Verificar que la clave existe en ambos df y chequear tipos
-        if key not in df_left.columns:
-            return 1, f"join_tables ❌ Error: la clave '{key}' no existe en el DataFrame izquierdo.", pd.DataFrame()
-        if key not in df_right.columns:
-            return 1, f"join_tables ❌ Error: la clave '{key}' no existe en el DataFrame derecho.", pd.DataFrame()
-
-        dtype_left = df_left[key].dtype
-        dtype_right = df_right[key].dtype
-        if dtype_left != dtype_right:
-            return 4, (
-                f"join_tables ❌ Error: mismatch de tipos en la columna '{key}': "
-                f"[izquierdo: {dtype_left}, derecho: {dtype_right}]"
-            ), pd.DataFrame()
-
-        # 5) Mapear how a pandas
-        how_map = {
-            "FULL": "outer",
-            "INNER": "inner",
-            "LEFT": "left"
-        }
-        pandas_how = how_map[how_upper]
-
-        # 6) Realizar el merge
-        df_merged = pd.merge(df_left.copy(), df_right.copy(), on=key, how=pandas_how)
-        msg = f"join_tables ✅ Tablas unidas correctamente usando '{how_upper}' join sobre clave '{key}'."
+        # 4) Verificar que la clave existe en todos los df y chequear tipos
+        for i, d in enumerate(dfs):
+            if key not in d.columns:
+                lado = "izquierdo" if i == 0 else "derecho" if len(dfs) == 2 else f"nº {i + 1}"
+                return 1, f"join_tables ❌ Error: la clave '{key}' no existe en el DataFrame {lado}.", pd.DataFrame()
+
+        dtype_left = dfs[0][key].dtype
+        for i, d in enumerate(dfs[1:], start=1):
+            if d[key].dtype != dtype_left:
+                lado = "derecho" if len(dfs) == 2 else f"nº {i + 1}"
+                return 4, (
+                    f"join_tables ❌ Error: mismatch de tipos en la columna '{key}': "
+                    f"[izquierdo: {dtype_left}, {lado}: {d[key].dtype}]"
+                ), pd.DataFrame()
+
+        # 5) Elegir motor: DuckDB para entradas grandes sin columnas repetidas
+        min_rows = DEFAULT_DUCKDB_MIN_ROWS if duckdb_min_rows is None else duckdb_min_rows
+        total_rows = sum(len(d) for d in dfs)
+        overlap = _overlapping_columns(dfs, key)
+        if total_rows >= min_rows and not overlap:
+            motor = "DuckDB"
+            df_merged = _join_duckdb(key, how_upper, dfs)
+        else:
+            # 6) pd.merge encadenado, sin copias defensivas (merge no modifica sus entradas)
+            motor = "pandas"
+            df_merged = dfs[0]
+            for d in dfs[1:]:
+                df_merged = pd.merge(df_merged, d, on=key, how=_HOW_MAP[how_upper])
+            if total_rows >= min_rows:
+                logger.info(f"join_tables ℹ️ Columnas repetidas {overlap}: se usa pd.merge en lugar de DuckDB.")
+
+        msg = (
+            f"join_tables ✅ {len(dfs)} tablas unidas correctamente usando '{how_upper}' join "
+            f"sobre clave '{key}' ({motor}, {len(df_merged)} filas)."
+        )
         return 0, msg, df_merged
 
     except Exception as e:
@@ -0,0 +1,73 @@
+# tasks/Transform/join_tables_duckdb.py
+
+from typing import Tuple
+from prefect import task, get_run_logger
+
+@task(cache_key_fn=lambda *args, **kwargs: None)
+def join_tables_duckdb(
+    con,
+    key: str,
+    how: str,
+    left: str,
+    right: str
+) -> Tuple[int, str, str]:
+    """
+    Equivalente SQL de join_tables (modo DuckDB): une las relaciones `left` y `right`
+    por la columna común `key` y crea la vista '<left>_join'.
+    `how` puede ser "FULL", "INNER" o "LEFT". Las columnas repetidas (distintas de `key`)
+    reciben los sufijos '_x'/'_y', como en pd.merge.
+
+    Códigos de retorno (los mismos que join_tables):
+      0 → éxito.
+      1 → clave inválida (no existe o no es string).
+      2 → tipo de join inválido.
+      4 → mismatch de tipos en la columna key entre ambas relaciones.
+      9 → otro error desconocido.
+    """
+    logger = get_run_logger()
+    out = f"{left}_join"
+
+    if not isinstance(key, str) or not key.strip():
+        return 1, "join_tables ❌ Error: la clave debe ser un string no vacío.", left
+    how_upper = how.upper() if isinstance(how, str) else ""
+    if how_upper not in {"FULL", "INNER", "LEFT"}:
+        return 2, "join_tables ❌ Error: 'how' debe ser 'FULL', 'INNER' o 'LEFT'.", left
+
+    try:
+        types_l = {row[0]: row[1] for row in con.execute(f"DESCRIBE {left}").fetchall()}
+        types_r = {row[0]: row[1] for row in con.execute(f"DESCRIBE {right}").fetchall()}
+        if key not in types_l:
+            return 1, f"join_tables ❌ Error: la clave '{key}' no existe en la relación izquierda.", left
+        if key not in types_r:
+            return 1, f"join_tables ❌ Error: la clave '{key}' no existe en la relación derecha.", left
+        if types_l[key] != types_r[key]:
+            return 4, (
+                f"join_tables ❌ Error: mismatch de tipos en la columna '{key}': "
+                f"[izquierdo: {types_l[key]}, derecho: {types_r[key]}]"
+            ), left
+
+        # Columnas en el orden de pd.merge: las de `left` (clave unificada en su sitio)
+        # y después las de `right`, con sufijos si se repiten
+        common = set(types_l) & set(types_r) - {key}
+        key_expr = f'l."{key}"' if how_upper != "FULL" else f'coalesce(l."{key}", r."{key}")'
+        select_list = [
+            f'{key_expr} AS "{key}"' if c == key
+            else f'l."{c}" AS "{c}_x"' if c in common
+            else f'l."{c}"'
+            for c in types_l
+        ]
+        select_list += [
+            f'r."{c}" AS "{c}_y"' if c in common else f'r."{c}"'
+            for c in types_r if c != key
+        ]
+        con.execute(f"""
+            CREATE OR REPLACE TEMP VIEW {out} AS
+            SELECT {", ".join(select_list)}
+            FROM {left} l {how_upper} JOIN {right} r ON l."{key}" = r."{key}"
+        """)
+        msg = f"join_tables ✅ Tablas unidas correctamente usando '{how_upper}' join sobre clave '{key}' (DuckDB)."
+        return 0, msg, out
+
+    except Exception as e:
+        logger.error(f"join_tables ❌ Error inesperado en DuckDB: {e}")
+        return 9, f"join_tables ❌ Error inesperado en DuckDB: {e}", left
@@ -0,0 +1,257 @@
+# tasks/Transform/lazy_pipeline.py
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import pandas as pd
+from prefect import task, get_run_logger
+
+from tasks.Extract.extract_csv import extract_csv, resolve_source_files, _PANDAS_DTYPES
+from tasks.Extract.compressed_source import open_source
+from tasks.Transform.copy_mode import set_copy_on_write
+from tasks.Transform.create_new_index import create_new_index, DEFAULT_STRIDE
+from tasks.Transform.transform_date import transform_date
+from tasks.Transform.sort_dates import sort_dates
+from tasks.Transform.rename_col import rename_col
+
+# Tipo del schema de extract_csv que no fuerza nada (columna leída con inferencia)
+_AUTO = "auto"
+
+
+@dataclass
+class _Step:
+    op: str                      # "rename", "select", "cast", "transform" o "check"
+    fn: Optional[Callable] = None
+    args: tuple = ()
+    kwargs: dict = field(default_factory=dict)
+    reads: Optional[Set[str]] = None    # columnas que lee (None → desconocidas)
+    writes: Set[str] = field(default_factory=set)
+
+    def label(self) -> str:
+        if self.op in ("rename", "select", "cast"):
+            return f"{self.op}({self.args[0]})"
+        return f"{getattr(self.fn, 'name', getattr(self.fn, '__name__', 'step'))}{self.args}"
+
+
+class LazyPipeline:
+    """
+    Plan lógico perezoso sobre las tareas existentes: cada método registra un paso (con los
+    mismos parámetros que la tarea) y nada se ejecuta hasta execute_pipeline(plan).
+
+    Al ejecutar, el plan se optimiza:
+      - los rename consecutivos se componen en uno (si el segundo no usa nombres que el
+        primero ya quitó);
+      - cast() y select() sobre columnas de origen se empujan a la extracción (schema de
+        extract_csv): solo se leen las columnas necesarias y ya con su tipo;
+      - un sort_dates seguido de otro sort_dates sobre la misma columna se descarta (manda el último);
+      - los pasos restantes se ejecutan seguidos en una sola tarea con copy-on-write, de
+        modo que los DataFrames intermedios comparten columnas en lugar de copiar la tabla.
+    Cada paso conserva sus validaciones y códigos de retorno: el primero que falla detiene
+    el plan y su (code, msg) es el resultado.
+
+    Ejemplo:
+        plan = (LazyPipeline("SalesDay.csv", ";")
+                .check(check_nulls)
+                .create_new_index("Sales_DAY", "sales_ID")
+                .transform_date("Sales_DAY", "YYYYMMDD")
+                .sort_dates("Sales_DAY", "ASC"))
+        code, msg, df = execute_pipeline(plan)
+    """
+
+    def __init__(self, ruta: str, delimitador: str = ";", **extract_options):
+        self.ruta = ruta
+        self.delimitador = delimitador
+        self.extract_options = extract_options   # schema, max_workers, cache_dir, cache_max_mb
+        self.steps: List[_Step] = []
+
+    # ---- Pasos -----------------------------------------------------------------------
+    def rename(self, names_map: Dict[str, str]) -> "LazyPipeline":
+        self.steps.append(_Step("rename", rename_col, (dict(names_map),), reads=set(names_map)))
+        return self
+
+    def select(self, columns: List[str]) -> "LazyPipeline":
+        self.steps.append(_Step("select", None, (list(columns),), reads=set(columns)))
+        return self
+
+    def cast(self, types: Dict[str, str]) -> "LazyPipeline":
+        """Tipos {columna: tipo} con los nombres de tipo del schema de extract_csv ("int", "str"...)."""
+        self.steps.append(_Step("cast", None, (dict(types),), reads=set(types)))
+        return self
+
+    def create_new_index(
+        self, col: str, name: str, counters: Optional[Dict[str, int]] = None,
+        key_mode: str = "str", stride: int = DEFAULT_STRIDE
+    ) -> "LazyPipeline":
+        self.steps.append(_Step(
+            "transform", create_new_index, (col, name, counters, key_mode, stride), reads={col}, writes={name}
+        ))
+        return self
+
+    def transform_date(self, col: str, date_format: str = "YYYYMMDD") -> "LazyPipeline":
+        self.steps.append(_Step("transform", transform_date, (col, date_format), reads={col}, writes={col}))
+        return self
+
+    def sort_dates(self, col: str, order: str = "ASC", memory_budget_mb: Optional[float] = None) -> "LazyPipeline":
+        self.steps.append(_Step("transform", sort_dates, (col, order, memory_budget_mb), reads={col}))
+        return self
+
+    def step(self, fn: Callable, *args, **kwargs) -> "LazyPipeline":
+        """Cualquier tarea (df, *args, **kwargs) → (code, msg, df); sus columnas son desconocidas."""
+        self.steps.append(_Step("transform", fn, args, kwargs))
+        return self
+
+    def check(self, fn: Callable, *args, **kwargs) -> "LazyPipeline":
+        """Comprobación de calidad (df, *args, **kwargs) → (code, msg), en su posición del plan."""
+        self.steps.append(_Step("check", fn, args, kwargs))
+        return self
+
+    # ---- Optimización ----------------------------------------------------------------
+    def optimize(self) -> Tuple[Dict[str, str], bool, List[_Step]]:
+        """
+        (schema para extract_csv con lo empujado a la extracción, si ese schema es una
+        proyección —solo esas columnas— o solo fija tipos, pasos que quedan).
+        """
+        schema: Dict[str, str] = dict(self.extract_options.get("schema") or {})
+        steps: List[_Step] = []
+        to_source: Dict[str, str] = {}    # nombre actual → nombre en el archivo
+        derived: Set[str] = set()          # columnas creadas por pasos anteriores
+        gone: Set[str] = set()             # nombres que un rename anterior quitó
+        unknown = False                    # algún paso anterior lee columnas desconocidas
+        needed: Set[str] = set()           # columnas de origen leídas por los pasos
+        projected = bool(schema)           # un schema explícito ya limita las columnas
+
+        def source(col: str) -> Optional[str]:
+            return None if col in derived or col in gone else to_source.get(col, col)
+
+        for st in self.steps:
+            if st.op == "rename":
+                prev = steps[-1].args[0] if steps and steps[-1].op == "rename" else None
+                # rename ∘ rename → un único rename, solo si el segundo no usa nombres que el
+                # primero ya quitó (en ejecución inmediata fallaría con code 2)
+                if prev is not None and all(k in prev.values() or k not in prev for k in st.args[0]):
+                    steps.pop()
+                    combined = {k: st.args[0].get(v, v) for k, v in prev.items()}
+                    combined.update({k: v for k, v in st.args[0].items() if k not in prev.values()})
+                    st = _Step("rename", rename_col, (combined,), reads=set(combined))
+                renamed = {}
+                for old, new in st.args[0].items():
+                    renamed[new] = source(old)
+                    if renamed[new] is not None:
+                        needed.add(renamed[new])
+                gone.update(old for old in st.args[0] if old not in st.args[0].values())
+                for new, src in renamed.items():
+                    gone.discard(new)
+                    if src is not None:
+                        to_source[new] = src
+                        derived.discard(new)
+                    else:
+                        derived.add(new)
+                steps.append(st)
+            elif st.op == "cast":
+                # Solo columnas de origen que ningún paso anterior puede haber reescrito
+                pushed = {} if unknown else {c: t for c, t in st.args[0].items() if source(c) is not None}
+                for c, t in pushed.items():
+                    schema[source(c)] = t
+                    needed.add(source(c))
+                rest = {c: t for c, t in st.args[0].items() if c not in pushed}
+                if rest:
+                    steps.append(_Step("cast", None, (rest,), reads=set(rest)))
+            elif st.op == "select":
+                if not unknown:
+                    # Proyección en la extracción: columnas seleccionadas + las que leen los pasos previos
+                    for c in st.args[0]:
+                        if source(c) is not None:
+                            needed.add(source(c))
+                    for c in needed:
+                        schema.setdefault(c, _AUTO)
+                    projected = True
+                steps.append(st)
+            else:
+                if (steps and st.fn is sort_dates and steps[-1].fn is sort_dates
+                        and steps[-1].args[0] == st.args[0]):
+                    # Misma columna: el orden anterior se pierde al volver a ordenar. Con otra
+                    # columna se conserva, porque decide el orden de los empates
+                    steps.pop()
+                if st.reads is None:
+                    unknown = True
+                else:
+                    needed.update(source(c) for c in st.reads if source(c) is not None)
+                derived.update(st.writes)
+                steps.append(st)
+        return schema, projected, steps
+
+    def explain(self) -> str:
+        schema, projected, steps = self.optimize()
+        extract = f"extract_csv({self.ruta!r}" + (f", schema={schema}" if schema else "") + ")"
+        return " → ".join([extract] + [s.label() for s in steps])
+
+
+def _header(ruta: str, delimitador: str) -> List[str]:
+    """Cabecera del (primer) archivo de origen."""
+    files = resolve_source_files(ruta)
+    if not files:
+        return []
+    with open_source(files[0]) as f:
+        return list(pd.read_csv(f, sep=delimitador, nrows=0).columns)
+
+
+def _cast(df: pd.DataFrame, types: Dict[str, str]) -> Tuple[int, str, pd.DataFrame]:
+    """Cast en memoria de columnas que no se pudieron empujar a la extracción."""
+    missing = [c for c in types if c not in df.columns]
+    if missing:
+        return 2, f"pipeline ❌ cast: columnas no encontradas: {missing}.", df
+    try:
+        dtypes = {c: _PANDAS_DTYPES.get(t.lower(), t) for c, t in types.items()}
+        return 0, f"pipeline ✅ cast: {types}.", df.astype(dtypes)
+    except Exception as e:
+        return 9, f"pipeline ❌ cast {types}: {e}", df
+
+
+@task(cache_key_fn=lambda *args, **kwargs: None)
+def execute_pipeline(plan: LazyPipeline) -> Tuple[int, str, pd.DataFrame]:
+    """
+    Optimiza y ejecuta `plan` (LazyPipeline) en una sola tarea: extracción con las columnas y
+    tipos empujados y después los pasos restantes con copy-on-write activado (se restaura el
+    modo anterior al terminar). Cada mensaje de paso se registra en el log.
+
+    Devuelve (code, msg, df): code/msg del primer paso que falla, o (0, resumen, df) si todos
+    terminan bien.
+    """
+    logger = get_run_logger()
+    schema, projected, steps = plan.optimize()
+    logger.info(f"pipeline ▶️ Plan: {plan.explain()}")
+    if schema and not projected:
+        # Solo se empujaron tipos: el resto de columnas se leen igualmente (con inferencia)
+        schema = {c: schema.get(c, _AUTO) for c in _header(plan.ruta, plan.delimitador)} or schema
+
+    options = {k: v for k, v in plan.extract_options.items() if k != "schema"}
+    code, msg, df = extract_csv.fn(plan.ruta, plan.delimitador, None, schema or None, **options)
+    logger.info(msg)
+    if code != 0:
+        return code, msg, df
+
+    previous = set_copy_on_write(True)
+    try:
+        for st in steps:
+            if st.op == "check":
+                code, msg = getattr(st.fn, "fn", st.fn)(df, *st.args, **st.kwargs)
+            elif st.op == "select":
+                missing = [c for c in st.args[0] if c not in df.columns]
+                if missing:
+                    code, msg = 2, f"pipeline ❌ select: columnas no encontradas: {missing}."
+                else:
+                    code, msg, df = 0, f"pipeline ✅ select: {st.args[0]}.", df[st.args[0]]
+            elif st.op == "cast":
+                code, msg, df = _cast(df, st.args[0])
+            else:
+                fn = getattr(st.fn, "fn", st.fn)
+                code, msg, df = fn(df, *st.args, **st.kwargs)
+            logger.info(msg)
+            if code != 0:
+                return code, msg, df
+    finally:
+        set_copy_on_write(previous)
+
+    return 0, (
+        f"pipeline ✅ {len(steps) + 1} pasos ejecutados en una sola tarea "
+        f"({len(plan.steps) - len(steps)} eliminados o empujados a la extracción): {len(df)} filas."
+    ), df
@@ -0,0 +1,102 @@
+# tasks/Transform/occurrence_index.py
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from typing import Dict, Optional, Tuple
+
+# Valor válido para create_new_index: solo dígitos y guiones, con al menos un dígito
+# (equivale a v.isdigit() o v.replace("-", "").isdigit()).
+VALID_KEY_PATTERN = r"^[\d-]*\d[\d-]*$"
+
+
+def factorize_keys(values: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (codes, ukeys): código entero por fila y el texto (str) de cada valor distinto.
+    Equivale a values.astype(str) pero solo convierte a texto los valores distintos;
+    los nulos se conservan como valor propio ('nan', '<NA>', como haría astype(str)).
+    """
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    ukeys = np.asarray(pd.Series(uniques, dtype=values.dtype).astype(str), dtype=object)
+    # Valores distintos con el mismo texto (1 y "1" en columnas object) forman un solo grupo
+    str_codes, ukeys = pd.factorize(ukeys)
+    return str_codes[codes], np.asarray(ukeys, dtype=object)
+
+
+def invalid_keys(ukeys: np.ndarray) -> np.ndarray:
+    """Máscara de los valores distintos que no cumplen VALID_KEY_PATTERN (se valida cada uno una vez)."""
+    return ~pd.Series(ukeys, dtype=object).str.match(VALID_KEY_PATTERN, na=False).to_numpy()
+
+
+def occurrence_numbers(codes: np.ndarray, ukeys: np.ndarray, counters: Optional[Dict[str, int]] = None) -> np.ndarray:
+    """
+    Número de ocurrencia de cada fila dentro de su valor, en orden de aparición (0 la
+    primera vez, 1 la segunda...), con un cumcount agrupado por código.
+
+    Si se pasa `counters` ({valor: ocurrencias ya vistas}), la numeración continúa a partir
+    de ellos y el dict se actualiza con las nuevas ocurrencias (modo por bloques o
+    incremental). Solo se recorre en Python la lista de valores distintos, no las filas.
+    """
+    occ = pd.Series(codes).groupby(codes, sort=False).cumcount().to_numpy(dtype=np.int64)
+    if counters is None:
+        return occ
+
+    keys = ukeys.tolist()
+    offsets = np.fromiter((counters.get(k, 0) for k in keys), dtype=np.int64, count=len(keys))
+    occ += offsets[codes]
+    totals = offsets + np.bincount(codes, minlength=len(keys))
+    counters.update(zip(keys, totals.tolist()))
+    return occ
+
+
+def suffix_keys(
+    codes: np.ndarray,
+    ukeys: np.ndarray,
+    suffixes: np.ndarray,
+    sep: str = "",
+    mask: Optional[np.ndarray] = None
+) -> pd.Series:
+    """
+    Texto 'valor{sep}{sufijo}' por fila, construido con pyarrow (sin objetos Python por
+    fila). Con `mask`, solo las filas marcadas llevan sufijo y el resto conserva el valor.
+    Devuelve una Series de dtype "string[pyarrow]".
+    """
+    keys = pa.array(ukeys, type=pa.string()).take(pa.array(codes))
+    joined = pc.binary_join_element_wise(keys, pc.cast(pa.array(suffixes), pa.string()), sep)
+    if mask is not None:
+        joined = pc.if_else(pa.array(mask), joined, keys)
+    return pd.Series(pd.arrays.ArrowStringArray(joined))
+
+
+# Máximo BIGINT (con signo), tipo de la PK en modo "int"
+MAX_BIGINT = 2**63 - 1
+
+
+def surrogate_keys(codes: np.ndarray, ukeys: np.ndarray, occ: np.ndarray, stride: int) -> np.ndarray:
+    """
+    Clave entera determinista por fila: valor (solo sus dígitos, p. ej. 20150101) × `stride`
+    + número de ocurrencia. Ordena igual que (valor, ocurrencia) y no depende de la ejecución.
+    Lanza OverflowError si alguna ocurrencia no cabe en `stride` o la clave no cabe en BIGINT,
+    y ValueError si dos valores distintos tienen los mismos dígitos ("1-23" y "12-3",
+    "2015-01-01" y "20150101"), porque sus claves colisionarían.
+    """
+    if not isinstance(stride, int) or stride <= 0:
+        raise OverflowError(f"stride inválido: {stride!r}; debe ser un entero mayor que 0.")
+    if len(occ) and int(occ.max()) >= stride:
+        raise OverflowError(
+            f"hay valores con {int(occ.max()) + 1} ocurrencias y el stride es {stride}; aumente el stride."
+        )
+    # Solo los valores distintos pasan por int() de Python (enteros sin límite para comprobar el rango)
+    bases = [int(k.replace("-", "")) for k in ukeys.tolist()]
+    if len(set(bases)) != len(bases):
+        seen, clashes = {}, []
+        for k, base in zip(ukeys.tolist(), bases):
+            if base in seen:
+                clashes.append(f"'{seen[base]}' y '{k}'")
+            seen.setdefault(base, k)
+        raise ValueError(f"valores distintos con los mismos dígitos ({', '.join(clashes[:5])}); sus claves colisionarían.")
+    max_key = max(bases, default=0) * stride + (int(occ.max()) if len(occ) else 0)
+    if max_key > MAX_BIGINT:
+        raise OverflowError(f"la clave máxima ({max_key}) no cabe en BIGINT; reduzca el stride.")
+    return np.asarray(bases, dtype=np.int64)[codes] * np.int64(stride) + occ
@@ -4,6 +4,8 @@ import pandas as pd
 from typing import Tuple, Dict, Any
 from prefect import task, get_run_logger
 
+from tasks.Transform.copy_mode import working_copy
+
 @task
 def rename_col(
     df: pd.DataFrame,
@@ -46,7 +48,7 @@ def rename_col(
 
         # 4) Intentar renombrar
         try:
-            df_mod = df.copy()
+            df_mod = working_copy(df)
             df_mod = df_mod.rename(columns=names_map)
         except Exception as e:
             # Error inesperado durante rename
@@ -0,0 +1,42 @@
+# tasks/Transform/rename_col_duckdb.py
+
+from typing import Tuple, Dict
+from prefect import task
+
+@task(cache_key_fn=lambda *args, **kwargs: None)
+def rename_col_duckdb(
+    con,
+    src: str,
+    names_map: Dict[str, str]
+) -> Tuple[int, str, str]:
+    """
+    Equivalente SQL de rename_col (modo DuckDB): crea la vista '<src>_ren' con las
+    columnas renombradas según `names_map` ({col_actual: col_nueva}).
+
+    Códigos de retorno:
+      1 → names_map no es un dict no vacío.
+      2 → columnas faltantes en `src`.
+      3 → valor de names_map no válido (no es texto).
+      9 → otro error inesperado.
+      0 → éxito.
+    """
+    out = f"{src}_ren"
+    if not isinstance(names_map, dict) or len(names_map) == 0:
+        return 1, "rename_col ❌ Error: names_map debe ser un dict no vacío {col_actual: col_nueva}.", src
+    try:
+        cols = [row[0] for row in con.execute(f"DESCRIBE {src}").fetchall()]
+        missing = [col for col in names_map.keys() if col not in cols]
+        if missing:
+            return 2, f"rename_col ❌ Error: columnas no encontradas en '{src}': {missing}.", src
+        invalid_new = [new for new in names_map.values() if not isinstance(new, str) or new.strip() == ""]
+        if invalid_new:
+            return 3, f"rename_col ❌ Error: nombres nuevos inválidos (deben ser strings no vacíos): {invalid_new}.", src
+
+        select_list = ", ".join(
+            f'"{c}" AS "{names_map[c]}"' if c in names_map else f'"{c}"' for c in cols
+        )
+        con.execute(f"CREATE OR REPLACE TEMP VIEW {out} AS SELECT {select_list} FROM {src}")
+        msg = f"rename_col ✅ Columnas renombradas correctamente: {list(names_map.keys())} → {list(names_map.values())} (DuckDB)."
+        return 0, msg, out
+    except Exception as e:
+        return 9, f"rename_col ❌ Error inesperado en DuckDB: {e}", src
@@ -1,17 +1,79 @@
 # tasks/Transform/sort_dates.py
 
+import tempfile
+import duckdb
+import numpy as np
 import pandas as pd
-from typing import Tuple
+from typing import Tuple, Optional
 from prefect import task, get_run_logger
 
+# Si la parte desordenada supera esta fracción, se ordena todo (fusionar no compensa)
+_TAIL_MAX_FRACTION = 0.5
+# Memoria mínima con la que DuckDB puede ordenar las claves volcando a disco
+_MIN_SORT_MB = 32
+
+
+def _sorted_prefix(keys: np.ndarray) -> int:
+    """Número de filas iniciales que ya están en orden no decreciente."""
+    bad = np.flatnonzero(keys[1:] < keys[:-1])
+    return len(keys) if bad.size == 0 else int(bad[0]) + 1
+
+
+def _merge_tail(keys: np.ndarray, prefix: int) -> np.ndarray:
+    """
+    Posiciones que ordenan `keys` sabiendo que las `prefix` primeras ya están ordenadas:
+    se ordena solo la cola y se intercala con el prefijo mediante searchsorted (estable).
+    """
+    n = len(keys)
+    tail_order = np.argsort(keys[prefix:], kind="stable")
+    tail_sorted = keys[prefix:][tail_order]
+    dest = np.searchsorted(keys[:prefix], tail_sorted, side="right") + np.arange(len(tail_sorted))
+    take = np.empty(n, dtype=np.int64)
+    take[dest] = prefix + tail_order
+    rest = np.ones(n, dtype=bool)
+    rest[dest] = False
+    take[rest] = np.arange(prefix)
+    return take
+
+
+def _duckdb_key_order(keys: np.ndarray, memory_mb: float, spill_dir: Optional[str]) -> np.ndarray:
+    """
+    Posiciones ordenadas de `keys` calculadas por DuckDB con `memory_limit`: la ordenación de
+    (clave, posición) puede volcar a disco (temp_directory) en lugar de crecer en memoria.
+    Solo acota la memoria de la ordenación; el DataFrame sigue entero en memoria y reordenarlo
+    con take lo copia. El límite nunca baja de _MIN_SORT_MB.
+    """
+    con = duckdb.connect()
+    try:
+        con.execute(f"SET memory_limit = '{int(max(memory_mb, _MIN_SORT_MB))}MB'")
+        con.execute(f"SET temp_directory = '{spill_dir or tempfile.gettempdir()}'")
+        keys_df = pd.DataFrame({"k": keys, "pos": np.arange(len(keys), dtype=np.int64)})
+        con.register("keys_df", keys_df)
+        return con.execute("SELECT pos FROM keys_df ORDER BY k, pos").fetchnumpy()["pos"]
+    finally:
+        con.close()
+
+
 @task
 def sort_dates(
     df: pd.DataFrame,
     col: str,
-    order: str = "ASC"
+    order: str = "ASC",
+    memory_budget_mb: Optional[float] = None,
+    spill_dir: Optional[str] = None
 ) -> Tuple[int, str, pd.DataFrame]:
     """
     Ordena `df` por la columna `col`, que debe ser tipo datetime. `order` es "ASC" o "DES".
+
+    Según el estado de la entrada se usa la ruta más barata (el mensaje indica cuál):
+      - ya ordenado: no se copia ni se ordena (solo se reinicia el índice si hace falta).
+      - parcialmente ordenado (exportaciones con filas añadidas al final): se ordena solo
+        la cola desordenada y se intercala con el prefijo ya ordenado.
+      - claves en DuckDB: si `df` ocupa más de `memory_budget_mb` MB, las claves se ordenan con
+        DuckDB limitado a ese presupuesto (volcando a `spill_dir`). No es una ordenación
+        fuera de memoria: df sigue en memoria y el resultado es una copia reordenada.
+      - completo: en otro caso, sort_values como antes.
+    Las fechas nulas (NaT) fuerzan la ordenación completa (van al final).
     
     Códigos de retorno:
       - 1 → DataFrame vacío o no válido.
@@ -41,11 +103,36 @@ def sort_dates(
         msg = f"❌ Columna '{col}' no es de tipo datetime/date."
         return 4, msg, df
 
-    # 5) Todo correcto: ordenar
+    # 5) Todo correcto: ordenar por la ruta más barata
     ascending = order.upper() == "ASC"
+    sentido = 'ascendente' if ascending else 'descendente'
     try:
-        df_mod = df.copy().sort_values(by=col, ascending=ascending).reset_index(drop=True)
-        msg = f"✅ DataFrame ordenado por '{col}' en orden {'ascendente' if ascending else 'descendente'}."
+        take, ruta = None, "completo"
+        if not df[col].isna().any():
+            # Claves int64 (ns); en descendente se niegan para comparar siempre en ascendente
+            keys = df[col].to_numpy(dtype="datetime64[ns]").view(np.int64)
+            keys = keys if ascending else -keys
+            prefix = _sorted_prefix(keys)
+            # Tamaño (recorrido deep, caro con columnas object) solo si hay presupuesto y hay que ordenar
+            size_mb = None
+            if prefix < len(keys) and memory_budget_mb is not None:
+                size_mb = df.memory_usage(deep=True).sum() / (1024 * 1024)
+            if prefix == len(keys):
+                ruta = "ya ordenado, sin ordenar"
+                df_mod = df if isinstance(df.index, pd.RangeIndex) and df.index.start == 0 \
+                    and df.index.step == 1 else df.reset_index(drop=True)
+            elif size_mb is not None and size_mb > memory_budget_mb:
+                take = _duckdb_key_order(keys, memory_budget_mb, spill_dir)
+                ruta = (f"claves ordenadas en DuckDB con límite de memoria, DataFrame en memoria: "
+                        f"{size_mb:.0f} MB > {memory_budget_mb} MB")
+            elif len(keys) - prefix <= _TAIL_MAX_FRACTION * len(keys):
+                take = _merge_tail(keys, prefix)
+                ruta = f"parcial: {prefix} filas ya ordenadas, {len(keys) - prefix} ordenadas e intercaladas"
+        if take is not None:
+            df_mod = df.take(take).reset_index(drop=True)
+        elif ruta == "completo":
+            df_mod = df.sort_values(by=col, ascending=ascending).reset_index(drop=True)
+        msg = f"✅ DataFrame ordenado por '{col}' en orden {sentido} ({ruta})."
         return 0, msg, df_mod
     except Exception as e:
         head_str = df.head(5).to_string(index=False)
@@ -0,0 +1,43 @@
+# tasks/Transform/sort_dates_duckdb.py
+
+from typing import Tuple
+from prefect import task
+
+@task(cache_key_fn=lambda *args, **kwargs: None)
+def sort_dates_duckdb(
+    con,
+    src: str,
+    col: str,
+    order: str = "ASC"
+) -> Tuple[int, str, str]:
+    """
+    Equivalente SQL de sort_dates (modo DuckDB): crea la vista '<src>_sorted' ordenada
+    por `col`, que debe ser DATE/TIMESTAMP. `order` es "ASC" o "DES". La ordenación la
+    ejecuta DuckDB al materializar (multihilo y con volcado a disco si no cabe en memoria).
+
+    Códigos de retorno:
+      - 2 → Columna `col` no existe.
+      - 3 → `order` no es "ASC" ni "DES".
+      - 4 → Columna `col` no es tipo datetime/date.
+      - 9 → Otro error inesperado.
+      - 0 → Éxito.
+    """
+    out = f"{src}_sorted"
+    if order.upper() not in ("ASC", "DES"):
+        return 3, "❌ El parámetro 'order' debe ser 'ASC' o 'DES'.", src
+    try:
+        types = {row[0]: row[1] for row in con.execute(f"DESCRIBE {src}").fetchall()}
+        if col not in types:
+            return 2, f"❌ Columna '{col}' no existe en '{src}'.", src
+        if not (types[col].startswith("TIMESTAMP") or types[col] == "DATE"):
+            return 4, f"❌ Columna '{col}' no es de tipo datetime/date ({types[col]}).", src
+
+        ascending = order.upper() == "ASC"
+        con.execute(f"""
+            CREATE OR REPLACE TEMP VIEW {out} AS
+            SELECT * FROM {src} ORDER BY "{col}" {'ASC' if ascending else 'DESC'}
+        """)
+        msg = f"✅ Relación ordenada por '{col}' en orden {'ascendente' if ascending else 'descendente'} (DuckDB)."
+        return 0, msg, out
+    except Exception as e:
+        return 9, f"❌ Error al ordenar en sort_dates_duckdb: {e}", src
@@ -1,31 +1,87 @@
 # tasks/Transform/transform_cat_to_num.py
 
+import numpy as np
 import pandas as pd
 from typing import Dict, Tuple, Any, Optional
 from prefect import task, get_run_logger
 
-@task
+from tasks.Transform.copy_mode import working_copy
+
+# Tabla de la base de datos con los diccionarios persistentes (una fila por columna y valor)
+DEFAULT_DICT_TABLE = "cat_dictionaries"
+# Entradas del mapping que se muestran en el mensaje
+_MSG_MAX_ENTRIES = 20
+
+
+def _load_dictionary(con, dict_table: str, col: str) -> Dict[str, int]:
+    """Diccionario {valor: código} guardado para `col` (crea la tabla si no existe)."""
+    con.execute(f"""
+        CREATE TABLE IF NOT EXISTS {dict_table} (
+            col_name VARCHAR,
+            value VARCHAR,
+            code INTEGER,
+            PRIMARY KEY (col_name, value)
+        )
+    """)
+    rows = con.execute(
+        f"SELECT value, code FROM {dict_table} WHERE col_name = ? ORDER BY code", (col,)
+    ).fetchall()
+    return dict(rows)
+
+
+def _append_dictionary(con, dict_table: str, col: str, new_entries: Dict[str, int]) -> None:
+    """Añade al diccionario persistente de `col` los valores nuevos con sus códigos."""
+    new_df = pd.DataFrame({
+        "col_name": col,
+        "value": list(new_entries.keys()),
+        "code": list(new_entries.values()),
+    })
+    con.register("new_cat_entries", new_df)
+    try:
+        con.execute(f"INSERT INTO {dict_table} SELECT col_name, value, code FROM new_cat_entries")
+    finally:
+        con.unregister("new_cat_entries")
+
+
+def _preview(mapping: Dict[Any, int]) -> str:
+    items = list(mapping.items())
+    shown = ", ".join(f"{k!r}: {v}" for k, v in items[:_MSG_MAX_ENTRIES])
+    return "{" + shown + (f", … (+{len(items) - _MSG_MAX_ENTRIES})" if len(items) > _MSG_MAX_ENTRIES else "") + "}"
+
+
+@task(cache_key_fn=lambda *args, **kwargs: None)
 def transform_cat_to_num(
     df: pd.DataFrame,
     col: str,
-    cat_map: Optional[Dict[Any, int]] = None
+    cat_map: Optional[Dict[Any, int]] = None,
+    con=None,
+    dict_table: str = DEFAULT_DICT_TABLE
 ) -> Tuple[int, str, pd.DataFrame]:
     """
     Crea una nueva columna '<col>_num' mapeando valores únicos de la columna categórica df[col] a números comenzando en 1.
     - Si hay nulos o valores ausentes en df[col], reciben el valor 0 en la columna numérica.
     - Puede aceptar un dict opcional cat_map con mapeo {valor: número}.
+    - Con `con`, el mapeo se guarda en la tabla `dict_table` de la base de datos (un
+      diccionario por columna): los valores ya conocidos conservan su código y los nuevos
+      reciben códigos a continuación del máximo. Así los códigos no cambian entre
+      ejecuciones y load_table_to_cloud no ve como modificadas las filas que no cambian.
+      Los valores se comparan como texto.
+    El mapeo se aplica con los códigos de pd.Categorical (sin límite de categorías).
 
     Parámetros:
     - df: DataFrame a procesar.
     - col: nombre de la columna categórica en df.
-    - cat_map: dict opcional {valor: número}, para forzar un mapeo predefinido.
+    - cat_map: dict opcional {valor: número}, para forzar un mapeo predefinido (tiene
+      prioridad sobre el diccionario persistente, que no se usa ni se modifica).
+    - con: conexión DuckDB opcional para el diccionario persistente.
+    - dict_table: tabla del diccionario persistente.
 
     Códigos de retorno:
       1 → Parámetros inválidos (df no es DataFrame válido o está vacío, o col no es str)
       2 → Columna especificada no existe en df
       3 → cat_map presente pero formato inválido (no dict str->int o valores no apropiados)
       4 → cat_map presente pero conjunto de claves no coincide con valores únicos de df[col]
-      5 → Demasiados valores únicos (>99) en df[col]
+      5 → Error leyendo o actualizando el diccionario persistente
       9 → Otro error inesperado
       0 → Éxito
 
@@ -43,18 +99,16 @@ def transform_cat_to_num(
         if col not in df.columns:
             return 2, f"transform_cat_to_num ❌ Error: Columna '{col}' no existe en el DataFrame.", df
 
-        # Obtener valores únicos (excluyendo NaN)
+        # Obtener valores únicos (excluyendo NaN) en orden de aparición; codes = índice por fila (-1 nulo)
         try:
-            unique_vals_series = df[col].dropna()
-            unique_vals = unique_vals_series.unique().tolist()
+            codes, uniques = pd.factorize(df[col])
+            unique_vals = uniques.tolist()
         except Exception as e:
             return 9, f"transform_cat_to_num ❌ Error al obtener valores únicos de '{col}': {e}", df
 
-        # 5) Verificar cantidad de valores únicos
-        if len(unique_vals) > 99:
-            return 5, f"transform_cat_to_num ❌ Error: Demasiados valores únicos en '{col}' ({len(unique_vals)} > 99).", df
-
         mapping: Dict[Any, int] = {}
+        origen = ""
+        lookup = unique_vals
 
         # 3) Si se proporcionó cat_map, validar formato y contenido
         if cat_map is not None:
@@ -77,15 +131,37 @@ def transform_cat_to_num(
 
             # Si pasa validación, usar cat_map como mapping, manteniendo el orden de unique_vals
             mapping = {val: cat_map[val] for val in unique_vals}
+        elif con is not None:
+            # Diccionario persistente: códigos existentes + nuevos valores a continuación
+            try:
+                stored = _load_dictionary(con, dict_table, col)
+                keys = [str(v) for v in unique_vals]
+                next_code = max(stored.values(), default=0) + 1
+                new_entries = {}
+                for k in keys:
+                    if k not in stored and k not in new_entries:
+                        new_entries[k] = next_code
+                        next_code += 1
+                if new_entries:
+                    _append_dictionary(con, dict_table, col, new_entries)
+            except Exception as e:
+                return 5, f"transform_cat_to_num ❌ Error con el diccionario persistente '{dict_table}' de '{col}': {e}", df
+            mapping = {**stored, **new_entries}
+            lookup = keys
+            origen = f" (diccionario '{dict_table}': {len(stored)} existentes, {len(new_entries)} nuevos)"
         else:
             # Construir mapping automáticamente: enumerar unique_vals empezando en 1
             mapping = {val: i + 1 for i, val in enumerate(unique_vals)}
 
-        # 6) Crear la nueva columna
+        # 6) Crear la nueva columna: código de Categorical de cada valor distinto → número del
+        #    mapping, expandido a las filas (nulos/ausentes → 0, la última posición de numbers)
         try:
-            df_mod = df.copy()
+            cat_codes = pd.Categorical(lookup, categories=list(mapping.keys())).codes
+            cat_codes = np.append(cat_codes, -1)
+            numbers = np.append(np.fromiter(mapping.values(), dtype=np.int64, count=len(mapping)), 0)
+            df_mod = working_copy(df)
             new_col = f"{col}_num"
-            df_mod[new_col] = df_mod[col].map(mapping).fillna(0).astype(int)
+            df_mod[new_col] = numbers[cat_codes[codes]]
         except Exception as e:
             head_str = df.head(5).to_string(index=False)
             dtypes_str = df.dtypes.astype(str).to_string()
@@ -98,7 +174,7 @@ def transform_cat_to_num(
             return 9, full_msg, df
 
         # 7) Éxito: incluir mapping en el mensaje para transparencia
-        msg = f"transform_cat_to_num ✅ Columna '{new_col}' creada con éxito. Mapping: {mapping}."
+        msg = f"transform_cat_to_num ✅ Columna '{new_col}' creada con éxito{origen}. Mapping: {_preview(mapping)}."
         logger.info(msg)
         return 0, msg, df_mod
 
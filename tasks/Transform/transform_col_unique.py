@@ -4,6 +4,9 @@ import pandas as pd
 from typing import Tuple, Any
 from prefect import task, get_run_logger
 
+from tasks.Transform.occurrence_index import factorize_keys, occurrence_numbers, suffix_keys
+from tasks.Transform.copy_mode import working_copy
+
 @task
 def transform_col_unique(df: pd.DataFrame, col: str) -> Tuple[int, pd.DataFrame, str]:
     """
@@ -20,17 +23,13 @@ def transform_col_unique(df: pd.DataFrame, col: str) -> Tuple[int, pd.DataFrame,
         if col not in df.columns:
             raise KeyError(f"Columna '{col}' no encontrada en el DataFrame")
 
-        counts = {}
-        new_values = []
-        for val in df[col].fillna("").astype(str):
-            counts[val] = counts.get(val, 0) + 1
-            if counts[val] == 1:
-                new_values.append(val)
-            else:
-                new_values.append(f"{val} - {counts[val]}")
-
-        df_mod = df.copy()
-        df_mod[col] = new_values
+        # Ocurrencia 0 → valor original; la N-ésima (N ≥ 2) → 'valor - N'
+        codes, ukeys = factorize_keys(df[col].fillna(""))
+        occ = occurrence_numbers(codes, ukeys)
+        unique_values = suffix_keys(codes, ukeys, occ + 1, sep=" - ", mask=occ > 0)
+
+        df_mod = working_copy(df)
+        df_mod[col] = unique_values.astype(object).set_axis(df.index)
 
         msg = f"✅ Todos los valores de '{col}' son únicos ahora."
         return 0, msg, df_mod
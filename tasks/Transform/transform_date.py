@@ -1,9 +1,12 @@
 # tasks/Transform/transform_date.py
 
+import numpy as np
 import pandas as pd
 from typing import Tuple
 from prefect import task, get_run_logger
 
+from tasks.Transform.copy_mode import working_copy
+
 def _build_strptime_format(date_format: str) -> str:
     """
     Traduce un patrón tipo 'DDMMYYYY' a un formato strptime '%d%m%Y',
@@ -31,6 +34,28 @@ def _build_strptime_format(date_format: str) -> str:
             i += 1
     return fmt
 
+# Tokens que admite la ruta aritmética para columnas enteras (sin separadores ni 'YY')
+_INT_TOKENS = {"YYYY": "year", "MM": "month", "DD": "day"}
+
+
+def _int_layout(date_format: str):
+    """
+    [(componente, posición, ancho)] si `date_format` está formado solo por YYYY/MM/DD
+    (p. ej. 'YYYYMMDD', 'DDMMYYYY'); None en otro caso.
+    """
+    layout, i = [], 0
+    while i < len(date_format):
+        for token, part in _INT_TOKENS.items():
+            if date_format.startswith(token, i):
+                layout.append((part, i, len(token)))
+                i += len(token)
+                break
+        else:
+            return None
+    parts = [part for part, _, _ in layout]
+    return layout if sorted(parts) == sorted(_INT_TOKENS.values()) else None
+
+
 @task
 def transform_date(
     df: pd.DataFrame,
@@ -46,6 +71,11 @@ def transform_date(
       * code=4: caracteres no numéricos encontrados.
       * code=9: otro error inesperado.
       * code=0: conversión exitosa.
+
+    Solo se validan y parsean los valores distintos de la columna (un archivo diario tiene
+    millones de filas pero unas pocas fechas distintas) y el resultado se expande a todas
+    las filas. Si la columna es entera y el formato solo tiene YYYY/MM/DD (p. ej. YYYYMMDD),
+    las fechas se obtienen aritméticamente (divisiones y módulos), sin pasar por texto.
     """
     logger = get_run_logger()
 
@@ -57,37 +87,64 @@ def transform_date(
     if col not in df.columns:
         return 2, f"transform_date ❌ Error: Columna '{col}' no encontrada en el DataFrame.", df
 
-    raw = df[col].astype(str).str.strip()
+    # Valores distintos en orden de aparición: el primer valor inválido es el de la primera fila inválida
+    codes, uniques = pd.factorize(df[col], use_na_sentinel=False)
     expected_len = len(date_format)
+    layout = _int_layout(date_format)
 
-    # 3) longitud incorrecta
-    wrong_len = raw[raw.str.len() != expected_len]
-    if not wrong_len.empty:
-        ejemplo = wrong_len.iloc[0]
-        return 3, (
-            f"transform_date ❌ Error: Entrada de longitud inválida en '{col}': "
-            f"'{ejemplo}' no coincide con formato {date_format}."
-        ), df
-
-    # 4) caracteres no numéricos
-    non_digits = raw[raw.str.contains(r"\D")]
-    if not non_digits.empty:
-        ejemplo = non_digits.iloc[0]
-        return 4, (
-            f"transform_date ❌ Error: Caracteres no numéricos en '{col}': ejemplo '{ejemplo}'."
-        ), df
-
-    # 5) construir el formato correcto para strptime
-    try:
-        fmt = _build_strptime_format(date_format)
-    except Exception as e:
-        return 9, f"transform_date ❌ Error interno construyendo el formato: {e}", df
+    if layout and pd.api.types.is_integer_dtype(df[col].dtype) and not pd.isna(uniques).any():
+        # Ruta entera: YYYYMMDD → year = v // 10**4, month = v // 10**2 % 10**2, day = v % 10**2
+        values = np.asarray(uniques, dtype=np.int64)
+        # 3) longitud incorrecta (número de dígitos distinto del formato, o negativo)
+        wrong_len = values[(values < 10 ** (expected_len - 1)) | (values >= 10 ** expected_len)]
+        if wrong_len.size:
+            return 3, (
+                f"transform_date ❌ Error: Entrada de longitud inválida en '{col}': "
+                f"'{wrong_len[0]}' no coincide con formato {date_format}."
+            ), df
+        components = {
+            part: values // 10 ** (expected_len - pos - width) % 10 ** width
+            for part, pos, width in layout
+        }
+        ruta = "ruta entera"
+        parse = lambda: pd.to_datetime(pd.DataFrame(components), errors="raise")
+    else:
+        raw = pd.Series(uniques, dtype=df[col].dtype).astype(str).str.strip()
+
+        # 3) longitud incorrecta
+        wrong_len = raw[raw.str.len() != expected_len]
+        if not wrong_len.empty:
+            ejemplo = wrong_len.iloc[0]
+            return 3, (
+                f"transform_date ❌ Error: Entrada de longitud inválida en '{col}': "
+                f"'{ejemplo}' no coincide con formato {date_format}."
+            ), df
+
+        # 4) caracteres no numéricos
+        non_digits = raw[raw.str.contains(r"\D")]
+        if not non_digits.empty:
+            ejemplo = non_digits.iloc[0]
+            return 4, (
+                f"transform_date ❌ Error: Caracteres no numéricos en '{col}': ejemplo '{ejemplo}'."
+            ), df
+
+        # 5) construir el formato correcto para strptime
+        try:
+            fmt = _build_strptime_format(date_format)
+        except Exception as e:
+            return 9, f"transform_date ❌ Error interno construyendo el formato: {e}", df
+        ruta = "texto"
+        parse = lambda: pd.to_datetime(raw, format=fmt, errors="raise")
 
-    # 6) intentar conversión
+    # 6) intentar conversión de los valores distintos y expandir a todas las filas
     try:
-        df_mod = df.copy()
-        df_mod[col] = pd.to_datetime(raw, format=fmt, errors="raise")
-        return 0, f"transform_date ✅ Columna '{col}' convertida a datetime con formato {date_format}.", df_mod
+        parsed = pd.DatetimeIndex(parse())
+        df_mod = working_copy(df)
+        df_mod[col] = pd.Series(parsed.take(codes), index=df.index)
+        return 0, (
+            f"transform_date ✅ Columna '{col}' convertida a datetime con formato {date_format} "
+            f"({ruta}, {len(parsed)} valores distintos)."
+        ), df_mod
     except Exception as e:
         head_str = df.head(5).to_string(index=False)
         dtypes_str = df.dtypes.astype(str).to_string()
@@ -0,0 +1,69 @@
+# tasks/Transform/transform_date_duckdb.py
+
+from typing import Tuple
+from prefect import task
+from tasks.Transform.transform_date import _build_strptime_format
+
+@task(cache_key_fn=lambda *args, **kwargs: None)
+def transform_date_duckdb(
+    con,
+    src: str,
+    col: str,
+    date_format: str = "YYYYMMDD"
+) -> Tuple[int, str, str]:
+    """
+    Equivalente SQL de transform_date sobre la relación `src` (modo DuckDB).
+    Crea la vista '<src>_date' con `col` convertida a TIMESTAMP según `date_format`.
+    Retorna (code, msg, nombre_de_la_vista) con los mismos códigos que transform_date:
+      * code=2: columna no existe.
+      * code=3: longitud de cadena no coincide con date_format.
+      * code=4: caracteres no numéricos encontrados.
+      * code=9: otro error inesperado (incluye fechas imposibles, p.ej. '20151340').
+      * code=0: conversión exitosa.
+    """
+    out = f"{src}_date"
+    try:
+        cols = [row[0] for row in con.execute(f"DESCRIBE {src}").fetchall()]
+        if col not in cols:
+            return 2, f"transform_date ❌ Error: Columna '{col}' no encontrada en '{src}'.", src
+
+        raw = f"trim(CAST(\"{col}\" AS VARCHAR))"
+        expected_len = len(date_format)
+
+        # 3) longitud incorrecta (los nulos cuentan como '<NA>', igual que en pandas)
+        wrong_len = con.execute(f"""
+            SELECT coalesce({raw}, '<NA>') FROM {src}
+            WHERE {raw} IS NULL OR length({raw}) != {expected_len}
+            LIMIT 1
+        """).fetchone()
+        if wrong_len is not None:
+            return 3, (
+                f"transform_date ❌ Error: Entrada de longitud inválida en '{col}': "
+                f"'{wrong_len[0]}' no coincide con formato {date_format}."
+            ), src
+
+        # 4) caracteres no numéricos
+        non_digits = con.execute(f"""
+            SELECT {raw} FROM {src} WHERE regexp_matches({raw}, '\\D') LIMIT 1
+        """).fetchone()
+        if non_digits is not None:
+            return 4, (
+                f"transform_date ❌ Error: Caracteres no numéricos en '{col}': ejemplo '{non_digits[0]}'."
+            ), src
+
+        # 5-6) formato y conversión; se valida aquí porque la vista es perezosa
+        fmt = _build_strptime_format(date_format)
+        bad = con.execute(f"""
+            SELECT {raw} FROM {src} WHERE try_strptime({raw}, '{fmt}') IS NULL LIMIT 1
+        """).fetchone()
+        if bad is not None:
+            return 9, f"transform_date ❌ Error inesperado al convertir '{col}': fecha inválida '{bad[0]}'.", src
+
+        con.execute(f"""
+            CREATE OR REPLACE TEMP VIEW {out} AS
+            SELECT * REPLACE (strptime({raw}, '{fmt}') AS "{col}") FROM {src}
+        """)
+        return 0, f"transform_date ✅ Columna '{col}' convertida a datetime con formato {date_format} (DuckDB).", out
+
+    except Exception as e:
+        return 9, f"transform_date ❌ Error inesperado al convertir '{col}' en DuckDB: {e}", src
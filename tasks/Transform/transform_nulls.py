@@ -1,59 +1,100 @@
 # tasks/Transform/transform_nulls.py
 
 import pandas as pd
-from typing import List, Tuple, Any
+from typing import Dict, List, Tuple, Any, Optional, Union
 from prefect import task
 
+# Política por columna: None (relleno automático) o {"fill": valor, "null_values": [...]}
+NullPolicy = Optional[Dict[str, Any]]
+
+
+def _default_fill(series: pd.Series) -> Any:
+    """0 para columnas numéricas, "" para el resto."""
+    return 0 if pd.api.types.is_numeric_dtype(series.dtype) else ""
+
+
+def _policies(
+    col: Union[str, List[str], Dict[str, NullPolicy]],
+    null_values: Optional[List[Any]]
+) -> Dict[str, Dict[str, Any]]:
+    """Normaliza `col` a {columna: {"fill": ..., "null_values": [...]}}."""
+    if isinstance(col, str):
+        col = {col: None}
+    elif isinstance(col, (list, tuple)):
+        col = dict.fromkeys(col)
+    elif not isinstance(col, dict):
+        raise TypeError("'col' debe ser str, lista de columnas o dict {columna: política}")
+
+    policies = {}
+    for name, policy in col.items():
+        policy = dict(policy or {})
+        unknown = set(policy) - {"fill", "null_values"}
+        if unknown:
+            raise ValueError(f"claves de política no válidas para '{name}': {sorted(unknown)}")
+        policy.setdefault("null_values", null_values)
+        policies[name] = policy
+    return policies
+
+
 @task
 def transform_nulls(
     df: pd.DataFrame,
-    col: str,
-    null_values: List[Any] = None
+    col: Union[str, List[str], Dict[str, NullPolicy]],
+    null_values: List[Any] = None,
+    counts: Optional[Dict[str, int]] = None
 ) -> Tuple[int, pd.DataFrame, str]:
     """
-    Sustituye nulos en la columna `col` de `df`:
-      - Si dtype de col es numérico (int/float), reemplaza nulos por 0.
-      - Si dtype es object/string, reemplaza nulos por cadena vacía "".
-      - Además, cualquier valor en la lista `null_values` se trata como nulo y se sustituye.
+    Sustituye nulos en una o varias columnas de `df` en una sola pasada:
+      - `col` puede ser una columna, una lista de columnas o un dict {columna: política},
+        donde la política es None (relleno automático) o un dict con:
+          * "fill": valor de relleno (por defecto 0 si la columna es numérica, "" si no);
+          * "null_values": valores que se tratan como nulos en esa columna (p. ej. ["N.D.", "-"]).
+      - `null_values` se aplica a las columnas cuya política no indique los suyos.
+    Cada columna se resuelve con una sola máscara (nulo o valor centinela) y todas las
+    columnas modificadas se asignan de una vez; las demás no se copian.
+
+    Si se pasa `counts` (dict), se rellena con {columna: valores reemplazados}.
+
     Devuelve (code, df_modificado, message):
       * code = 1 si OK, 0 si error.
-      * message indica cuántos valores fueron reemplazados o el error ocurrido.
+      * message indica cuántos valores fueron reemplazados (por columna) o el error ocurrido.
     """
 
     try:
-        if col not in df.columns:
-            raise KeyError(f"Columna '{col}' no existe en el DataFrame")
-
-        df_mod = df.copy()
-        series = df_mod[col]
-
-        # Definir set de valores a tratar como nulos (sin incluir None/np.nan que pandas ya ve)
-        extra_nulls = set(null_values) if null_values else set()
+        policies = _policies(col, null_values)
+        missing = [c for c in policies if c not in df.columns]
+        if missing:
+            raise KeyError(f"Columnas {missing} no existen en el DataFrame")
 
-        # Contar nulos originales (NaN)
-        orig_nulls = series.isna().sum()
+        replaced: Dict[str, int] = {}
+        new_cols: Dict[str, pd.Series] = {}
+        for name, policy in policies.items():
+            series = df[name]
+            mask = series.isna()
+            if policy["null_values"]:
+                mask |= series.isin(set(policy["null_values"]))
+            n = int(mask.sum())
+            replaced[name] = n
+            if n:
+                fill = policy["fill"] if "fill" in policy else _default_fill(series)
+                new_cols[name] = series.mask(mask, fill)
 
-        # Marcar como NaN cualquier valor en extra_nulls
-        if extra_nulls:
-            mask_extra = series.isin(extra_nulls)
-            series = series.mask(mask_extra, pd.NA)
+        # Una sola asignación para todas las columnas modificadas
+        df_mod = df.assign(**new_cols) if new_cols else df
+        if counts is not None:
+            counts.update(replaced)
 
-        # Contar totales después de marcar extra_nulls
-        total_nulls = series.isna().sum()
-        replaced = int(total_nulls)
-
-        # Decidir valor de relleno según tipo
-        if pd.api.types.is_numeric_dtype(series.dtype):
-            fill_val = 0
+        if len(replaced) == 1:
+            name, n = next(iter(replaced.items()))
+            extra = policies[name]["null_values"] or set()
+            msg = f"✅ Se han reemplazado {n} valores nulos/en {set(extra)} en la columna '{name}'."
         else:
-            fill_val = ""
-
-        # Reemplazar
-        df_mod[col] = series.fillna(fill_val)
-
-        msg = f"✅ Se han reemplazado {replaced} valores nulos/en {extra_nulls} en la columna '{col}'."
+            msg = (
+                f"✅ Se han reemplazado {sum(replaced.values())} valores nulos/centinela en "
+                f"{len(replaced)} columnas: {replaced}."
+            )
         return 1, df_mod, msg
 
     except Exception as e:
-        err = f"❌ Error en transform_nulls para columna '{col}': {e}"
+        err = f"❌ Error en transform_nulls para columna(s) {col!r}: {e}"
         return 0, df, err
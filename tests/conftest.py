@@ -0,0 +1,7 @@
+# tests/conftest.py
+
+import sys
+from pathlib import Path
+
+# Las tareas se importan como en ETL.py: desde la raíz del repositorio
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,40 @@
+import duckdb
+import pandas as pd
+from prefect.logging import disable_run_logger
+
+from tasks.Quality.check_datatypes import check_datatypes
+from tasks.Transform.create_calendar import create_calendar
+
+QUALITY = {"Day": "datetime", "Week_day": "int", "Week_day_name": "str",
+           "Month": "int", "Month_name": "str", "Year": "int"}
+
+
+def test_calendar_names_stay_categorical():
+    with disable_run_logger():
+        _, _, cal = create_calendar.fn("01-01-2015", "31-01-2015")
+        code, msg, df = check_datatypes.fn(cal, QUALITY)
+
+    assert code == 0, msg
+    assert isinstance(df["Week_day_name"].dtype, pd.CategoricalDtype)
+    assert isinstance(df["Month_name"].dtype, pd.CategoricalDtype)
+    assert "No fue necesario ningún cambio" in msg
+
+
+def test_calendar_names_accepted_as_enum_in_sql():
+    with disable_run_logger():
+        _, _, cal = create_calendar.fn("01-01-2015", "31-01-2015")
+        con = duckdb.connect()
+        con.register("cal", cal)
+        code, msg, _ = check_datatypes.fn("cal", QUALITY, con=con)
+
+    assert code == 0, msg
+    assert "No fue necesario ningún cambio" in msg
+
+
+def test_numeric_categorical_is_converted_to_text():
+    df = pd.DataFrame({"c": pd.Categorical([1, 2, 1])})
+    with disable_run_logger():
+        code, msg, out = check_datatypes.fn(df, {"c": "str"})
+
+    assert code == 0, msg
+    assert out["c"].tolist() == ["1", "2", "1"]
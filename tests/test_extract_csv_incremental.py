@@ -0,0 +1,56 @@
+import json
+
+import pandas as pd
+
+from tasks.Extract.extract_csv_incremental import extract_csv_incremental
+
+
+def _write(path, rows):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("".join(f"{i};x{i}\n" for i in rows))
+
+
+def test_chunked_matches_full_read_and_watermark(tmp_path):
+    src, wm_path = tmp_path / "a.csv", tmp_path / "wm.json"
+    src.write_text("a;b\n", encoding="utf-8")
+    _write(src, range(10))
+
+    code, _, df, watermark = extract_csv_incremental.fn(str(src), ";", str(wm_path))
+    code_c, _, reader, watermark_c = extract_csv_incremental.fn(str(src), ";", str(wm_path), chunksize=4)
+    chunks = list(reader)
+
+    assert code == code_c == 0
+    assert [len(c) for c in chunks] == [4, 4, 2]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), df)
+    assert watermark_c == watermark
+
+
+def test_chunked_reads_only_appended_rows(tmp_path):
+    src, wm_path = tmp_path / "a.csv", tmp_path / "wm.json"
+    src.write_text("a;b\n", encoding="utf-8")
+    _write(src, range(5))
+    _, _, _, watermark = extract_csv_incremental.fn(str(src), ";", str(wm_path))
+    wm_path.write_text(json.dumps({str(src): watermark}), encoding="utf-8")
+
+    _write(src, [5, 6])
+    with open(src, "a", encoding="utf-8") as f:
+        f.write("7;x7")   # línea incompleta: queda para la siguiente ejecución
+
+    code, _, reader, new_wm = extract_csv_incremental.fn(str(src), ";", str(wm_path), chunksize=1)
+    df = pd.concat(list(reader), ignore_index=True)
+
+    assert code == 0
+    assert df["a"].tolist() == [5, 6]
+    assert new_wm["rows"] == 7
+
+
+def test_no_new_rows_returns_empty_frame(tmp_path):
+    src, wm_path = tmp_path / "a.csv", tmp_path / "wm.json"
+    src.write_text("a;b\n", encoding="utf-8")
+    _write(src, range(3))
+    _, _, _, watermark = extract_csv_incremental.fn(str(src), ";", str(wm_path))
+    wm_path.write_text(json.dumps({str(src): watermark}), encoding="utf-8")
+
+    code, _, df, _ = extract_csv_incremental.fn(str(src), ";", str(wm_path), chunksize=2)
+    assert code == 0
+    assert isinstance(df, pd.DataFrame) and df.empty
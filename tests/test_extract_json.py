@@ -0,0 +1,27 @@
+import json
+
+from prefect.logging import disable_run_logger
+
+from tasks.Extract.extract_json import extract_json
+
+RECORDS = [
+    {"a": "x", "b": ["1", "2"]},
+    {"a": None, "b": None},
+    {"b": ["p"]},   # clave "a" ausente
+]
+SETTINGS = {"a": "str", "b": "str"}
+
+
+def test_text_nulls_match_between_array_and_ndjson(tmp_path):
+    (tmp_path / "a.json").write_text(json.dumps(RECORDS), encoding="utf-8")
+    (tmp_path / "a.ndjson").write_text("\n".join(json.dumps(r) for r in RECORDS), encoding="utf-8")
+
+    with disable_run_logger():
+        code_a, _, df_array = extract_json.fn(str(tmp_path / "a.json"), SETTINGS)
+        code_n, _, df_ndjson = extract_json.fn(str(tmp_path / "a.ndjson"), SETTINGS)
+
+    assert code_a == code_n == 0
+    assert df_array.to_dict("list") == df_ndjson.to_dict("list") == {
+        "a": ["x", None, None],
+        "b": ["1 , 2", None, "p"],
+    }
@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+from prefect.logging import disable_run_logger
+
+from tasks.Transform.join_tables import join_tables
+
+LEFT = pd.DataFrame({
+    "k": ["c", "a", "b", "a"],
+    "li": [1, 2, 3, 4],
+    "ls": ["p", None, "r", "s"],
+    "lb": [True, False, True, True],
+    "ln": pd.array([1, None, 3, 4], dtype="Int64"),
+    "lc": pd.Categorical(["x", "y", "x", "y"]),
+})
+RIGHT = pd.DataFrame({
+    "k": ["a", "d", "a", "c"],
+    "ri": [10, 20, 30, 40],
+    "rs": ["w", "x", "y", "z"],
+    "rb": [True, False, False, True],
+    "rf": [1.5, 2.5, 3.5, 4.5],
+})
+THIRD = pd.DataFrame({"k": ["b", "a", "e"], "ti": [7, 8, 9]})
+
+
+@pytest.mark.parametrize("how", ["LEFT", "INNER", "FULL"])
+@pytest.mark.parametrize("frames", [(LEFT, RIGHT), (LEFT, RIGHT, THIRD)], ids=["two", "three"])
+def test_duckdb_join_matches_pandas_merge(how, frames):
+    with disable_run_logger():
+        code_pd, _, by_pandas = join_tables.fn("k", how, *frames, duckdb_min_rows=10**9)
+        code_db, msg, by_duckdb = join_tables.fn("k", how, *frames, duckdb_min_rows=0)
+
+    assert code_pd == code_db == 0
+    assert "DuckDB" in msg
+    pd.testing.assert_frame_equal(by_duckdb, by_pandas)
+
+
+def test_columns_differing_only_in_case_use_pandas():
+    other = pd.DataFrame({"k": ["a"], "LI": [1]})
+    with disable_run_logger():
+        code, msg, _ = join_tables.fn("k", "LEFT", LEFT, other, duckdb_min_rows=0)
+    assert code == 0
+    assert "pandas" in msg
@@ -0,0 +1,99 @@
+# tests/test_lazy_pipeline.py
+
+import pandas as pd
+import pytest
+from prefect.logging import disable_run_logger
+
+from tasks.Transform.lazy_pipeline import LazyPipeline, execute_pipeline
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "src.csv"
+    pd.DataFrame({"a": [1, 2], "b": ["x", "y"]}).to_csv(path, sep=";", index=False)
+    return str(path)
+
+
+def _append_zero(df, col):
+    df = df.copy()
+    df[col] = df[col].astype(str) + "0"
+    return 0, "append_zero ✅", df
+
+
+def test_cast_after_opaque_step_is_not_pushed(csv_path):
+    plan = LazyPipeline(csv_path).step(_append_zero, "a").cast({"a": "int"})
+
+    schema, _, steps = plan.optimize()
+    with disable_run_logger():
+        code, msg, df = execute_pipeline.fn(plan)
+
+    assert schema == {}
+    assert [st.op for st in steps] == ["transform", "cast"]
+    assert code == 0, msg
+    assert pd.api.types.is_integer_dtype(df["a"])
+    assert df["a"].tolist() == [10, 20]
+
+
+def test_cast_on_source_column_is_pushed(csv_path):
+    plan = LazyPipeline(csv_path).cast({"a": "float"})
+
+    schema, projected, steps = plan.optimize()
+
+    assert schema == {"a": "float"}
+    assert not projected
+    assert steps == []
+
+
+def test_chained_renames_compose(csv_path):
+    plan = LazyPipeline(csv_path).rename({"a": "b2"}).rename({"b2": "c", "b": "d"})
+
+    _, _, steps = plan.optimize()
+    with disable_run_logger():
+        code, msg, df = execute_pipeline.fn(plan)
+
+    assert [st.args[0] for st in steps] == [{"a": "c", "b": "d"}]
+    assert code == 0, msg
+    assert list(df.columns) == ["c", "d"]
+
+
+def test_rename_of_removed_name_fails_like_eager(csv_path):
+    plan = LazyPipeline(csv_path).rename({"a": "b2"}).rename({"a": "z"})
+
+    _, _, steps = plan.optimize()
+    with disable_run_logger():
+        code, _, _ = execute_pipeline.fn(plan)
+
+    assert [st.op for st in steps] == ["rename", "rename"]
+    assert code == 2
+
+
+def test_cast_of_renamed_away_column_is_not_pushed(csv_path):
+    plan = LazyPipeline(csv_path).rename({"a": "c"}).cast({"a": "int"})
+
+    schema, _, _ = plan.optimize()
+    with disable_run_logger():
+        code, _, _ = execute_pipeline.fn(plan)
+
+    assert "a" not in schema
+    assert code == 2
+
+
+def test_only_same_column_sorts_are_collapsed(tmp_path):
+    path = tmp_path / "dates.csv"
+    pd.DataFrame({"d1": ["20150102", "20150101", "20150103"],
+                  "d2": ["20150101", "20150101", "20150102"]}).to_csv(path, sep=";", index=False)
+    plan = (LazyPipeline(str(path))
+            .transform_date("d1").transform_date("d2")
+            .sort_dates("d1", "DES").sort_dates("d2", "ASC"))
+
+    _, _, steps = plan.optimize()
+    with disable_run_logger():
+        code, msg, lazy_df = execute_pipeline.fn(plan)
+    assert [st.args[0] for st in steps][-2:] == ["d1", "d2"]
+    assert code == 0, msg
+    # Empate en d2: decide el orden descendente de d1, como en la ejecución paso a paso
+    assert lazy_df["d1"].dt.day.tolist() == [2, 1, 3]
+
+    _, _, steps = LazyPipeline(str(path)).transform_date("d1").sort_dates("d1").sort_dates("d1", "DES").optimize()
+    assert [st.args for st in steps if st.args[0] == "d1"][-1] == ("d1", "DES", None)
+    assert sum(1 for st in steps if st.label().startswith("sort_dates")) == 1
@@ -0,0 +1,98 @@
+# tests/test_occurrence_index.py
+
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+
+from tasks.Transform.create_new_index import create_new_index
+from tasks.Transform.create_new_index_duckdb import create_new_index_duckdb
+from tasks.Transform.transform_col_unique import transform_col_unique
+
+CASES = {
+    "mixed_types": pd.Series([1, "1", "1", 2, 1.5, "1.5"], dtype=object),
+    "nulls": pd.Series(["20150101", None, "20150101", np.nan, None, "20150102"], dtype=object),
+    "nullable_int": pd.Series([20150101, None, 20150101, 20150102], dtype="Int64"),
+    "float_nan": pd.Series([1.0, np.nan, 1.0, np.nan]),
+}
+
+
+def _baseline_keys(values: pd.Series) -> list:
+    """Clave original: texto del valor (astype(str)) + número de ocurrencia de ese texto."""
+    text = values.astype(str)
+    return (text + text.groupby(text).cumcount().astype(str)).tolist()
+
+
+def _baseline_unique(values: pd.Series) -> list:
+    """transform_col_unique original: 'valor', 'valor - 2', 'valor - 3'... sobre el texto."""
+    text = values.fillna("").astype(str)
+    occ = text.groupby(text).cumcount()
+    return [t if n == 0 else f"{t} - {n + 1}" for t, n in zip(text, occ)]
+
+
+@pytest.mark.parametrize("name", ["mixed_types", "nullable_int"])
+def test_create_new_index_matches_astype_str_baseline(name):
+    # Solo valores válidos para create_new_index (dígitos y guiones)
+    values = CASES[name].dropna()
+    values = values[values.astype(str).str.fullmatch(r"[\d-]*\d[\d-]*")]
+    df = pd.DataFrame({"k": values.reset_index(drop=True)})
+
+    code, msg, out = create_new_index.fn(df, "k", "id")
+
+    assert code == 0, msg
+    assert out["id"].tolist() == _baseline_keys(df["k"])
+    assert out["id"].is_unique
+
+
+def test_create_new_index_groups_int_and_str_of_same_value():
+    df = pd.DataFrame({"k": pd.Series([1, "1", "1", 2], dtype=object)})
+
+    code, msg, out = create_new_index.fn(df, "k", "id")
+
+    assert code == 0, msg
+    assert out["id"].tolist() == ["10", "11", "12", "20"]
+
+
+COLLIDING = [["1-23", "12-3", "1-23"], ["2015-01-01", "20150101"]]
+
+
+@pytest.mark.parametrize("values", COLLIDING)
+def test_create_new_index_int_rejects_colliding_bases(values):
+    df = pd.DataFrame({"k": values})
+
+    code, msg, _ = create_new_index.fn(df, "k", "id", key_mode="int", stride=10)
+
+    assert code == 4, msg
+    assert "colisionarían" in msg
+
+
+@pytest.mark.parametrize("values", COLLIDING)
+def test_create_new_index_duckdb_int_rejects_colliding_bases(values):
+    con = duckdb.connect()
+    con.execute("CREATE TABLE src AS SELECT * FROM (SELECT unnest(?) AS k)", [values])
+
+    code, msg, _ = create_new_index_duckdb.fn(con, "src", "k", "id", "int", 10)
+
+    assert code == 4, msg
+    assert "colisionarían" in msg
+
+
+def test_create_new_index_int_keys_are_unique():
+    df = pd.DataFrame({"k": ["2015-01-01", "2015-01-01", "2015-01-02"]})
+
+    code, msg, out = create_new_index.fn(df, "k", "id", key_mode="int", stride=10)
+
+    assert code == 0, msg
+    assert out["id"].tolist() == [201501010, 201501011, 201501020]
+
+
+# Int64 queda fuera: fillna("") falla igual que en la versión original
+@pytest.mark.parametrize("name", ["mixed_types", "nulls", "float_nan"])
+def test_transform_col_unique_matches_baseline(name):
+    df = pd.DataFrame({"k": CASES[name]})
+
+    code, msg, out = transform_col_unique.fn(df, "k")
+
+    assert code == 0, msg
+    assert out["k"].tolist() == _baseline_unique(df["k"])
+    assert out["k"].is_unique
@@ -0,0 +1,28 @@
+import pandas as pd
+from prefect.logging import disable_run_logger
+
+from tasks.Quality.profile_columns import profile_columns, merge_profiles
+
+CHUNKS = [
+    pd.DataFrame({"id": ["a", "b", "b"], "n": [9, None, 2], "s": ["x", "y", None]}),
+    pd.DataFrame({"id": ["c", "c", "d"], "n": [10, 1, None], "s": ["w", None, "z"]}),
+]
+
+
+def test_merged_chunk_profiles_match_full_profile():
+    with disable_run_logger():
+        parts = [profile_columns.fn(c, "id")[2] for c in CHUNKS]
+        _, _, full = profile_columns.fn(pd.concat(CHUNKS, ignore_index=True), "id")
+
+    merged = None
+    for part in parts:
+        merged = merge_profiles(merged, part)
+
+    assert merged["rows"] == full["rows"]
+    for col, stats in full["columns"].items():
+        for field in ("dtype", "nulls", "min", "max"):
+            assert merged["columns"][col][field] == stats[field], (col, field)
+    # Duplicados de la PK dentro de cada bloque
+    assert merged["pk_duplicates"]["values"] == full["pk_duplicates"]["values"] == 2
+    # El primer perfil no se modifica al acumular
+    assert parts[0]["rows"] == 3
@@ -0,0 +1,99 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("bs4")
+from tasks.Extract import scrape_holidays as sh
+
+PAGE = """<html><body><table class="country-table"><tbody>
+<tr><td>Thursday</td><td>Jan 01</td><td>New Year's Day</td><td>Public Holiday</td><td></td></tr>
+<tr><td>Thursday</td><td>Mar 19</td><td>{name}</td><td>Regional Holiday</td><td></td></tr>
+<tr><td>Sunday</td><td>Mar 22</td><td>Some Observance</td><td>Observance</td><td></td></tr>
+</tbody></table></body></html>"""
+
+
+class _Site:
+    """Estado del servidor de prueba: páginas por ruta, su ETag y las respuestas enviadas."""
+
+    def __init__(self):
+        self.pages = {}
+        self.statuses = []
+
+    def set_page(self, slug, year, name, etag):
+        self.pages[f"/countries/spain/{slug}/{year}"] = (PAGE.format(name=name), etag)
+
+
+@pytest.fixture
+def site():
+    state = _Site()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            html, etag = state.pages[self.path]
+            if self.headers.get("If-None-Match") == etag:
+                state.statuses.append(304)
+                self.send_response(304)
+                self.end_headers()
+                return
+            body = html.encode("utf-8")
+            state.statuses.append(200)
+            self.send_response(200)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    state.base_url = f"http://127.0.0.1:{server.server_port}/countries/spain/{{slug}}/{{year}}"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_page_reuses_cache_on_304(site, tmp_path):
+    site.set_page("madrid", 2015, "San José", '"v1"')
+
+    html, estado = sh.fetch_page("madrid", 2015, site.base_url, tmp_path)
+    assert estado == "descargada"
+
+    cached, estado = sh.fetch_page("madrid", 2015, site.base_url, tmp_path)
+    assert estado == "revalidada"
+    assert cached == html
+    assert site.statuses == [200, 304]
+
+    site.set_page("madrid", 2015, "San José (trasladado)", '"v2"')
+    changed, estado = sh.fetch_page("madrid", 2015, site.base_url, tmp_path)
+    assert estado == "modificada"
+    assert "trasladado" in changed
+    assert site.statuses == [200, 304, 200]
+
+
+def test_merge_year_reuses_result_until_a_page_changes(site, tmp_path):
+    site.set_page("madrid", 2015, "San José", '"m1"')
+    site.set_page("murcia", 2015, "San José", '"u1"')
+    pages = [(region, sh.fetch_page(slug, 2015, site.base_url, tmp_path)[0])
+             for region, slug in [("Madrid", "madrid"), ("Murcia", "murcia")]]
+
+    holidays, reused = sh.merge_year(2015, pages, tmp_path)
+    assert not reused
+    assert holidays == [
+        {"Day": "01-01-2015", "Name": "New Year's Day", "Type": "Nacional", "Region": "Todas", "Comments": ""},
+        {"Day": "19-03-2015", "Name": "San José", "Type": "Regional", "Region": ["Madrid", "Murcia"], "Comments": ""},
+    ]
+
+    again, reused = sh.merge_year(2015, pages, tmp_path)
+    assert reused
+    assert again == holidays
+
+    site.set_page("murcia", 2015, "Día de San José", '"u2"')
+    pages[1] = ("Murcia", sh.fetch_page("murcia", 2015, site.base_url, tmp_path)[0])
+    changed, reused = sh.merge_year(2015, pages, tmp_path)
+    assert not reused
+    assert changed[1]["Comments"] == "Día de San José"